@@ -0,0 +1,60 @@
+"""Backend maintenance commands, run from the repository root.
+
+    python -m backend seed-admin     create the admin user from ADMIN_EMAIL / ADMIN_PASSWORD
+    python -m backend rebuild-stats  recompute the dashboard counters from a full scan
+
+Configuration comes from the environment and backend/.env, as for the API.
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# The backend modules import each other as top-level modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+async def seed_admin() -> int:
+    import server
+
+    if len(server.ADMIN_PASSWORD) < 6:
+        print("ADMIN_PASSWORD must be set to at least 6 characters", file=sys.stderr)
+        return 2
+    await server.storage.connect()
+    try:
+        created = await server.seed_admin(server.ADMIN_EMAIL, server.ADMIN_PASSWORD)
+    finally:
+        server.password_hasher.shutdown()
+        await server.storage.close()
+    print(f"Admin {server.ADMIN_EMAIL} {'created' if created else 'already exists'} ({server.storage.name} storage)")
+    return 0
+
+
+async def rebuild_stats() -> int:
+    import server
+
+    await server.storage.connect()
+    try:
+        stats = await server.storage.rebuild_contact_request_stats()
+    finally:
+        server.password_hasher.shutdown()
+        await server.storage.close()
+    print(f"Rebuilt stats for {stats['total']} contact requests ({server.storage.name} storage)")
+    return 0
+
+
+COMMANDS = {
+    "seed-admin": seed_admin,
+    "rebuild-stats": rebuild_stats,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m backend", description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args()
+    sys.exit(asyncio.run(COMMANDS[args.command]()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import jwt
+
+
+class InvalidToken(Exception):
+    """Token is malformed, expired or not signed by any active secret"""
+
+
+class TokenVerifier:
+    """JWT verification with a bounded LRU of already-verified tokens.
+
+    The dashboard presents the same token on every poll, so the claims of a
+    verified token are kept (keyed by the token's SHA-256, never the token
+    itself) until its `exp` passes. `secrets[0]` signs new tokens; the rest
+    are previous secrets still accepted during a rotation. Failed tokens are
+    not cached, so garbage cannot push valid entries out.
+    """
+
+    def __init__(self, secrets: List[str], algorithm: str = "HS256", cache_size: int = 1024):
+        self.algorithm = algorithm
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, dict]" = OrderedDict()
+        self.set_secrets(secrets)
+
+    def set_secrets(self, secrets: List[str]) -> None:
+        """Replace the active secrets; tokens verified under the old set are forgotten"""
+        secrets = [s for s in secrets if s]
+        if not secrets:
+            raise ValueError("At least one JWT secret is required")
+        self.secrets = secrets
+        self._cache.clear()
+
+    @property
+    def signing_secret(self) -> str:
+        return self.secrets[0]
+
+    def encode(self, payload: dict) -> str:
+        return jwt.encode(payload, self.signing_secret, algorithm=self.algorithm)
+
+    def _decode(self, token: str) -> dict:
+        for secret in self.secrets:
+            try:
+                return jwt.decode(token, secret, algorithms=[self.algorithm], options={"require": ["exp"]})
+            except jwt.InvalidSignatureError:
+                continue
+            except jwt.PyJWTError as e:
+                raise InvalidToken(str(e)) from e
+        raise InvalidToken("Signature verification failed")
+
+    def verify(self, token: str) -> dict:
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        claims = self._cache.get(key)
+        if claims is not None:
+            if claims["exp"] > time.time():
+                self._cache.move_to_end(key)
+                return claims
+            del self._cache[key]
+            raise InvalidToken("Signature has expired")
+
+        claims = self._decode(token)
+        if self.cache_size > 0:
+            self._cache[key] = claims
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return claims
+
+    def cached(self) -> int:
+        return len(self._cache)
+
+
+def parse_secrets(current: str, previous: Optional[str]) -> List[str]:
+    """JWT_SECRET first, then the comma-separated JWT_PREVIOUS_SECRETS"""
+    return [current] + [s.strip() for s in (previous or "").split(",") if s.strip()]
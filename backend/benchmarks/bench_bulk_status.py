@@ -0,0 +1,135 @@
+"""Changing the status of many contact requests: one bulk call vs one update per id.
+
+Loads `--rows` requests, then moves `--ids` of them to a new status three
+ways and reports wall time and backend requests (Supabase): per id
+(`update_contact_request_status` in a loop, what a client without the bulk
+endpoint has to do), in one `update_contact_request_statuses` call, and
+through `PATCH /api/contact-requests/status` (adds validation and the
+per-id response). Exits 1 unless every id reports updated and the
+dashboard counters still match a full scan.
+
+    cd backend && python -m benchmarks.bench_bulk_status --ids 10000
+    cd backend && python -m benchmarks.bench_bulk_status --backend supabase --delay 0.002
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from benchmarks.fakes import FakePostgREST
+from storage.base import contact_request_stat_keys, stats_from_counts
+
+os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+
+PROJECT_TYPES = ('landing', 'e-commerce', 'web-app', 'blog.personal', 'otro $tipo')
+ZONES = (timezone.utc, timezone(timedelta(hours=-3)), timezone(timedelta(hours=9)))
+
+
+def make_row(rng: random.Random) -> dict:
+    created_at = datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=rng.randrange(90 * 86400))
+    return {
+        'id': str(uuid.UUID(int=rng.getrandbits(128))),
+        'name': 'Cliente',
+        'email': 'cliente@example.com',
+        'phone': None,
+        'company': None,
+        'project_type': rng.choice(PROJECT_TYPES),
+        'budget': None,
+        'timeline': None,
+        'description': 'Necesitamos una tienda online.',
+        'created_at': created_at.astimezone(rng.choice(ZONES)),
+        'status': 'pending',
+    }
+
+
+async def full_scan(storage) -> dict:
+    counts = Counter()
+    async for row in storage.iter_contact_requests():
+        counts.update(contact_request_stat_keys(row))
+    return stats_from_counts((dimension, value, count) for (dimension, value), count in counts.items())
+
+
+async def per_id(storage, ids: list, status: str) -> bool:
+    results = [await storage.update_contact_request_status(request_id, status) for request_id in ids]
+    return all(results)
+
+
+async def bulk(storage, ids: list, status: str) -> bool:
+    outcomes = await storage.update_contact_request_statuses(ids, status)
+    return all(result == 'updated' for result, _ in outcomes.values())
+
+
+async def through_api(server, ids: list, status: str) -> bool:
+    token = server.create_jwt_token('admin@lsweb.com', 'admin')
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        response = await client.patch('/api/contact-requests/status', json={'ids': ids, 'status': status},
+                                      headers={'Authorization': f'Bearer {token}'})
+    return response.status_code == 200 and response.json()['updated'] == len(ids)
+
+
+async def run(args, server, postgrest=None) -> bool:
+    storage = server.storage
+    await storage.connect()
+    try:
+        rng = random.Random(args.random_seed)
+        rows = [make_row(rng) for _ in range(args.rows)]
+        for start in range(0, len(rows), 1000):
+            await storage.insert_contact_requests(rows[start:start + 1000])
+        ids = [row['id'] for row in rng.sample(rows, args.ids)]
+
+        ok, baseline = True, None
+        print(f"{args.ids} of {args.rows} rows ({storage.name})")
+        for name, fn, status in (('per id', per_id, 'contacted'), ('bulk', bulk, 'completed'),
+                                 ('bulk via API', lambda s, i, st: through_api(server, i, st), 'pending')):
+            requests = postgrest.requests if postgrest else 0
+            start = time.perf_counter()
+            updated = await fn(storage, ids, status)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            ok = ok and updated
+            line = f"{name:>13}: {elapsed * 1000:9.1f} ms  ({baseline / elapsed:6.1f}x)"
+            if postgrest:
+                line += f"  {postgrest.requests - requests:6d} backend requests"
+            print(line + ('' if updated else '  NOT ALL UPDATED'))
+        consistent = await storage.contact_request_stats() == await full_scan(storage)
+        print(f"counters consistent: {consistent}")
+        return ok and consistent
+    finally:
+        await storage.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', choices=('sqlite', 'supabase', 'mongo'), default='sqlite')
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--ids', type=int, default=10_000)
+    parser.add_argument('--delay', type=float, default=0.0, help='fake PostgREST latency per request (s)')
+    parser.add_argument('--random-seed', type=int, default=7)
+    args = parser.parse_args()
+
+    os.environ['STORAGE_BACKEND'] = args.backend
+    os.environ['CONTACT_SPOOL_PATH'] = ''
+    if args.backend == 'sqlite':
+        os.environ.setdefault('SQLITE_PATH', ':memory:')
+    if args.backend == 'supabase':
+        with FakePostgREST(delay=args.delay) as postgrest:
+            os.environ.update(SUPABASE_URL=postgrest.url, SUPABASE_KEY='bench-key')
+            import server
+            ok = asyncio.run(run(args, server, postgrest))
+    else:
+        # mongo: MONGO_URL / DB_NAME of a local mongod, with an empty contact_requests collection
+        import server
+        ok = asyncio.run(run(args, server))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""Digest mode: SMTP sends per submission, and restart safety of the digest scheduler.
+
+Two parts, against a fake SMTP relay that keeps every message it accepts:
+
+- sends: `--requests` POST /api/contact-request with a mix of project types
+  and budgets, in three modes: immediate (one admin email per lead), digest
+  with the priority rule, and digest with every lead held back. Reports SMTP
+  messages and connections per 1000 submissions; every lead must appear in
+  exactly one delivered email.
+- restart: `--rounds` times, a child process enqueues leads and runs the
+  outbox worker on a shared SQLite outbox file, and is SIGKILLed at a random
+  moment, so digests are left open, due or half flushed. A final worker then
+  drains the file. Every lead the child acknowledged must be delivered, and
+  never in two different emails; a message resent under the same Message-ID
+  (the relay accepted it, the kill came before it was marked sent) is the
+  outbox's usual at-least-once window and is reported separately.
+
+Windows are scaled down (`--window` seconds instead of minutes). Exits 1 if
+a lead was lost or delivered twice.
+
+    cd backend && python -m benchmarks.bench_digest --requests 1000 --rounds 10
+"""
+import argparse
+import asyncio
+import email
+import os
+import random
+import re
+import signal
+import sqlite3
+import subprocess
+import sys
+import logging
+import tempfile
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import httpx
+
+from benchmarks.fakes import FakePostgREST, FakeSMTPServer
+
+PROJECT_TYPES = ['web-corporativa', 'e-commerce', 'sistema-ventas-bd', 'crm-personalizado', 'landing-page',
+                 'blog', 'app-web', 'marketing-digital', 'community-management']
+BUDGETS = [None, '$500 - $1,500', '$1,500 - $3,000', '$3,000 - $5,000', '$5,000 - $10,000', '$10,000+', 'Consultar']
+REF = re.compile(r'ref-(\S+)')
+
+
+def lead(rng: random.Random, ref: str) -> dict:
+    return {'name': 'Cliente', 'email': 'cliente@example.com', 'phone': None, 'company': None,
+            'projectType': rng.choice(PROJECT_TYPES), 'budget': rng.choice(BUDGETS), 'timeline': None,
+            'description': f'Necesitamos una web nueva. ref-{ref}'}
+
+
+def delivered(smtp) -> dict:
+    """ref -> {Message-ID: times accepted} over the admin emails the relay kept"""
+    refs = defaultdict(lambda: defaultdict(int))
+    for raw in smtp.received:
+        message = email.message_from_bytes(raw)
+        for part in message.walk():
+            if part.get_content_type() == 'text/plain':
+                for ref in REF.findall(part.get_payload(decode=True).decode()):
+                    refs[ref][message['Message-ID']] += 1
+    return refs
+
+
+def check(label: str, acknowledged: set, refs: dict) -> bool:
+    lost = acknowledged - set(refs)
+    doubled = [ref for ref in acknowledged if len(refs.get(ref, ())) > 1]
+    resent = sum(count - 1 for ref in acknowledged for count in refs.get(ref, {}).values())
+    ok = not lost and not doubled
+    print(f"{label}: {len(acknowledged)} acknowledged, {len(lost)} lost, {len(doubled)} in two emails, "
+          f"{resent} resent under the same Message-ID" + ('' if ok else '  FAILED'))
+    return ok
+
+
+def held(path: str) -> int:
+    """Outbox rows still waiting to be sent or folded"""
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM email_outbox WHERE status IN ('pending', 'digest')").fetchone()[0]
+
+
+async def drain(worker, path: str) -> None:
+    while held(path):
+        if not await worker.run_once():
+            # Open digests wait for their window, leased messages for the lease
+            await asyncio.sleep(0.05)
+
+
+async def sends(args, server, smtp, client) -> bool:
+    digest, ok = server.email_digest, True
+    priority = server.priority_project_types, server.EMAIL_DIGEST_PRIORITY_MIN_BUDGET
+    modes = {'immediate': None, 'digest': priority, 'digest, no priority': (set(), float('inf'))}
+    for mode, rule in modes.items():
+        rng = random.Random(args.random_seed)
+        server.email_digest = digest if rule is not None else None
+        if rule is not None:
+            server.priority_project_types, server.EMAIL_DIGEST_PRIORITY_MIN_BUDGET = rule
+        smtp.received.clear()
+        messages, connections = smtp.messages, smtp.connections
+        acknowledged, priority_leads = set(), 0
+        for i in range(args.requests):
+            body = lead(rng, f'{mode.replace(" ", "")}-{i}')
+            response = await client.post('/api/contact-request', json=body)
+            assert response.status_code == 200, response.text
+            acknowledged.add(f'{mode.replace(" ", "")}-{i}')
+            priority_leads += server.is_priority_lead(dict(body, project_type=body['projectType']))
+        await drain(server.outbox, os.environ['OUTBOX_SQLITE_PATH'])
+        per_1000 = 1000 / args.requests
+        share = f", {priority_leads * 100 // args.requests}% priority leads" if mode == 'digest' else ''
+        print(f"{mode:>19}: {(smtp.messages - messages) * per_1000:6.0f} SMTP messages per 1000 submissions "
+              f"over {smtp.connections - connections} new connections{share}")
+        ok = check(f"{'':>19}", acknowledged, delivered(smtp)) and ok
+    server.email_digest = digest
+    server.priority_project_types, server.EMAIL_DIGEST_PRIORITY_MIN_BUDGET = priority
+    return ok
+
+
+def writer(seed: str) -> None:
+    """Child process of the restart test: acknowledges refs on stdout until killed"""
+    import server
+
+    async def loop():
+        rng = random.Random(seed)
+        # Leases left by a killed child expire quickly, as they would after a crash
+        server.outbox.lease = timedelta(seconds=1)
+        server.outbox.start()
+        i = 0
+        while True:
+            body = lead(rng, f'{seed}-{i}')
+            contact = dict(body, id=str(uuid.uuid4()), project_type=body['projectType'],
+                           created_at=datetime.utcnow(), status='pending')
+            for message in server.render_email(contact):
+                await server.outbox.enqueue(message)
+            print(f'{seed}-{i}', flush=True)
+            i += 1
+            await asyncio.sleep(rng.uniform(0, 0.02))
+
+    asyncio.run(loop())
+
+
+async def restart(args, server, smtp, path: str) -> bool:
+    from outbox import OutboxWorker, SQLiteOutboxStore
+
+    rng = random.Random(args.random_seed)
+    smtp.received.clear()
+    acknowledged = set()
+    for round_ in range(args.rounds):
+        child = subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_digest', '--writer', f'r{round_}'],
+                                 stdout=subprocess.PIPE, text=True, env=dict(os.environ, OUTBOX_SQLITE_PATH=path))
+        await asyncio.sleep(rng.uniform(1.0, 3.0))
+        child.send_signal(signal.SIGKILL)
+        out, _ = child.communicate()
+        # A partial last line is a ref the child was still printing, not yet acknowledged
+        acknowledged.update(line for line in out.split('\n')[:-1] if line)
+
+    left = held(path)
+    worker = OutboxWorker(SQLiteOutboxStore(path), server.send_email, send_batch=server.send_emails,
+                          poll_interval=0.05, lease=1, render_digest=server.render_digest)
+    await drain(worker, path)
+    print(f"restart: {args.rounds} kills, {left} rows held or pending afterwards, "
+          f"{worker.results['digested']} folded and {worker.results['sent']} sent by the final drain")
+    return check('restart', acknowledged, delivered(smtp))
+
+
+async def run(args, server, smtp, path: str) -> bool:
+    await server.storage.connect()
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            ok = await sends(args, server, smtp, client)
+        ok = await restart(args, server, smtp, path) and ok
+    finally:
+        await server.smtp_pool.close()
+        await server.storage.close()
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--window', type=float, default=1.0, help='digest window (s)')
+    parser.add_argument('--max-items', type=int, default=25)
+    parser.add_argument('--random-seed', type=int, default=7)
+    parser.add_argument('--writer', metavar='SEED', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    if args.writer:
+        writer(args.writer)
+        return
+
+    with FakePostgREST() as postgrest, FakeSMTPServer(keep=True) as smtp, \
+            tempfile.TemporaryDirectory() as directory:
+        os.environ.update(
+            STORAGE_BACKEND='supabase', SUPABASE_URL=postgrest.url, SUPABASE_KEY='bench-key',
+            SMTP_HOST='127.0.0.1', SMTP_PORT=str(smtp.port), SMTP_USER='bench@lsweb.com', SMTP_PASSWORD='bench',
+            SMTP_STARTTLS='false', OUTBOX_SQLITE_PATH=os.path.join(directory, 'outbox.db'),
+            OUTBOX_POLL_INTERVAL='0.05', EMAIL_DIGEST_ENABLED='true', EMAIL_DIGEST_WINDOW=str(args.window),
+            EMAIL_DIGEST_MAX_ITEMS=str(args.max_items), EMAIL_DIGEST_GRACE=str(args.window / 5),
+            CONTACT_SPOOL_PATH='', RATE_LIMIT_ENABLED='false',
+        )
+        import server
+        ok = asyncio.run(run(args, server, smtp, os.path.join(directory, 'restart-outbox.db')))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
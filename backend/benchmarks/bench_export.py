@@ -0,0 +1,82 @@
+"""Export memory: materialised list (old GET path) vs the streaming exporter.
+
+Feeds synthetic rows through each path and reports the tracemalloc peak.
+The streaming peak stays flat as --rows grows; the materialised one grows
+linearly, so it is skipped above --materialize-limit rows.
+
+    cd backend && python -m benchmarks.bench_export --rows 1000000 --gzip
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from export import export_stream
+
+BASE = datetime(2025, 1, 1)
+
+
+def make_row(i: int) -> dict:
+    return {
+        'id': f'{i:08d}-0000-0000-0000-000000000000',
+        'name': f'Cliente {i}',
+        'email': f'cliente{i}@example.com',
+        'phone': '+54 11 5555-5555',
+        'company': 'Empresa Ejemplo S.A.',
+        'project_type': 'e-commerce',
+        'budget': '1000-3000',
+        'timeline': '1-2 meses',
+        'description': 'Necesitamos una tienda online con catálogo, pagos y envíos a todo el país.',
+        'created_at': BASE + timedelta(seconds=i),
+        'status': 'pending',
+    }
+
+
+async def synthetic_rows(count: int):
+    for i in range(count):
+        yield make_row(i)
+
+
+async def streaming(rows: int, fmt: str, compress: bool) -> int:
+    size = 0
+    async for chunk in export_stream(synthetic_rows(rows), fmt, compress):
+        size += len(chunk)
+    return size
+
+
+def materialised(rows: int) -> int:
+    data = [make_row(i) for i in range(rows)]
+    return len(json.dumps(data, default=datetime.isoformat).encode('utf-8'))
+
+
+def measure(fn) -> tuple:
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, peak, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--format', choices=('ndjson', 'csv'), default='ndjson')
+    parser.add_argument('--gzip', action='store_true')
+    parser.add_argument('--materialize-limit', type=int, default=200_000)
+    args = parser.parse_args()
+
+    runs = [('streaming', lambda: asyncio.run(streaming(args.rows, args.format, args.gzip)))]
+    if args.rows <= args.materialize_limit:
+        runs.insert(0, ('materialised', lambda: materialised(args.rows)))
+    for name, fn in runs:
+        size, peak, elapsed = measure(fn)
+        print(f"{name:>12}: {args.rows} rows  {size / 1e6:8.1f} MB out  "
+              f"peak {peak / 1e6:8.1f} MB  {elapsed:6.1f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""JWT verification throughput: decode on every request vs the verified-token cache.
+
+Replays dashboard-style polling, where a handful of admin tokens are
+presented over and over, with one active secret and during a key rotation
+(token signed by the previous secret, so the uncached path tries two keys).
+
+    cd backend && python -m benchmarks.bench_jwt --verifications 100000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from auth import TokenVerifier
+
+
+def tokens(verifier: TokenVerifier, count: int) -> list:
+    exp = datetime.utcnow() + timedelta(hours=24)
+    return [verifier.encode({"email": f"admin{i}@lsweb.com", "role": "admin", "exp": exp}) for i in range(count)]
+
+
+def run(verifier: TokenVerifier, presented: list, verifications: int) -> float:
+    start = time.perf_counter()
+    for i in range(verifications):
+        verifier.verify(presented[i % len(presented)])
+    return verifications / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--verifications', type=int, default=100_000)
+    parser.add_argument('--tokens', type=int, default=10, help='distinct tokens in rotation')
+    args = parser.parse_args()
+
+    for scenario, secrets in (('one secret', ['current-secret-' * 3]),
+                              ('rotation', ['current-secret-' * 3, 'previous-secret-' * 3])):
+        presented = tokens(TokenVerifier([secrets[-1]]), args.tokens)
+        for mode, cache_size in (('uncached', 0), ('cached', 1024)):
+            rate = run(TokenVerifier(secrets, cache_size=cache_size), presented, args.verifications)
+            print(f"{scenario:>10} {mode:>8}: {rate:10.0f} verifications/s  {1e6 / rate:6.2f} us each")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Dashboard list throughput: uncached vs cached page vs 304 revalidation.
+
+Boots `server.app` in-process on the embedded SQLite storage (or
+FakePostgREST with `--backend supabase`), seeds `--seed` rows and fetches
+the same page `--requests` times as the dashboard poll does: with the
+response cache disabled (the previous behaviour), warm with a 200, and warm
+with `If-None-Match` answered by 304.
+
+    cd backend && python -m benchmarks.bench_list_cache --seed 2000 --limit 50
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from benchmarks.fakes import FakePostgREST, FakeSMTPServer
+from benchmarks.load import configure_env, seed
+
+
+async def fetch(client, requests: int, params: dict, headers: dict, expect: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = await client.get('/api/contact-requests', params=params, headers=headers)
+        assert response.status_code == expect, response.status_code
+    return requests / (time.perf_counter() - start)
+
+
+async def run(args) -> None:
+    import httpx
+    import server
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    await server.startup_event()
+    await seed(server.storage, args.seed)
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            auth = {'Authorization': f"Bearer {server.create_jwt_token('admin@lsweb.com', 'admin')}"}
+            params = {'limit': args.limit}
+
+            max_bytes, server.list_cache.max_bytes = server.list_cache.max_bytes, 0
+            uncached = await fetch(client, args.requests, params, auth, 200)
+            server.list_cache.max_bytes = max_bytes
+            server.list_cache.ttl = 3600
+
+            etag = (await client.get('/api/contact-requests', params=params, headers=auth)).headers['etag']
+            cached = await fetch(client, args.requests, params, auth, 200)
+            not_modified = await fetch(client, args.requests, params, {**auth, 'If-None-Match': etag}, 304)
+    finally:
+        await server.shutdown_db_client()
+
+    print(f"{args.backend}, {args.seed} rows, limit={args.limit}")
+    print(f"        uncached: {uncached:8.1f} req/s")
+    print(f"      cached 200: {cached:8.1f} req/s  ({cached / uncached:.1f}x)")
+    print(f" revalidated 304: {not_modified:8.1f} req/s  ({not_modified / uncached:.1f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', choices=('sqlite', 'supabase'), default='sqlite')
+    parser.add_argument('--seed', type=int, default=2000)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args()
+
+    with FakeSMTPServer() as smtp:
+        if args.backend == 'supabase':
+            with FakePostgREST() as postgrest:
+                configure_env(args.backend, smtp.port, postgrest.url)
+                asyncio.run(run(args))
+        else:
+            configure_env(args.backend, smtp.port)
+            asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+"""Live feed: memory and CPU of idle SSE subscribers, fan-out latency, slow clients.
+
+Starts `uvicorn server:app` on the embedded SQLite storage and opens
+`--subscribers` GET /api/contact-requests/stream connections (raw sockets,
+so the client side stays cheap). Reports, for the server process:
+
+- RSS per open stream, and CPU per connect (what the reconnect every
+  LIVE_STREAM_MAX_AGE seconds costs);
+- CPU while all streams sit idle for `--idle` seconds, heartbeats included;
+- `--events` submissions: time until every subscriber has the event, and
+  server CPU per event fanned out.
+
+Then, with the subscribers closed, one client with a tiny receive buffer
+stops reading while large submissions arrive. The server must drop it
+(live_subscribers_dropped_total) instead of buffering without limit, and a
+reconnect with Last-Event-ID must deliver every event it missed, once. Exits 1 if an event is lost or duplicated.
+
+    cd backend && python -m benchmarks.bench_live --subscribers 1000 --idle 30
+"""
+import argparse
+import asyncio
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+import jwt
+
+from benchmarks.bench_startup import free_port
+
+SECRET = 'bench-secret-for-the-live-feed-benchmark'
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+
+def rss(pid: int) -> int:
+    with open(f'/proc/{pid}/status') as status:
+        return next(int(line.split()[1]) * 1024 for line in status if line.startswith('VmRSS:'))
+
+
+def cpu(pid: int) -> float:
+    """User + system CPU seconds used so far"""
+    with open(f'/proc/{pid}/stat') as stat:
+        fields = stat.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+class Subscriber:
+    """One SSE connection read with a minimal chunked-encoding parser"""
+
+    def __init__(self):
+        self.received = {}  # row id -> time received
+        self.order = []
+        self.last_id = None
+        self.pings = 0
+        self.ended = asyncio.Event()
+        self._buffer = b''
+
+    async def connect(self, port: int, token: str, last_event_id: str = None, rcvbuf: int = 0) -> None:
+        sock = socket.socket()
+        if rcvbuf:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, ('127.0.0.1', port))
+        self.reader, self.writer = await asyncio.open_connection(sock=sock, limit=1 << 20)
+        headers = f'Authorization: Bearer {token}\r\n'
+        if last_event_id:
+            headers += f'Last-Event-ID: {last_event_id}\r\n'
+        self.writer.write(f'GET /api/contact-requests/stream HTTP/1.1\r\nHost: bench\r\n{headers}\r\n'.encode())
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        assert head.startswith(b'HTTP/1.1 200'), head
+
+    def _events(self, data: bytes) -> None:
+        self._buffer += data
+        *events, self._buffer = self._buffer.split(b'\n\n')
+        for event in events:
+            if event.startswith(b': ping'):
+                self.pings += 1
+            match = re.search(rb'^id: (\S+)\nevent: contact_request\ndata: \{"id":"([^"]+)"', event)
+            if match:
+                self.last_id = match.group(1).decode()
+                row_id = match.group(2).decode()
+                self.received[row_id] = time.perf_counter()
+                self.order.append(row_id)
+
+    async def read(self) -> None:
+        try:
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                if size == 0:
+                    break
+                self._events((await self.reader.readexactly(size + 2))[:-2])
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        self.ended.set()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+async def submit(client, i: int, description: str) -> str:
+    response = await client.post('/api/contact-request', json={
+        'name': 'Cliente', 'email': 'cliente@example.com', 'projectType': 'landing-page',
+        'description': f'{description} {i}',
+    })
+    assert response.status_code == 200, response.text
+    return response.json()['id']
+
+
+async def dropped(client) -> int:
+    metrics = (await client.get('/metrics')).text
+    return int(float(re.search(r'^live_subscribers_dropped_total (\S+)$', metrics, re.M).group(1)))
+
+
+async def idle_subscribers(args, pid: int, port: int, token: str, client) -> None:
+    # Warm up the stream path so lazy imports and caches are not charged to the subscribers
+    warm = Subscriber()
+    await warm.connect(port, token)
+    warm.close()
+    await submit(client, -1, 'Calentamiento del feed en vivo.')
+    await asyncio.sleep(0.5)
+
+    base_rss, base_cpu = rss(pid), cpu(pid)
+    subscribers, readers = [], []
+    for start in range(0, args.subscribers, 50):
+        batch = [Subscriber() for _ in range(min(50, args.subscribers - start))]
+        await asyncio.gather(*(s.connect(port, token) for s in batch))
+        subscribers += batch
+        readers += [asyncio.create_task(s.read()) for s in batch]
+    await asyncio.sleep(1)
+    connect_cpu = cpu(pid) - base_cpu
+    per_stream = (rss(pid) - base_rss) / args.subscribers
+    print(f"{args.subscribers} streams: +{(rss(pid) - base_rss) / 2 ** 20:.1f} MiB RSS "
+          f"({per_stream / 1024:.1f} KiB each), {connect_cpu / args.subscribers * 1000:.2f} ms CPU per connect")
+    churn = connect_cpu / args.max_age * 100
+    print(f"{'':>8}reconnecting every LIVE_STREAM_MAX_AGE={args.max_age:g}s: ~{churn:.2f}% of a CPU")
+
+    before, start = cpu(pid), time.perf_counter()
+    await asyncio.sleep(args.idle)
+    used, elapsed = cpu(pid) - before, time.perf_counter() - start
+    pings = sum(s.pings for s in subscribers)
+    print(f"idle {elapsed:.0f}s: {used * 1000:.0f} ms CPU ({used / elapsed * 100:.2f}% of a CPU), "
+          f"{pings} heartbeats delivered (LIVE_HEARTBEAT={args.heartbeat:g}s)")
+
+    latencies, before = [], cpu(pid)
+    for i in range(args.events):
+        sent = time.perf_counter()
+        row_id = await submit(client, i, 'Evento para los suscriptores del feed.')
+        while sum(row_id in s.received for s in subscribers) < len(subscribers):
+            await asyncio.sleep(0.005)
+        latencies.append(max(s.received[row_id] for s in subscribers) - sent)
+    used = cpu(pid) - before
+    latencies.sort()
+    print(f"fan-out of {args.events} events to {args.subscribers} streams: last delivery p50 "
+          f"{latencies[len(latencies) // 2] * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms; "
+          f"{used / args.events * 1000:.1f} ms server CPU per event (submission included)")
+
+    for s in subscribers:
+        s.close()
+    await asyncio.gather(*readers)
+
+
+async def slow_client(args, pid: int, port: int, token: str, client) -> bool:
+    dropped_before, base_rss = await dropped(client), rss(pid)
+    slow = Subscriber()
+    await slow.connect(port, token, rcvbuf=4096)
+    # Kernel socket buffers absorb the first few MiB, so post until the server gives up on the client
+    posted, drops = [], 0
+    while not drops and len(posted) < args.slow_events:
+        posted.append(await submit(client, len(posted), 'Proyecto grande. ' + 'x' * 1900))
+        if len(posted) % 50 == 0:
+            drops = await dropped(client) - dropped_before
+    at_drop = len(posted)
+    posted += [await submit(client, len(posted), 'Proyecto grande. ' + 'x' * 1900) for _ in range(args.after_drop)]
+    grown = rss(pid) - base_rss
+    # Only now read what the server managed to send before giving up on it
+    try:
+        await asyncio.wait_for(slow.read(), 30)
+    except asyncio.TimeoutError:
+        slow.close()
+    drops = await dropped(client) - dropped_before
+    first = len(slow.order)
+
+    resumed = Subscriber()
+    await resumed.connect(port, token, last_event_id=slow.last_id)
+    reader = asyncio.create_task(resumed.read())
+    deadline = time.perf_counter() + 10
+    while set(posted) - set(slow.order) - set(resumed.order) and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+    resumed.close()
+    await reader
+
+    received = slow.order + resumed.order
+    lost = set(posted) - set(received)
+    duplicated = len(received) - len(set(received))
+    ok = drops == 1 and not lost and not duplicated
+    print(f"slow client: dropped {drops}x by the ~{at_drop}th event of ~2 KB (server RSS +{grown / 2 ** 20:.1f} MiB "
+          f"meanwhile), {first} read before the drop; {args.after_drop} more posted, resumed with Last-Event-ID: "
+          f"{len(resumed.order)} replayed, {len(lost)} lost, {duplicated} duplicated" + ('' if ok else '  FAILED'))
+    return ok
+
+
+async def run(args, pid: int, port: int) -> bool:
+    token = jwt.encode({'email': 'admin@lsweb.com', 'role': 'admin',
+                        'exp': datetime.utcnow() + timedelta(hours=1)}, SECRET, algorithm='HS256')
+    async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', timeout=30) as client:
+        await idle_subscribers(args, pid, port, token, client)
+        return await slow_client(args, pid, port, token, client)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subscribers', type=int, default=1000)
+    parser.add_argument('--idle', type=float, default=30.0, help='seconds the streams stay idle')
+    parser.add_argument('--events', type=int, default=20)
+    parser.add_argument('--slow-events', type=int, default=5000, help='give up if the slow client is not dropped by then')
+    parser.add_argument('--after-drop', type=int, default=200, help='events posted after the drop, to be resumed')
+    parser.add_argument('--heartbeat', type=float, default=15.0, help='LIVE_HEARTBEAT (s)')
+    parser.add_argument('--max-age', type=float, default=60.0,
+                        help='LIVE_STREAM_MAX_AGE the reconnect cost is projected for (s)')
+    parser.add_argument('--queue-size', type=int, default=256, help='LIVE_QUEUE_SIZE')
+    args = parser.parse_args()
+
+    port = free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(
+            os.environ, STORAGE_BACKEND='sqlite', SQLITE_PATH=os.path.join(directory, 'bench.db'),
+            OUTBOX_SQLITE_PATH=os.path.join(directory, 'outbox.db'), CONTACT_SPOOL_PATH='', JWT_SECRET=SECRET,
+            RATE_LIMIT_ENABLED='false', LIVE_HEARTBEAT=str(args.heartbeat), LIVE_QUEUE_SIZE=str(args.queue_size),
+            # Streams stay open for the whole run; the reconnect cost is measured on connect instead
+            LIVE_STREAM_MAX_AGE='3600', SMTP_HOST='127.0.0.1', SMTP_PORT='9', OUTBOX_POLL_INTERVAL='3600',
+        )
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'server:app', '--port', str(port), '--log-level', 'warning',
+             '--timeout-graceful-shutdown', '1'],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), env=env,
+        )
+        try:
+            for _ in range(300):
+                try:
+                    httpx.get(f'http://127.0.0.1:{port}/healthz', timeout=1)
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.05)
+            ok = asyncio.run(run(args, server.pid, port))
+        finally:
+            server.terminate()
+            server.wait()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
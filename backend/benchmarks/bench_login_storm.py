@@ -0,0 +1,76 @@
+"""Contact-request latency during a login storm: inline bcrypt vs PasswordHasher.
+
+Fires `--logins` concurrent password verifications and, meanwhile, a steady
+stream of cheap "submission" coroutines. With inline bcrypt the submissions
+wait behind every hash; with the pool they stay flat and excess logins are
+rejected as busy (503) instead of queueing without bound.
+
+    cd backend && python -m benchmarks.bench_login_storm --logins 40
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import bcrypt
+
+from passwords import PasswordHasher, PasswordHasherBusy
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def storm(mode: str, logins: int, hashed: str, hasher: PasswordHasher) -> tuple:
+    latencies = []
+    rejected = 0
+    done = asyncio.Event()
+
+    async def login() -> None:
+        nonlocal rejected
+        await asyncio.sleep(0)
+        if mode == 'inline':
+            bcrypt.checkpw(b'admin123', hashed.encode('utf-8'))
+            return
+        try:
+            await hasher.verify('admin123', hashed)
+        except PasswordHasherBusy:
+            rejected += 1
+
+    async def submissions() -> None:
+        # A submission is due every 5 ms; record how late the loop gets to it
+        while not done.is_set():
+            due = time.perf_counter() + 0.005
+            await asyncio.sleep(0.005)
+            latencies.append(time.perf_counter() - due)
+
+    probe = asyncio.create_task(submissions())
+    await asyncio.sleep(0.05)
+    await asyncio.gather(*(login() for _ in range(logins)))
+    done.set()
+    await probe
+    return latencies, rejected
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logins', type=int, default=40)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--queue', type=int, default=16)
+    args = parser.parse_args()
+
+    hashed = bcrypt.hashpw(b'admin123', bcrypt.gensalt()).decode('utf-8')
+    for mode in ('inline', 'pooled'):
+        hasher = PasswordHasher(max_workers=args.workers, max_queue=args.queue)
+        started = time.perf_counter()
+        latencies, rejected = asyncio.run(storm(mode, args.logins, hashed, hasher))
+        elapsed = time.perf_counter() - started
+        hasher.shutdown()
+        print(f"{mode:>6}: storm {elapsed:6.2f} s  submission p50 {statistics.median(latencies) * 1000:8.2f} ms  "
+              f"p99 {percentile(latencies, 99) * 1000:8.2f} ms  max {max(latencies) * 1000:8.2f} ms  "
+              f"rejected logins {rejected}")
+
+
+if __name__ == '__main__':
+    main()
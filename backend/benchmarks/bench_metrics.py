@@ -0,0 +1,71 @@
+"""Per-request cost of MetricsMiddleware and of a stage timer.
+
+Calls a minimal ASGI app directly (no HTTP client in the loop) with and
+without the middleware, so the difference is the instrumentation alone.
+
+    cd backend && python -m benchmarks.bench_metrics --requests 200000
+"""
+import argparse
+import asyncio
+import time
+
+from metrics import Histogram, MetricsMiddleware, Registry
+
+
+class _Route:
+    path = "/api/contact-request"
+
+
+async def endpoint(scope, receive, send):
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def drive(app, requests: int) -> float:
+    scope = {"type": "http", "method": "POST", "path": "/api/contact-request"}
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200_000)
+    args = parser.parse_args()
+
+    registry = Registry()
+    instrumented = MetricsMiddleware(
+        endpoint,
+        registry.counter("requests_total", "", ("method", "route", "status")),
+        registry.histogram("request_duration_seconds", "", ("method", "route")),
+    )
+    bare = asyncio.run(drive(endpoint, args.requests))
+    wrapped = asyncio.run(drive(instrumented, args.requests))
+    print(f"     bare app: {bare / args.requests * 1e6:6.2f} us/request")
+    print(f"  +middleware: {wrapped / args.requests * 1e6:6.2f} us/request  "
+          f"(overhead {(wrapped - bare) / args.requests * 1e6:5.2f} us)")
+
+    stages = Histogram("stage_duration_seconds", "", ("stage",))
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        with stages.time("db_insert"):
+            pass
+    print(f"   stage timer: {(time.perf_counter() - start) / args.requests * 1e6:6.2f} us/block")
+
+    start = time.perf_counter()
+    body = registry.render()
+    print(f"       scrape: {(time.perf_counter() - start) * 1e3:6.2f} ms for {len(body)} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Submission latency with inline SMTP vs the email outbox.
+
+Simulates concurrent contact submissions against a fake SMTP relay that adds
+`--smtp-delay` seconds per reply. The inline mode reproduces the old handler,
+which ran smtplib inside the event loop; the outbox mode only enqueues into the
+SQLite outbox while the worker drains it in the background.
+
+    cd backend && python -m benchmarks.bench_outbox --requests 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import email.mime.multipart
+import email.mime.text
+import os
+import smtplib
+import statistics
+import tempfile
+import time
+
+from outbox import OutboxWorker, SQLiteOutboxStore, new_outbox_message
+from benchmarks.fakes import FakeSMTPServer
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def smtp_send(port: int, message: dict) -> None:
+    msg = email.mime.multipart.MIMEMultipart('alternative')
+    msg['Subject'] = message['subject']
+    msg['From'] = 'bench@lsweb.com'
+    msg['To'] = message['recipient']
+    msg.attach(email.mime.text.MIMEText(message['html'], 'html'))
+    with smtplib.SMTP('127.0.0.1', port) as server:
+        server.login('bench', 'bench')
+        server.send_message(msg)
+
+
+def make_message(i: int) -> dict:
+    return new_outbox_message('admin@lsweb.com', f'Nueva Solicitud de Web - {i}', f'<p>Solicitud {i}</p>')
+
+
+async def run(mode: str, requests: int, concurrency: int, port: int, store) -> list:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def deliver(message: dict) -> None:
+        await asyncio.to_thread(smtp_send, port, message)
+
+    worker = OutboxWorker(store, deliver, poll_interval=0.05)
+    worker.start()
+
+    async def submit(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            if mode == 'inline':
+                smtp_send(port, make_message(i))
+            else:
+                await worker.enqueue(make_message(i))
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(submit(i) for i in range(requests)))
+    await worker.stop()
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--smtp-delay', type=float, default=0.02)
+    args = parser.parse_args()
+
+    with FakeSMTPServer(delay=args.smtp_delay) as smtp, tempfile.TemporaryDirectory() as tmp:
+        for mode in ('inline', 'outbox'):
+            store = SQLiteOutboxStore(os.path.join(tmp, f'{mode}.db'))
+            started = time.perf_counter()
+            latencies = asyncio.run(run(mode, args.requests, args.concurrency, smtp.port, store))
+            elapsed = time.perf_counter() - started
+            print(
+                f"{mode:>7}: {args.requests / elapsed:8.1f} req/s  "
+                f"p50 {statistics.median(latencies) * 1000:8.2f} ms  "
+                f"p99 {percentile(latencies, 99) * 1000:8.2f} ms"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Per-request cost of RateLimitMiddleware with many distinct clients.
+
+Calls a minimal ASGI app directly (no HTTP client in the loop), round-robin
+over `--clients` source addresses, bare and behind the middleware with the
+in-process and the SQLite store. Also reports memory per tracked client and
+checks that worker processes sharing the SQLite file admit one bucket's
+worth of requests between them, not one each.
+
+    cd backend && python -m benchmarks.bench_ratelimit --clients 10000 --requests 100000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+import tracemalloc
+
+from ratelimit import MemoryBucketStore, RateLimitMiddleware, Rule, SQLiteBucketStore
+
+ROUTE = ("POST", "/api/contact-request")
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+def scopes(clients: int):
+    return [{"type": "http", "method": ROUTE[0], "path": ROUTE[1], "headers": [],
+             "client": (f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", 40000)} for i in range(clients)]
+
+
+async def drive(app, clients, requests: int) -> float:
+    start = time.perf_counter()
+    for i in range(requests):
+        await app(dict(clients[i % len(clients)]), receive, send)
+    return time.perf_counter() - start
+
+
+def limited(store) -> RateLimitMiddleware:
+    # Generous enough that every request is admitted; the cost measured is the bookkeeping
+    return RateLimitMiddleware(endpoint, store, {ROUTE: Rule("contact", 1_000_000, 60)})
+
+
+def bytes_per_client(clients) -> float:
+    store = MemoryBucketStore()
+    app = limited(store)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    asyncio.run(drive(app, clients, len(clients)))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(store)
+
+
+def hammer(path: str, attempts: int, admitted) -> None:
+    store = SQLiteBucketStore(path)
+    rule = Rule("contact", 5, 3600)
+
+    async def run():
+        for _ in range(attempts):
+            if not await store.take("contact:203.0.113.7", rule):
+                with admitted.get_lock():
+                    admitted.value += 1
+    asyncio.run(run())
+    store.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=10_000)
+    parser.add_argument('--requests', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    clients = scopes(args.clients)
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_store = SQLiteBucketStore(os.path.join(tmp, "buckets.sqlite3"))
+        bare = asyncio.run(drive(endpoint, clients, args.requests))
+        memory = asyncio.run(drive(limited(MemoryBucketStore()), clients, args.requests))
+        shared = asyncio.run(drive(limited(sqlite_store), clients, args.requests // 10))
+        sqlite_store.close()
+
+        print(f"{args.clients} clients")
+        print(f"          bare app: {bare / args.requests * 1e6:7.2f} us/request")
+        print(f"   +memory buckets: {memory / args.requests * 1e6:7.2f} us/request  "
+              f"(overhead {(memory - bare) / args.requests * 1e6:6.2f} us)")
+        shared_us = shared / (args.requests // 10) * 1e6
+        print(f"   +sqlite buckets: {shared_us:7.2f} us/request  "
+              f"(overhead {shared_us - bare / args.requests * 1e6:6.2f} us)")
+        print(f"  memory per client: {bytes_per_client(clients):.0f} bytes")
+
+        admitted = multiprocessing.Value("i", 0)
+        path = os.path.join(tmp, "shared.sqlite3")
+        SQLiteBucketStore(path).close()
+        workers = [multiprocessing.Process(target=hammer, args=(path, 20, admitted)) for _ in range(args.workers)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        print(f"  {args.workers} workers x 20 attempts on a 5/3600 bucket: {admitted.value} admitted")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""Degraded upstreams: deadlines, circuit breakers and fast failure.
+
+Points the app at a fake PostgREST and a fake SMTP relay, then switches each
+fake to every fault mode in turn (hang, TCP reset, 5xx/421) and makes
+`--calls` sequential calls: logins (Supabase) and pool sends (SMTP). Reports
+how long the calls that still reached the upstream took (bounded by the
+deadline), after how many calls the breaker opened, and the latency of the
+calls failed fast while open (503 with Retry-After for the API). The fault is
+then cleared and, after the breaker's reset timeout, one probe must close it
+again; for SMTP the outbox worker must also claim nothing while the breaker is
+open and deliver the backlog afterwards. Exits 1 if any check fails.
+
+    cd backend && python -m benchmarks.bench_resilience
+    cd backend && python -m benchmarks.bench_resilience --deadline 1 --threshold 5 --reset 2
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.fakes import FakePostgREST, FakeSMTPServer
+from benchmarks.bench_smtp_pool import build_message
+from outbox import new_outbox_message
+from resilience import CLOSED, CircuitOpen
+
+FAULTS = ('hang', 'reset', 'error')
+
+
+async def timed(fn) -> tuple:
+    start = time.perf_counter()
+    try:
+        result = await fn()
+    except Exception as e:
+        result = e
+    return result, time.perf_counter() - start
+
+
+def report(name: str, fault: str, samples: list, fast: list, bound: float) -> bool:
+    """samples: (elapsed, failed fast) per call, in order; bound: slowest acceptable upstream call"""
+    reached = [elapsed for elapsed, was_fast in samples if not was_fast]
+    opened_after = next((i for i, (_, was_fast) in enumerate(samples) if was_fast), None)
+    slowest = max(reached) if reached else 0.0
+    fast_p50 = statistics.median(fast) if fast else 0.0
+    ok = (opened_after is not None and all(was_fast for _, was_fast in samples[opened_after:])
+          and slowest <= bound and fast_p50 < 0.05)
+    print(f"{name:>8} {fault:>5}: slowest upstream call {slowest * 1000:7.1f} ms, "
+          f"open after {opened_after if opened_after is not None else '-':>2} calls, "
+          f"fast failures p50 {fast_p50 * 1000:5.2f} ms" + ('' if ok else '  FAILED'))
+    return ok
+
+
+async def supabase_fault(server, postgrest, client, fault: str, args) -> bool:
+    breaker = server.storage.breaker
+    postgrest.fault = fault
+    samples, fast, retry_after = [], [], None
+    for _ in range(args.calls):
+        response, elapsed = await timed(lambda: client.post(
+            '/api/login', json={'email': 'nadie@example.com', 'password': 'incorrecta'}))
+        was_fast = response.status_code == 503 and 'Retry-After' in response.headers
+        if was_fast:
+            fast.append(elapsed)
+            retry_after = response.headers['Retry-After']
+        samples.append((elapsed, was_fast))
+    # The deadline is per HTTP request and reads are retried, with backoff, before giving up
+    bound = (server.storage.read_retries + 1) * (args.deadline + 0.25)
+    ok = report('supabase', fault, samples, fast, bound) and retry_after is not None
+
+    postgrest.fault = None
+    await asyncio.sleep(args.reset)
+    response = await client.post('/api/login', json={'email': 'nadie@example.com', 'password': 'incorrecta'})
+    # Unknown user: a normal answer from a healthy upstream
+    recovered = response.status_code == 200 and response.json()['success'] is False and breaker.state == CLOSED
+    print(f"{'':>14}Retry-After {retry_after}, probe after reset -> {response.status_code}, breaker {breaker.state}")
+    return ok and recovered
+
+
+async def smtp_fault(server, smtp, fault: str, args) -> bool:
+    pool, outbox = server.smtp_pool, server.outbox
+    smtp.fault = fault
+    samples, fast = [], []
+    for i in range(args.calls):
+        result, elapsed = await timed(lambda: pool.send(build_message(i)))
+        was_fast = isinstance(result, CircuitOpen)
+        if was_fast:
+            fast.append(elapsed)
+        samples.append((elapsed, was_fast))
+    ok = report('smtp', fault, samples, fast, args.deadline + 0.2)
+
+    # Mail queued while the relay is down waits in the outbox without spending attempts
+    for i in range(3):
+        await outbox.store.enqueue(new_outbox_message('admin@lsweb.com', f'Solicitud {fault} {i}', '<p>Hola</p>'))
+    claimed_while_open = await outbox.run_once()
+    smtp.fault = None
+    await asyncio.sleep(args.reset)
+    sent_before = smtp.messages
+    delivered = await outbox.run_once()
+    recovered = claimed_while_open == 0 and delivered == 3 and smtp.messages - sent_before == 3
+    recovered = recovered and pool.breaker.state == CLOSED
+    print(f"{'':>14}outbox claimed {claimed_while_open} while open, {delivered} after reset; "
+          f"breaker {pool.breaker.state}")
+    return ok and recovered
+
+
+async def run(args, server, postgrest, smtp) -> bool:
+    await server.storage.connect()
+    ok = True
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            for fault in FAULTS:
+                ok = await supabase_fault(server, postgrest, client, fault, args) and ok
+        for fault in FAULTS:
+            ok = await smtp_fault(server, smtp, fault, args) and ok
+        print(f"breakers opened: supabase {server.storage.breaker.opened}, smtp {server.smtp_pool.breaker.opened}")
+    finally:
+        await server.smtp_pool.close()
+        await server.storage.close()
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=10)
+    parser.add_argument('--deadline', type=float, default=0.5, help='per-call deadline (s)')
+    parser.add_argument('--threshold', type=int, default=3, help='consecutive failures that open a breaker')
+    parser.add_argument('--reset', type=float, default=1.0, help='seconds an open breaker waits before a probe')
+    args = parser.parse_args()
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    with FakePostgREST() as postgrest, FakeSMTPServer() as smtp, tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(
+            STORAGE_BACKEND='supabase', SUPABASE_URL=postgrest.url, SUPABASE_KEY='bench-key',
+            SUPABASE_DEADLINE=str(args.deadline), SUPABASE_BREAKER_THRESHOLD=str(args.threshold),
+            SUPABASE_BREAKER_RESET=str(args.reset),
+            SMTP_HOST='127.0.0.1', SMTP_PORT=str(smtp.port), SMTP_USER='bench', SMTP_PASSWORD='bench',
+            SMTP_STARTTLS='false', SMTP_DEADLINE=str(args.deadline), SMTP_BREAKER_THRESHOLD=str(args.threshold),
+            SMTP_BREAKER_RESET=str(args.reset), OUTBOX_SQLITE_PATH=os.path.join(tmp, 'outbox.db'),
+            RATE_LIMIT_ENABLED='false', CONTACT_SPOOL_PATH='',
+        )
+        import server
+        ok = asyncio.run(run(args, server, postgrest, smtp))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""Full-text search latency over synthetic Spanish contact requests.
+
+Loads `--rows` requests whose descriptions are built from a Spanish
+vocabulary with skewed word frequencies, then times
+`search_contact_requests` for queries from very common to rare terms: the
+first page and a deep page (`--deep-offset`), median and p95 over
+`--repeat` runs. With `--baseline` (sqlite only) the same words are also
+looked up with an unranked LIKE scan, the query the index replaces.
+
+    cd backend && python -m benchmarks.bench_search --rows 1000000
+    cd backend && python -m benchmarks.bench_search --backend supabase --rows 20000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks.fakes import FakePostgREST
+from storage.base import search_terms
+
+OPENINGS = ('Necesitamos', 'Queremos', 'Buscamos', 'Nos interesa', 'Quisiéramos', 'Solicitamos presupuesto para')
+# (phrase, weight): weights spread the words from ~1 in 3 descriptions down to ~1 in 30k
+PROJECTS = (
+    ('una tienda online', 30), ('una página web', 25), ('un sitio corporativo', 12), ('una landing page', 10),
+    ('una aplicación de reservas', 6), ('un blog', 6), ('un portal de clientes', 4), ('un catálogo digital', 4),
+    ('una intranet', 2), ('un sistema de turnos', 1),
+)
+FEATURES = (
+    ('con pagos en línea', 20), ('con envíos a todo el país', 12), ('con diseño adaptable', 10),
+    ('con panel de administración', 8), ('integrada con redes sociales', 6), ('con facturación electrónica', 4),
+    ('en español e inglés', 4), ('con posicionamiento SEO', 3), ('con mapas de sucursales', 1),
+    ('con inventario sincronizado', 1),
+)
+SECTORS = (
+    ('para nuestra empresa', 30), ('para una cafetería', 6), ('para un estudio jurídico', 4),
+    ('para una clínica odontológica', 3), ('para una inmobiliaria', 3), ('para un gimnasio', 2),
+    ('para una bodega de vinos', 1), ('para una escuela de música', 1), ('para una apicultura familiar', 0.01),
+)
+COMPANIES = ('Comercial', 'Servicios', 'Grupo', 'Distribuidora', 'Estudio', 'Consultora', 'Taller', 'Panadería')
+SURNAMES = ('García', 'Fernández', 'López', 'Martínez', 'Pérez', 'Gómez', 'Díaz', 'Sánchez', 'Romero', 'Álvarez')
+NAMES = ('María', 'José', 'Lucía', 'Juan', 'Sofía', 'Martín', 'Valentina', 'Mateo', 'Camila', 'Tomás')
+
+QUERIES = (
+    ('common', 'tienda'),
+    ('common, plural', 'páginas'),
+    ('mid', 'reservas'),
+    ('mid, 2 words', 'facturación electrónica'),
+    ('company', 'distribuidora alvarez'),
+    ('rare', 'inventario sincronizado'),
+    ('very rare', 'apicultura'),
+    ('no match', 'criptomonedas'),
+)
+
+
+def weighted(rng: random.Random, options: tuple) -> str:
+    return rng.choices([phrase for phrase, _ in options], [weight for _, weight in options])[0]
+
+
+def make_row(rng: random.Random, start: datetime, i: int) -> dict:
+    return {
+        'id': str(uuid.UUID(int=rng.getrandbits(128))),
+        'name': f'{rng.choice(NAMES)} {rng.choice(SURNAMES)}',
+        'email': f'cliente{i}@example.com',
+        'phone': None,
+        'company': f'{rng.choice(COMPANIES)} {rng.choice(SURNAMES)}' if rng.random() < 0.6 else None,
+        'project_type': rng.choice(('landing', 'e-commerce', 'web-app')),
+        'budget': None,
+        'timeline': None,
+        'description': (f'{rng.choice(OPENINGS)} {weighted(rng, PROJECTS)} {weighted(rng, FEATURES)} '
+                        f'{weighted(rng, SECTORS)}.'),
+        'created_at': start + timedelta(seconds=i),
+        'status': 'pending',
+    }
+
+
+async def load(storage, rows: int, seed: int, batch: int = 5000) -> float:
+    rng, start = random.Random(seed), datetime(2024, 1, 1)
+    began = time.perf_counter()
+    for offset in range(0, rows, batch):
+        await storage.insert_contact_requests(
+            [make_row(rng, start, i) for i in range(offset, min(rows, offset + batch))]
+        )
+    return time.perf_counter() - began
+
+
+async def timed(fn, repeat: int) -> tuple:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+def like_scan(storage, terms: list) -> list:
+    # Unranked substring match; accents and plurals are not folded, so it can only under-match
+    clause = ' OR '.join('(name LIKE ? OR company LIKE ? OR description LIKE ?)' for _ in terms)
+    params = [f'%{term}%' for term in terms for _ in range(3)]
+    return storage._conn.execute(f'SELECT * FROM contact_requests WHERE {clause} LIMIT 51', params).fetchall()
+
+
+async def run(args, storage) -> None:
+    await storage.connect()
+    try:
+        elapsed = await load(storage, args.rows, args.random_seed)
+        print(f"loaded {args.rows} rows in {elapsed:.1f}s ({storage.name})")
+        header = f"{'query':>38}  {'rows':>4}  {'page 1 p50':>10}  {'p95':>8}  {f'offset {args.deep_offset} p50':>17}"
+        print(header + (f"  {'LIKE scan':>10}" if args.baseline else ''))
+        for label, query in QUERIES:
+            terms = search_terms(query)
+            first, _ = await storage.search_contact_requests(terms, 50)
+            p50, p95 = await timed(lambda: storage.search_contact_requests(terms, 50), args.repeat)
+            deep, _ = await timed(lambda: storage.search_contact_requests(terms, 50, args.deep_offset), args.repeat)
+            line = (f"{f'{query} ({label})':>38}  {len(first):4d}  {p50 * 1000:8.1f}ms  {p95 * 1000:6.1f}ms"
+                    f"  {deep * 1000:15.1f}ms")
+            if args.baseline:
+                scan, _ = await timed(lambda: storage._run(like_scan, storage, terms), 1)
+                line += f"  {scan * 1000:8.1f}ms"
+            print(line)
+    finally:
+        await storage.close()
+
+
+async def run_mongo(args) -> None:
+    # MONGO_URL / DB_NAME of a local mongod; the collection is dropped first and the
+    # text index built before loading
+    from mongo_indexes import ensure_indexes
+    from storage.mongo import MongoStorage
+    storage = MongoStorage.from_env()
+    await storage.db.drop_collection('contact_requests')
+    await ensure_indexes(storage.db)
+    await run(args, storage)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', choices=('sqlite', 'supabase', 'mongo'), default='sqlite')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--deep-offset', type=int, default=1000)
+    parser.add_argument('--baseline', action='store_true', help='also time a LIKE scan (sqlite)')
+    parser.add_argument('--random-seed', type=int, default=7)
+    args = parser.parse_args()
+    if args.baseline and args.backend != 'sqlite':
+        parser.error('--baseline needs --backend sqlite')
+
+    if args.backend == 'supabase':
+        from storage.supabase import SupabaseStorage
+        with FakePostgREST() as postgrest:
+            asyncio.run(run(args, SupabaseStorage(postgrest.url, 'bench-key')))
+    elif args.backend == 'mongo':
+        asyncio.run(run_mongo(args))
+    else:
+        from storage.sqlite import SQLiteStorage
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(run(args, SQLiteStorage(os.path.join(directory, 'search.db'))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Serializing a page of contact requests: pydantic round trips vs orjson.
+
+Renders `--rows` storage rows to the response body three ways and reports
+time and peak traced memory for each:
+
+  response_model  a ContactRequest per row, then FastAPI's response_model
+                  handling (dump, re-validate, serialize) and json.dumps
+  jsonable        a ContactRequest per row, jsonable_encoder and json.dumps
+  orjson          the rows as storage returns them, straight to orjson
+
+    cd backend && python -m benchmarks.bench_serialization --rows 10000
+"""
+import argparse
+import asyncio
+import os
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+os.environ.setdefault('STORAGE_BACKEND', 'sqlite')
+os.environ.setdefault('SQLITE_PATH', ':memory:')
+os.environ['CONTACT_SPOOL_PATH'] = ''
+from server import ContactRequest, ContactRequestPage  # noqa: E402
+
+PAGE_FIELD = create_response_field(name='page', type_=ContactRequestPage)
+
+
+def make_rows(count: int) -> list:
+    start = datetime(2025, 1, 1)
+    return [{
+        'id': str(uuid.uuid4()),
+        'name': f'Cliente {i}',
+        'email': f'cliente{i}@example.com',
+        'phone': '+54 11 5555-5555',
+        'company': 'Empresa Ejemplo S.A.',
+        'project_type': ('landing', 'e-commerce', 'web-app')[i % 3],
+        'budget': '1000-3000',
+        'timeline': '1-2 meses',
+        'description': 'Necesitamos una tienda online con catálogo, pagos y envíos a todo el país.',
+        'created_at': start + timedelta(seconds=i, microseconds=i * 7),
+        'status': 'pending',
+    } for i in range(count)]
+
+
+def response_model(rows: list) -> bytes:
+    page = ContactRequestPage(items=[ContactRequest(**row) for row in rows], next_cursor=None)
+    content = asyncio.run(serialize_response(field=PAGE_FIELD, response_content=page))
+    return JSONResponse(content).body
+
+
+def jsonable(rows: list) -> bytes:
+    page = ContactRequestPage(items=[ContactRequest(**row) for row in rows], next_cursor=None)
+    return JSONResponse(jsonable_encoder(page)).body
+
+
+def fast(rows: list) -> bytes:
+    return orjson.dumps({'items': rows, 'next_cursor': None})
+
+
+def measure(fn, rows: list, repeat: int) -> tuple:
+    fn(rows)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(rows)
+    elapsed = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    fn(rows)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    # Same document either way; only key order may differ
+    assert orjson.loads(fast(rows)) == orjson.loads(jsonable(rows)) == orjson.loads(response_model(rows))
+
+    baseline = None
+    for name, fn in (('response_model', response_model), ('jsonable', jsonable), ('orjson', fast)):
+        elapsed, peak = measure(fn, rows, args.repeat)
+        baseline = baseline or elapsed
+        print(f"{name:>15}: {elapsed * 1000:8.1f} ms  peak {peak / 1024 / 1024:6.1f} MB  "
+              f"({baseline / elapsed:5.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
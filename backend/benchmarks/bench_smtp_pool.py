@@ -0,0 +1,61 @@
+"""SMTP throughput: one connection per message vs the pooled, batched sender.
+
+    cd backend && python -m benchmarks.bench_smtp_pool --messages 200 --smtp-delay 0.005
+"""
+import argparse
+import asyncio
+import email.mime.multipart
+import email.mime.text
+import smtplib
+import time
+
+from smtp_pool import SMTPPool
+from benchmarks.fakes import FakeSMTPServer
+
+
+def build_message(i: int) -> email.mime.multipart.MIMEMultipart:
+    msg = email.mime.multipart.MIMEMultipart('alternative')
+    msg['Subject'] = f'Nueva Solicitud de Web - {i}'
+    msg['From'] = 'bench@lsweb.com'
+    msg['To'] = 'admin@lsweb.com'
+    msg.attach(email.mime.text.MIMEText(f'<p>Solicitud {i}</p>', 'html'))
+    return msg
+
+
+def per_message(port: int, messages: int) -> None:
+    for i in range(messages):
+        with smtplib.SMTP('127.0.0.1', port) as server:
+            server.login('bench', 'bench')
+            server.send_message(build_message(i))
+
+
+async def pooled(port: int, messages: int, batch: int, size: int) -> None:
+    pool = SMTPPool('127.0.0.1', port, 'bench', 'bench', size=size, start_tls=False)
+    batches = [[build_message(i) for i in range(start, min(start + batch, messages))]
+               for start in range(0, messages, batch)]
+    await asyncio.gather(*(pool.send_many(b) for b in batches))
+    await pool.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--batch', type=int, default=10)
+    parser.add_argument('--pool-size', type=int, default=2)
+    parser.add_argument('--smtp-delay', type=float, default=0.005)
+    args = parser.parse_args()
+
+    for mode in ('per-message', 'pooled'):
+        with FakeSMTPServer(delay=args.smtp_delay) as smtp:
+            started = time.perf_counter()
+            if mode == 'per-message':
+                per_message(smtp.port, args.messages)
+            else:
+                asyncio.run(pooled(smtp.port, args.messages, args.batch, args.pool_size))
+            elapsed = time.perf_counter() - started
+            print(f"{mode:>11}: {args.messages / elapsed:8.1f} msg/s  "
+                  f"{smtp.connections} connections for {smtp.messages} messages")
+
+
+if __name__ == '__main__':
+    main()
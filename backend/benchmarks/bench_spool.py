@@ -0,0 +1,133 @@
+"""Write-ahead spool: added submission latency and outage replay.
+
+Two parts, both against the fake PostgREST:
+
+- latency: `--requests` sequential POST /api/contact-request with and
+  without the spool (one fsync'd SQLite append per submission), p50/p99.
+- outage: the fake answers 503 for the middle third of the submissions;
+  every one must still be acknowledged, and the replayer must store each
+  acknowledged id exactly once after the fault clears.
+
+Exits 1 if anything was lost or duplicated. Crash recovery (a writer killed
+mid-save) is covered by tests/test_spool.py.
+
+    cd backend && python -m benchmarks.bench_spool --requests 300
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.fakes import FakePostgREST
+
+SUBMISSION = {
+    'name': 'Cliente', 'email': 'cliente@example.com', 'phone': None, 'company': None,
+    'projectType': 'landing', 'budget': None, 'timeline': None, 'description': 'Necesitamos una landing page.',
+}
+
+
+def stored_ids(postgrest) -> list:
+    return [row['id'] for row in postgrest.tables.get('contact_requests', [])]
+
+
+def check(label: str, acknowledged: set, stored: list) -> bool:
+    missing = acknowledged - set(stored)
+    duplicated = len(stored) - len(set(stored))
+    ok = not missing and not duplicated
+    print(f"{label}: {len(acknowledged)} acknowledged, {len(set(stored))} stored, {len(missing)} lost, "
+          f"{duplicated} duplicated" + ('' if ok else '  FAILED'))
+    return ok
+
+
+async def drain(replayer) -> int:
+    """Replay until the spool is empty; returns the rows stored"""
+    before = replayer.replayed
+    while await replayer.spool.count():
+        if not await replayer.run_once():
+            # Breaker still open, or the remaining rows are backing off
+            await asyncio.sleep(0.1)
+    return replayer.replayed - before
+
+
+async def latency(server, client, requests: int) -> None:
+    # Modes alternate request by request so warm-up and drift hit both alike
+    spool = server.contact_spool
+    samples = {'no spool': [], 'spool': []}
+    for i in range(requests):
+        for mode, mode_samples in samples.items():
+            server.contact_spool = spool if mode == 'spool' else None
+            body = dict(SUBMISSION, description=f'{SUBMISSION["description"]} {mode} {i}')
+            start = time.perf_counter()
+            response = await client.post('/api/contact-request', json=body)
+            mode_samples.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+    server.contact_spool = spool
+    p50 = {}
+    for mode, mode_samples in samples.items():
+        mode_samples.sort()
+        p50[mode], p99 = statistics.median(mode_samples), mode_samples[int(len(mode_samples) * 0.99)]
+        print(f"{mode:>9}: p50 {p50[mode] * 1000:6.2f} ms  p99 {p99 * 1000:6.2f} ms")
+    print(f"{'added':>9}: p50 {(p50['spool'] - p50['no spool']) * 1000:6.2f} ms")
+
+
+async def outage(server, postgrest, client, requests: int) -> bool:
+    acknowledged = set()
+    for i in range(requests):
+        postgrest.fault = 'error' if requests // 3 <= i < 2 * requests // 3 else None
+        body = dict(SUBMISSION, description=f'{SUBMISSION["description"]} outage {i}')
+        response = await client.post('/api/contact-request', json=body)
+        if response.status_code == 200:
+            acknowledged.add(response.json()['id'])
+    postgrest.fault = None
+    await server.contact_spool.flush()
+    pending = await server.contact_spool.count()
+    # Rows become due after the grace period; replay them now instead of waiting
+    server.contact_spool.grace = 0
+    replayed = await drain(server.spool_replayer)
+    # Besides the 503s, inserts failed fast while the breaker stayed open are spooled too
+    print(f"outage: {requests} submitted, {pending} rows in the spool "
+          f"(breaker opened {server.storage.breaker.opened}x), {replayed} replayed")
+    return check('outage', acknowledged, [i for i in stored_ids(postgrest) if i in acknowledged]) \
+        and len(acknowledged) == requests
+
+
+async def run(args, server, postgrest) -> bool:
+    await server.storage.connect()
+    # The app opens its spool at startup, which ASGITransport does not run
+    server.open_contact_spool()
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            await latency(server, client, args.requests)
+            return await outage(server, postgrest, client, args.requests)
+    finally:
+        await server.close_contact_spool()
+        await server.storage.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--dir', help='directory for the spool files (default: a temporary one); '
+                                      'fsync cost depends on its filesystem')
+    args = parser.parse_args()
+
+    with FakePostgREST() as postgrest, tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        os.environ.update(
+            STORAGE_BACKEND='supabase', SUPABASE_URL=postgrest.url, SUPABASE_KEY='bench-key',
+            SUPABASE_READ_RETRIES='0', SUPABASE_BREAKER_RESET='1',
+            CONTACT_SPOOL_PATH=os.path.join(directory, 'api-spool.db'),
+            RATE_LIMIT_ENABLED='false', OUTBOX_SQLITE_PATH=os.path.join(directory, 'outbox.db'),
+        )
+        import server
+        ok = asyncio.run(run(args, server, postgrest))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
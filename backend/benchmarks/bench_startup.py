@@ -0,0 +1,85 @@
+"""Time to first request: from spawning the server until it answers.
+
+Starts `uvicorn server:app` from `--app-dir` (this backend by default; point
+it at another checkout to compare) on the embedded SQLite storage or against
+FakePostgREST with `--delay` seconds of latency per response, and polls
+`--path` until it returns 200. The database is shared across `--runs`, so
+the first boot finds it empty and the rest find it populated.
+
+    cd backend && python -m benchmarks.bench_startup --backend supabase --delay 0.05
+    cd backend && python -m benchmarks.bench_startup --app-dir /tmp/before/backend
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.fakes import FakePostgREST
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def boot(app_dir: str, env: dict, path: str, timeout: float) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'server:app', '--app-dir', app_dir, '--port', str(port),
+         '--log-level', 'warning'],
+        env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if httpx.get(f'http://127.0.0.1:{port}{path}', timeout=1).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            time.sleep(0.005)
+        raise RuntimeError(f'no answer on {path} within {timeout}s')
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app-dir', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser.add_argument('--backend', choices=('sqlite', 'supabase'), default='sqlite')
+    parser.add_argument('--delay', type=float, default=0.0, help='FakePostgREST latency per response (s)')
+    parser.add_argument('--path', default='/api/')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, FakePostgREST(delay=args.delay) as postgrest:
+        env = {
+            'STORAGE_BACKEND': args.backend,
+            'SQLITE_PATH': os.path.join(tmp, 'lsweb.sqlite3'),
+            'SUPABASE_URL': postgrest.url,
+            'SUPABASE_KEY': 'bench-key',
+            'SMTP_HOST': '127.0.0.1',
+            'SMTP_PORT': '1',
+            'ADMIN_PASSWORD': 'bench-admin-password',
+            'CONTACT_SPOOL_PATH': '',
+        }
+        times = [boot(args.app_dir, env, args.path, args.timeout) for _ in range(args.runs)]
+
+    print(f"{args.app_dir} ({args.backend}, delay {args.delay * 1000:.0f} ms)")
+    print(f"  first boot: {times[0] * 1000:7.1f} ms")
+    if len(times) > 1:
+        print(f"  later boots: median {statistics.median(times[1:]) * 1000:7.1f} ms  "
+              f"min {min(times[1:]) * 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Supabase storage per-call latency: a new httpx client per call vs the shared client.
+
+Runs against the in-memory FakePostgREST, so the numbers isolate connection
+setup cost (DNS/TCP here; TLS against real Supabase makes the gap larger).
+
+    cd backend && python -m benchmarks.bench_supabase_client --calls 500
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+import httpx
+
+from benchmarks.fakes import FakePostgREST
+from storage.supabase import SupabaseStorage
+
+
+async def client_per_call(url: str, headers: dict, calls: int) -> list:
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            await client.get(f"{url}/rest/v1/users?email=eq.admin@lsweb.com", headers=headers)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def shared_client(storage, calls: int) -> list:
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await storage.get_user_by_email("admin@lsweb.com")
+        latencies.append(time.perf_counter() - start)
+    await storage.close()
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=500)
+    args = parser.parse_args()
+
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    for mode in ('client-per-call', 'shared-client'):
+        with FakePostgREST() as postgrest:
+            postgrest.tables['users'] = [{'id': '1', 'email': 'admin@lsweb.com', 'role': 'admin'}]
+            storage = SupabaseStorage(postgrest.url, 'bench-key')
+            if mode == 'client-per-call':
+                latencies = asyncio.run(client_per_call(postgrest.url, storage.headers, args.calls))
+            else:
+                latencies = asyncio.run(shared_client(storage, args.calls))
+            print(f"{mode:>15}: mean {statistics.mean(latencies) * 1000:6.2f} ms  "
+                  f"p99 {sorted(latencies)[int(len(latencies) * 0.99)] * 1000:6.2f} ms  "
+                  f"{postgrest.connections} connections for {postgrest.requests} requests")
+
+
+if __name__ == '__main__':
+    main()
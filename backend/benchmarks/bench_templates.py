@@ -0,0 +1,51 @@
+"""Email render time: compile-per-message (old send_email) vs precompiled templates.
+
+    cd backend && python -m benchmarks.bench_templates --messages 2000
+"""
+import argparse
+import time
+from datetime import datetime
+
+import email_templates
+
+CONTACT = {
+    'id': '00000000-0000-0000-0000-000000000000',
+    'name': 'María González',
+    'email': 'maria@example.com',
+    'phone': '+54 11 5555-5555',
+    'company': 'Panadería La Espiga',
+    'project_type': 'e-commerce',
+    'budget': '1000-3000',
+    'timeline': '1-2 meses',
+    'description': 'Necesitamos una tienda online con pagos y envíos a todo el país.',
+    'created_at': datetime.utcnow(),
+    'status': 'pending',
+}
+
+
+def compile_per_message(source: str) -> None:
+    # Equivalent of the old Template(EMAIL_TEMPLATE).render(**contact_data)
+    email_templates.env.from_string(source).render(CONTACT)
+
+
+def precompiled() -> None:
+    email_templates.render(email_templates.ADMIN_NOTIFICATION, CONTACT)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=2000)
+    args = parser.parse_args()
+
+    source = (email_templates.TEMPLATES_DIR / f'{email_templates.ADMIN_NOTIFICATION}.html').read_text()
+    for name, fn in (('compile-per-message', lambda: compile_per_message(source)),
+                     ('precompiled (html+text)', precompiled)):
+        started = time.perf_counter()
+        for _ in range(args.messages):
+            fn()
+        per_message = (time.perf_counter() - started) / args.messages
+        print(f"{name:>24}: {per_message * 1e6:9.1f} µs/message")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Contact request inserts at high concurrency: one POST per row vs write-behind.
+
+Runs `--submitters` concurrent coroutines, each inserting `--rows` contact
+requests through SupabaseStorage against FakePostgREST, which adds `--delay`
+seconds per HTTP request to stand in for the round trip to Supabase.
+Write-behind mode sends the same rows through WriteBehindBuffer, so each
+flush is a single bulk POST.
+
+    cd backend && python -m benchmarks.bench_write_behind --submitters 500 --delay 0.02
+"""
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+
+from benchmarks.fakes import FakePostgREST
+from storage import WriteBehindBuffer
+from storage.supabase import SupabaseStorage
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def make_row(i: int) -> dict:
+    return {
+        'id': str(uuid.uuid4()),
+        'name': f'Cliente {i}',
+        'email': f'cliente{i}@example.com',
+        'phone': None,
+        'company': None,
+        'project_type': 'landing',
+        'budget': None,
+        'timeline': None,
+        'description': 'Necesitamos una landing para la campaña de verano.',
+        'created_at': datetime.utcnow(),
+        'status': 'pending',
+    }
+
+
+async def run(mode: str, url: str, submitters: int, rows: int, max_rows: int, max_delay: float) -> tuple:
+    storage = SupabaseStorage(url, 'bench-key')
+    writer = WriteBehindBuffer(storage.insert_contact_requests, max_rows=max_rows, max_delay=max_delay)
+    insert = writer.submit if mode == 'write-behind' else storage.insert_contact_request
+    latencies = []
+
+    async def submitter(n: int) -> None:
+        for i in range(rows):
+            start = time.perf_counter()
+            await insert(make_row(n * rows + i))
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(submitter(n) for n in range(submitters)))
+    await writer.close()
+    elapsed = time.perf_counter() - started
+    await storage.close()
+    return latencies, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--submitters', type=int, default=500)
+    parser.add_argument('--rows', type=int, default=4, help='rows inserted by each submitter')
+    parser.add_argument('--delay', type=float, default=0.02, help='seconds added per PostgREST request')
+    parser.add_argument('--max-rows', type=int, default=100)
+    parser.add_argument('--max-delay-ms', type=float, default=10)
+    args = parser.parse_args()
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    for mode in ('per-row', 'write-behind'):
+        with FakePostgREST(delay=args.delay) as postgrest:
+            latencies, elapsed = asyncio.run(run(mode, postgrest.url, args.submitters, args.rows,
+                                                 args.max_rows, args.max_delay_ms / 1000))
+            stored = len(postgrest.tables.get('contact_requests', []))
+            print(f"{mode:>12}: {len(latencies) / elapsed:8.0f} rows/s  "
+                  f"p50 {percentile(latencies, 50) * 1000:7.1f} ms  p99 {percentile(latencies, 99) * 1000:7.1f} ms  "
+                  f"{postgrest.requests} POSTs for {stored} rows")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,427 @@
+"""Local stand-ins for external services used by the benchmarks."""
+import asyncio
+import json
+import re
+import socket
+import struct
+import threading
+import time
+import unicodedata
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+
+def reset(sock: socket.socket) -> None:
+    """Make the next close of `sock` send a TCP RST instead of a FIN"""
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+
+
+class FakeSMTPServer:
+    """Minimal SMTP server that accepts everything after an artificial delay.
+
+    `delay` is applied to every command reply, which models the round trips of
+    a remote relay such as Gmail. It runs its own event loop in a thread so it
+    can serve both blocking smtplib clients and async ones.
+
+    Set `fault` to misbehave from the next reply on: "hang" (no reply until
+    the fault is cleared), "reset" (TCP reset) or "error" (421 to everything).
+    Recipients in `refused` get a 550 to RCPT, the relay staying healthy.
+    With `keep=True` the raw DATA of every accepted message is appended to
+    `received`.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0, keep: bool = False):
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.keep = keep
+        self.received = []
+        self.messages = 0
+        self.connections = 0
+        self.fault = None
+        self.refused = set()
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    async def _reply(self, writer, line: str) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        while self.fault == "hang":
+            await asyncio.sleep(0.05)
+        if self.fault == "reset":
+            reset(writer.get_extra_info("socket"))
+            writer.transport.abort()
+            raise ConnectionResetError("fault: reset")
+        if self.fault == "error":
+            line = "421 4.3.2 Service not available"
+        writer.write(line.encode() + b"\r\n")
+        await writer.drain()
+
+    async def _handle(self, reader, writer) -> None:
+        self.connections += 1
+        try:
+            await self._reply(writer, "220 fake-smtp ready")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip().upper()
+                if command.startswith(("EHLO", "HELO")):
+                    writer.write(b"250-fake-smtp\r\n250-AUTH PLAIN LOGIN\r\n")
+                    await self._reply(writer, "250 8BITMIME")
+                elif command.startswith("AUTH"):
+                    await self._reply(writer, "235 Authentication successful")
+                elif command.startswith("DATA"):
+                    await self._reply(writer, "354 End data with <CR><LF>.<CR><LF>")
+                    lines = []
+                    while (line := await reader.readline()) not in (b".\r\n", b""):
+                        if self.keep:
+                            lines.append(line[1:] if line.startswith(b"..") else line)
+                    if self.keep:
+                        self.received.append(b"".join(lines))
+                    self.messages += 1
+                    await self._reply(writer, "250 OK queued")
+                elif command.startswith("RCPT") and any(f"<{address.upper()}>" in command for address in self.refused):
+                    await self._reply(writer, "550 5.1.1 Mailbox unavailable")
+                elif command.startswith("QUIT"):
+                    await self._reply(writer, "221 Bye")
+                    break
+                else:
+                    # MAIL, RCPT, RSET, NOOP
+                    await self._reply(writer, "250 OK")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _serve(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, self.host, self.port)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self) -> "FakeSMTPServer":
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self) -> None:
+        self._loop.call_soon_threadsafe(self._server.close)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FakePostgREST:
+    """In-memory PostgREST stand-in serving /rest/v1/<table> over HTTP/1.1.
+
+    Supports the subset the backend uses: eq/neq/lt/lte/gt/gte/in filters,
+    or/and logic trees, order, limit, select, JSON object or array inserts and
+    filtered PATCH. Counts TCP connections so keep-alive reuse can be measured.
+    `delay` adds latency to every response. Emulates the contact_request_stats
+    trigger and rebuild function from SUPABASE_SETUP_GUIDE.md, and the
+    search_contact_requests function with a scan (accent-folded, plural-
+    insensitive word prefixes in place of the Spanish tsvector).
+
+    Set `fault` to misbehave from the next request on: "hang" (no response
+    until the fault is cleared), "reset" (TCP reset) or "error" (503).
+    """
+
+    STATS_TABLE = "contact_request_stats"
+    SEARCH_WEIGHTS = {"name": 5, "company": 5, "description": 1}
+
+    OPERATORS = {
+        "eq": lambda a, b: a == b,
+        "neq": lambda a, b: a != b,
+        "lt": lambda a, b: a is not None and a < b,
+        "lte": lambda a, b: a is not None and a <= b,
+        "gt": lambda a, b: a is not None and a > b,
+        "gte": lambda a, b: a is not None and a >= b,
+    }
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0):
+        self.tables = {}
+        self.ids = {}
+        self.connections = 0
+        self.requests = 0
+        self.delay = delay
+        self.fault = None
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self.url = f"http://{host}:{self.port}"
+        self._thread = None
+
+    @staticmethod
+    def _coerce(value: str, sample):
+        if isinstance(sample, bool):
+            return value == "true"
+        if isinstance(sample, int):
+            return int(value)
+        return None if value == "null" else value
+
+    def _matches(self, row: dict, column: str, expression: str) -> bool:
+        op, _, value = expression.partition(".")
+        current = row.get(column)
+        if op == "in":
+            options = value.strip("()").split(",")
+            return str(current) in options
+        if op == "is":
+            return current is None if value == "null" else str(current).lower() == value
+        return self.OPERATORS[op](current, self._coerce(value, current))
+
+    @staticmethod
+    def _split(expression: str) -> list:
+        """Split a logic tree body on top-level commas"""
+        parts, depth, quoted, current = [], 0, False, ""
+        for ch in expression:
+            if ch == '"':
+                quoted = not quoted
+            elif not quoted and ch == "(":
+                depth += 1
+            elif not quoted and ch == ")":
+                depth -= 1
+            if ch == "," and depth == 0 and not quoted:
+                parts.append(current)
+                current = ""
+            else:
+                current += ch
+        parts.append(current)
+        return parts
+
+    def _logic(self, row: dict, operator: str, body: str) -> bool:
+        results = []
+        for term in self._split(body):
+            if term.startswith(("and(", "or(")):
+                name, _, rest = term.partition("(")
+                results.append(self._logic(row, name, rest[:-1]))
+            else:
+                column, _, expression = term.partition(".")
+                op, _, value = expression.partition(".")
+                results.append(self._matches(row, column, f"{op}.{value.strip(chr(34))}"))
+        return all(results) if operator == "and" else any(results)
+
+    def _filter(self, row: dict, params: list) -> bool:
+        for column, expression in params:
+            if column in ("order", "limit", "offset", "select"):
+                continue
+            if column in ("or", "and"):
+                if not self._logic(row, column, expression[1:-1]):
+                    return False
+            elif not self._matches(row, column, expression):
+                return False
+        return True
+
+    def select(self, table: str, query: list) -> list:
+        params = dict(query)
+        rows = [r for r in self.tables.get(table, []) if self._filter(r, query)]
+        for term in reversed(params.get("order", "").split(",") if params.get("order") else []):
+            column, _, direction = term.partition(".")
+            rows.sort(key=lambda r: (r.get(column) is None, r.get(column) or ""),
+                      reverse=direction.startswith("desc"))
+        offset = int(params.get("offset", 0))
+        limit = int(params["limit"]) if "limit" in params else None
+        rows = rows[offset:offset + limit if limit is not None else None]
+        if params.get("select", "*") != "*":
+            columns = params["select"].split(",")
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+        return rows
+
+    def bump_stats(self, row: dict, delta: int, dimensions=("total", "status", "project_type", "day")) -> None:
+        stats = self.tables.setdefault(self.STATS_TABLE, [])
+        values = {"total": "", "status": row.get("status"), "project_type": row.get("project_type"),
+                  "day": str(row.get("created_at"))[:10]}
+        for dimension in dimensions:
+            for stat in stats:
+                if stat["dimension"] == dimension and stat["value"] == values[dimension]:
+                    stat["count"] += delta
+                    break
+            else:
+                stats.append({"dimension": dimension, "value": values[dimension], "count": delta})
+
+    def rebuild_stats(self) -> None:
+        self.tables[self.STATS_TABLE] = []
+        for row in self.tables.get("contact_requests", []):
+            self.bump_stats(row, 1)
+
+    @staticmethod
+    def _words(text) -> list:
+        folded = unicodedata.normalize("NFKD", (text or "").lower())
+        return re.findall(r"\w+", "".join(ch for ch in folded if not unicodedata.combining(ch)))
+
+    def search(self, params: list) -> list:
+        args = dict(params)
+        stems = [re.sub(r"(?<=\w{3})e?s$", "", word) for word in self._words(args.get("q"))]
+        ranked = []
+        for row in self.tables.get("contact_requests", []):
+            score = sum(
+                weight
+                for column, weight in self.SEARCH_WEIGHTS.items()
+                for word in self._words(row.get(column))
+                for stem in stems if word.startswith(stem)
+            )
+            if score:
+                ranked.append((score, row))
+        # Best score first, newest first among equals
+        ranked.sort(key=lambda item: (item[1]["created_at"], item[1]["id"]), reverse=True)
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        offset = int(args.get("skip", 0))
+        rows = [dict(row) for _, row in ranked[offset:offset + int(args["max_rows"])]]
+        if args.get("select", "*") != "*":
+            columns = args["select"].split(",")
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+        return rows
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def _parse(self):
+                parsed = urlsplit(self.path)
+                table = parsed.path.rsplit("/", 1)[-1]
+                return table, parse_qsl(parsed.query, keep_blank_values=True)
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length)) if length else None
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (ConnectionResetError, json.JSONDecodeError):
+                    # The client process was killed mid-request, body half sent (crash tests)
+                    pass
+
+            def _fault(self) -> bool:
+                """Apply the configured fault; True when the request must not be served"""
+                while fake.fault == "hang":
+                    time.sleep(0.05)
+                if fake.fault == "reset":
+                    reset(self.connection)
+                    self.connection.close()
+                    self.close_connection = True
+                    return True
+                if fake.fault == "error":
+                    # Drain the body, or it would be read as the next request on this connection
+                    self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                    self._send(503, {"message": "fault: service unavailable"})
+                    return True
+                return False
+
+            def _send(self, status: int, payload=None):
+                if fake.delay:
+                    time.sleep(fake.delay)
+                data = b"" if status == 204 else json.dumps(payload if payload is not None else []).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up (e.g. its deadline passed while the fault hung us)
+                    self.close_connection = True
+
+            def do_GET(self):
+                if self._fault():
+                    return
+                table, params = self._parse()
+                if "/rpc/" in self.path and table != "search_contact_requests":
+                    self._send(404, {"message": f"function {table} not found"})
+                    return
+                with fake._lock:
+                    fake.requests += 1
+                    rows = fake.search(params) if "/rpc/" in self.path else fake.select(table, params)
+                self._send(200, rows)
+
+            def do_POST(self):
+                if self._fault():
+                    return
+                table, _ = self._parse()
+                body = self._body()
+                if "/rpc/" in self.path:
+                    if table != "rebuild_contact_request_stats":
+                        self._send(404, {"message": f"function {table} not found"})
+                        return
+                    with fake._lock:
+                        fake.requests += 1
+                        fake.rebuild_stats()
+                    self._send(204)
+                    return
+                rows = body if isinstance(body, list) else [body]
+                ignore_duplicates = "resolution=ignore-duplicates" in (self.headers.get("Prefer") or "")
+                with fake._lock:
+                    fake.requests += 1
+                    # id is the primary key: a duplicate fails the whole statement unless ignored
+                    ids = fake.ids.setdefault(table, set())
+                    if not ignore_duplicates and any(r.get("id") in ids for r in rows if "id" in r):
+                        self._send(409, {"code": "23505", "message": "duplicate key value violates unique constraint"})
+                        return
+                    rows = [r for r in rows if r.get("id") not in ids or "id" not in r]
+                    ids.update(r["id"] for r in rows if "id" in r)
+                    fake.tables.setdefault(table, []).extend(dict(r) for r in rows)
+                    if table == "contact_requests":
+                        for row in rows:
+                            fake.bump_stats(row, 1)
+                representation = "return=representation" in (self.headers.get("Prefer") or "")
+                self._send(201, rows if representation else [])
+
+            def do_PATCH(self):
+                if self._fault():
+                    return
+                table, params = self._parse()
+                changes = self._body() or {}
+                with fake._lock:
+                    fake.requests += 1
+                    # Update the stored rows; `select` only shapes the representation
+                    rows = fake.select(table, [(column, value) for column, value in params if column != "select"])
+                    for row in rows:
+                        if table == "contact_requests":
+                            fake.bump_stats(row, -1, ("status", "project_type", "day"))
+                        row.update(changes)
+                        if table == "contact_requests":
+                            fake.bump_stats(row, 1, ("status", "project_type", "day"))
+                    columns = dict(params).get("select", "*")
+                    rows = [dict(r) if columns == "*" else {c: r.get(c) for c in columns.split(",")} for r in rows]
+                representation = "return=representation" in (self.headers.get("Prefer") or "")
+                self._send(200 if representation else 204, rows if representation else [])
+
+        return Handler
+
+    def start(self) -> "FakePostgREST":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
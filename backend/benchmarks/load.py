@@ -0,0 +1,273 @@
+"""Load harness: the real FastAPI app in-process under a mixed workload.
+
+Boots `server.app` against local stand-ins (FakeSMTPServer for email, the
+embedded SQLite storage or FakePostgREST for data; `--backend mongo` uses the
+MONGO_URL of a local mongod) and drives submissions, logins and dashboard
+listing through an ASGI transport at `--concurrency`. Reports req/s,
+p50/p95/p99 per operation and peak RSS, optionally into a JSON file;
+`compare` diffs two such files and exits 1 past the regression threshold.
+
+    cd backend && python -m benchmarks.load run --requests 2000 --out before.json
+    cd backend && python -m benchmarks.load compare before.json after.json --threshold 0.10
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.fakes import FakePostgREST, FakeSMTPServer
+
+OPERATIONS = ('submit', 'login', 'list')
+# Submissions must differ across runs/phases or the idempotency cache answers them
+SERIAL = itertools.count(1_000_000)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def parse_mix(value: str) -> dict:
+    """"submit=6,login=1,list=3" -> relative weights per operation"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}; expected {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def configure_env(backend: str, smtp_port: int, postgrest_url: str = None) -> None:
+    """Point the app at the stand-ins; must run before `server` is imported"""
+    os.environ['STORAGE_BACKEND'] = backend
+    os.environ['SQLITE_PATH'] = ':memory:'
+    os.environ['SMTP_HOST'] = '127.0.0.1'
+    os.environ['SMTP_PORT'] = str(smtp_port)
+    os.environ['SMTP_USER'] = 'bench@lsweb.com'
+    os.environ['SMTP_PASSWORD'] = 'bench'
+    os.environ['SMTP_STARTTLS'] = 'false'
+    os.environ['OUTBOX_SQLITE_PATH'] = ''
+    os.environ['OUTBOX_POLL_INTERVAL'] = '0.05'
+    # Never the real spool in backend/data: leftover synthetic leads would be replayed into the database
+    os.environ['CONTACT_SPOOL_PATH'] = ''
+    # Every simulated client shares one address; bench_ratelimit covers the limiter
+    os.environ['RATE_LIMIT_ENABLED'] = 'false'
+    if postgrest_url:
+        os.environ['SUPABASE_URL'] = postgrest_url
+        os.environ['SUPABASE_KEY'] = 'bench-key'
+    if backend == 'mongo':
+        os.environ.setdefault('DB_NAME', 'lsweb_load')
+
+
+def submission(i: int) -> dict:
+    return {
+        'name': f'Cliente {i}',
+        'email': f'cliente{i}@example.com',
+        'phone': '+54 11 5555-5555',
+        'company': 'Empresa Ejemplo S.A.',
+        'projectType': ('landing', 'e-commerce', 'web-app')[i % 3],
+        'budget': '1000-3000',
+        'timeline': '1-2 meses',
+        'description': 'Necesitamos una tienda online con catálogo, pagos y envíos a todo el país.',
+    }
+
+
+async def seed(storage, rows: int) -> None:
+    from server import ContactRequest
+    for i in range(rows):
+        data = submission(i)
+        data['project_type'] = data.pop('projectType')
+        await storage.insert_contact_request(ContactRequest(**data).dict())
+
+
+async def drive(client, mix: dict, requests: int, concurrency: int, rng: random.Random, auth: dict) -> tuple:
+    names, weights = zip(*mix.items())
+    plan = rng.choices(names, weights=weights, k=requests)
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    queue = iter(enumerate(plan))
+
+    async def call(i: int, name: str):
+        if name == 'submit':
+            return await client.post('/api/contact-request', json=submission(next(SERIAL)))
+        if name == 'login':
+            return await client.post('/api/login', json={'email': 'admin@lsweb.com', 'password': 'admin123'})
+        return await client.get('/api/contact-requests', params={'limit': 50}, headers=auth)
+
+    async def worker() -> None:
+        for i, name in queue:
+            start = time.perf_counter()
+            response = await call(i, name)
+            latencies[name].append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors[name] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    if not latencies:
+        return {'count': 0, 'errors': 0, 'rps': 0.0, 'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+    return {
+        'count': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def run(args) -> dict:
+    import httpx
+    import server
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    if args.backend == 'mongo':
+        for name in ('contact_requests', 'users', 'email_outbox'):
+            await server.storage.db.drop_collection(name)
+    await server.startup_event()
+    await server.seed_admin('admin@lsweb.com', 'admin123')
+    await seed(server.storage, args.seed)
+    rng = random.Random(args.random_seed)
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://load') as client:
+            # The dashboard listing is admin-only; reuse one session token like the dashboard does
+            response = await client.post('/api/login', json={'email': 'admin@lsweb.com', 'password': 'admin123'})
+            auth = {'Authorization': f"Bearer {response.json()['token']}"}
+            await drive(client, args.mix, args.warmup, args.concurrency, rng, auth)
+            latencies, errors, elapsed = await drive(client, args.mix, args.requests, args.concurrency, rng, auth)
+    finally:
+        await server.shutdown_db_client()
+
+    operations = {name: summarize(latencies[name], errors[name], elapsed) for name in latencies}
+    everything = [value for values in latencies.values() for value in values]
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'date': datetime.utcnow().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'backend': args.backend,
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'mix': args.mix,
+            'seed_rows': args.seed,
+        },
+        'overall': summarize(everything, sum(errors.values()), elapsed),
+        'operations': operations,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def cmd_run(args) -> None:
+    with FakeSMTPServer() as smtp:
+        if args.backend == 'supabase':
+            with FakePostgREST() as postgrest:
+                configure_env(args.backend, smtp.port, postgrest.url)
+                report = asyncio.run(run(args))
+        else:
+            configure_env(args.backend, smtp.port)
+            report = asyncio.run(run(args))
+        report['meta']['emails_delivered'] = smtp.messages
+
+    for name, stats in [('overall', report['overall'])] + list(report['operations'].items()):
+        print(f"{name:>8}: {stats['count']:6d} req  {stats['rps']:8.1f} req/s  "
+              f"p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  p99 {stats['p99_ms']} ms  "
+              f"{stats['errors']} errors")
+    print(f"peak RSS {report['peak_rss_mb']} MB")
+    if args.out:
+        with open(args.out, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        print(f"wrote {args.out}")
+
+
+def regressions(baseline: dict, current: dict, threshold: float) -> list:
+    """Human-readable findings where `current` is worse than `baseline` by more than `threshold`"""
+    found = []
+    pairs = [('overall', baseline['overall'], current['overall'])]
+    pairs += [(name, stats, current['operations'].get(name))
+              for name, stats in baseline['operations'].items()]
+    for name, before, after in pairs:
+        if not after or not before['count']:
+            continue
+        if after['rps'] < before['rps'] * (1 - threshold):
+            found.append(f"{name}: req/s {before['rps']} -> {after['rps']}")
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            if after[key] > before[key] * (1 + threshold):
+                found.append(f"{name}: {key} {before[key]} -> {after[key]}")
+    if current['peak_rss_mb'] > baseline['peak_rss_mb'] * (1 + threshold):
+        found.append(f"peak RSS {baseline['peak_rss_mb']} MB -> {current['peak_rss_mb']} MB")
+    return found
+
+
+def cmd_compare(args) -> None:
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+    with open(args.current) as fh:
+        current = json.load(fh)
+    found = regressions(baseline, current, args.threshold)
+    print(f"{baseline['meta'].get('commit')} -> {current['meta'].get('commit')} "
+          f"(threshold {args.threshold:.0%})")
+    for line in found:
+        print(f"  REGRESSION {line}")
+    if found:
+        sys.exit(1)
+    print("  no regressions")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='drive the app and report')
+    run_parser.add_argument('--backend', choices=('sqlite', 'supabase', 'mongo'), default='sqlite')
+    run_parser.add_argument('--requests', type=int, default=2000)
+    run_parser.add_argument('--warmup', type=int, default=100)
+    run_parser.add_argument('--concurrency', type=int, default=20)
+    run_parser.add_argument('--mix', type=parse_mix, default=parse_mix('submit=6,login=1,list=3'))
+    run_parser.add_argument('--seed', type=int, default=500, help='contact requests inserted before the run')
+    run_parser.add_argument('--random-seed', type=int, default=1)
+    run_parser.add_argument('--out', help='write the JSON report here')
+    run_parser.set_defaults(func=cmd_run)
+
+    compare_parser = commands.add_parser('compare', help='diff two JSON reports')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='relative slowdown tolerated before failing (0.10 = 10%%)')
+    compare_parser.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
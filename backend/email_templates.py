@@ -0,0 +1,61 @@
+import os
+from pathlib import Path
+from typing import Optional, Tuple
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+TEMPLATES_DIR = Path(__file__).parent / 'templates'
+
+# Optional on-disk cache of compiled templates, shared across processes/restarts
+TEMPLATE_CACHE_DIR = os.environ.get('EMAIL_TEMPLATE_CACHE_DIR', '')
+
+# Template names (each one has a .html body and a .txt alternative)
+ADMIN_NOTIFICATION = 'admin_notification'
+CUSTOMER_AUTOREPLY = 'customer_autoreply'
+# Digest mode: one fragment per lead, folded later into a single summary
+ADMIN_DIGEST_ITEM = 'admin_digest_item'
+ADMIN_DIGEST = 'admin_digest'
+
+PROJECT_TYPE_LABELS = {
+    'web-corporativa': 'Web Corporativa',
+    'e-commerce': 'E-commerce',
+    'sistema-ventas-bd': 'Sistema de Ventas y Base de Datos',
+    'crm-personalizado': 'CRM Personalizado',
+    'landing-page': 'Landing Page',
+    'blog': 'Blog/Portfolio',
+    'app-web': 'Aplicación Web',
+    'marketing-digital': 'Marketing Digital',
+    'community-management': 'Community Management',
+}
+
+
+def project_type_label(project_type: str) -> str:
+    return PROJECT_TYPE_LABELS.get(project_type, project_type)
+
+
+def _bytecode_cache() -> Optional[FileSystemBytecodeCache]:
+    if not TEMPLATE_CACHE_DIR:
+        return None
+    Path(TEMPLATE_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+    return FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+
+
+env = Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    autoescape=select_autoescape(['html']),
+    bytecode_cache=_bytecode_cache(),
+    auto_reload=False,
+)
+env.filters['project_type_label'] = project_type_label
+
+# Compile every template once at import; render() is then a dict lookup away
+_compiled = {
+    name: (env.get_template(f'{name}.html'), env.get_template(f'{name}.txt'))
+    for name in (ADMIN_NOTIFICATION, CUSTOMER_AUTOREPLY, ADMIN_DIGEST_ITEM, ADMIN_DIGEST)
+}
+
+
+def render(name: str, context: dict) -> Tuple[str, str]:
+    """Render a template into its (html, text) parts"""
+    html_template, text_template = _compiled[name]
+    return html_template.render(context), text_template.render(context)
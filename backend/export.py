@@ -0,0 +1,75 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Iterable
+
+import orjson
+
+EXPORT_COLUMNS = ("id", "created_at", "status", "name", "email", "phone", "company",
+                  "project_type", "budget", "timeline", "description")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Flush compressed/encoded output once this many bytes are buffered
+CHUNK_SIZE = 64 * 1024
+
+
+async def ndjson_lines(rows: AsyncIterator[dict], columns: Iterable[str] = EXPORT_COLUMNS) -> AsyncIterator[bytes]:
+    columns = tuple(columns)
+    async for row in rows:
+        record = {column: row.get(column) for column in columns}
+        yield orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+
+
+async def csv_lines(rows: AsyncIterator[dict], columns: Iterable[str] = EXPORT_COLUMNS) -> AsyncIterator[bytes]:
+    columns = tuple(columns)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for row in rows:
+        writer.writerow([
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in (row.get(column) for column in columns)
+        ])
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only (no rows)
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+async def chunked(lines: AsyncIterator[bytes], compress: bool = False) -> AsyncIterator[bytes]:
+    """Group encoded lines into ~CHUNK_SIZE writes, gzip-compressing them if asked"""
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    pending = []
+    size = 0
+    async for line in lines:
+        pending.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            data = b"".join(pending)
+            pending, size = [], 0
+            if compressor:
+                data = compressor.compress(data)
+            if data:
+                yield data
+    data = b"".join(pending)
+    if compressor:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
+
+
+def export_stream(rows: AsyncIterator[dict], fmt: str, compress: bool = False) -> AsyncIterator[bytes]:
+    lines = ndjson_lines(rows) if fmt == "ndjson" else csv_lines(rows)
+    return chunked(lines, compress)
+
+
+def export_filename(fmt: str, compress: bool = False) -> str:
+    name = f"contact-requests-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    return f"{name}.gz" if compress else name
@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+
+class IdempotencyConflict(Exception):
+    """The original request for this key is still running in another worker"""
+
+
+def fingerprint(email: str, description: str, project_type: str) -> str:
+    """Content key for submissions that arrive without an Idempotency-Key"""
+    normalized = "\x1f".join((email.strip().lower(), " ".join(description.split()), project_type.strip()))
+    return "fp:" + hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class SQLiteIdempotencyStore:
+    """Keys shared by every worker on the host through one SQLite file.
+
+    A key is claimed atomically with the id the claimer will answer with,
+    marked done once that request has been stored, and released if it failed.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                done INTEGER NOT NULL DEFAULT 0,
+                expires_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires ON idempotency_keys(expires_at)")
+
+    def _run(self, fn, *args):
+        def locked():
+            with self._lock:
+                return fn(*args)
+        return asyncio.to_thread(locked)
+
+    def _claim(self, key: str, value: str, ttl: float) -> Optional[Tuple[str, bool]]:
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,))
+            row = self._conn.execute("SELECT value, done FROM idempotency_keys WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO idempotency_keys (key, value, done, expires_at) VALUES (?, ?, 0, ?)",
+                    (key, value, now + ttl)
+                )
+        finally:
+            self._conn.execute("COMMIT")
+        return (row[0], bool(row[1])) if row else None
+
+    async def claim(self, key: str, value: str, ttl: float) -> Optional[Tuple[str, bool]]:
+        """Claim `key` for `value`; if already claimed, return (value, done) of the holder"""
+        return await self._run(self._claim, key, value, ttl)
+
+    async def complete(self, key: str) -> None:
+        await self._run(self._conn.execute, "UPDATE idempotency_keys SET done = 1 WHERE key = ?", (key,))
+
+    async def release(self, key: str) -> None:
+        await self._run(self._conn.execute, "DELETE FROM idempotency_keys WHERE key = ?", (key,))
+
+
+class IdempotencyCache:
+    """Remembers the outcome of recent submissions by key for `ttl` seconds.
+
+    Concurrent requests with the same key are collapsed in-process: the first
+    one runs, the rest wait for it and get its id. With a shared `store`, the
+    same holds across workers; a repeat that finds the original still running
+    elsewhere waits up to `wait_timeout` for it to finish. Failed requests
+    leave no trace, so a retry runs again.
+    """
+
+    def __init__(self, ttl: float = 600.0, max_keys: int = 10000, store=None,
+                 wait_timeout: float = 10.0, poll_interval: float = 0.05):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.store = store
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        # key -> (expires_at, future resolving to the id); insertion order is expiry order
+        self._entries: Dict[str, Tuple[float, asyncio.Future]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, now: float) -> None:
+        while self._entries:
+            key, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) < self.max_keys:
+                return
+            # An evicted in-flight entry only loses its de-duplication
+            del self._entries[key]
+
+    async def run(self, key: str, value: str, fn: Callable[[], Awaitable[None]]) -> Tuple[str, bool]:
+        """Run `fn` once per key and return (id, replayed).
+
+        `value` is the id this request would answer with if it is the first.
+        """
+        while True:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                break
+            try:
+                return await asyncio.shield(entry[1]), True
+            except Exception:
+                # The original failed and was forgotten; this request takes over
+                continue
+
+        self._evict(now)
+        future = asyncio.get_running_loop().create_future()
+        self._entries[key] = (now + self.ttl, future)
+        try:
+            result = await self._run_shared(key, value, fn)
+        except BaseException as e:
+            if self._entries.get(key, (None, None))[1] is future:
+                del self._entries[key]
+            # Waiters see a plain failure (even if this request was cancelled) and retry
+            future.set_exception(e if isinstance(e, Exception) else RuntimeError("Original request aborted"))
+            future.exception()  # mark retrieved in case nobody was waiting
+            raise
+        future.set_result(result[0])
+        return result
+
+    async def _run_shared(self, key: str, value: str, fn) -> Tuple[str, bool]:
+        if self.store is None:
+            await fn()
+            return value, False
+
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            holder = await self.store.claim(key, value, self.ttl)
+            if holder is None:
+                break
+            held_value, done = holder
+            if done:
+                return held_value, True
+            if time.monotonic() >= deadline:
+                raise IdempotencyConflict(key)
+            await asyncio.sleep(self.poll_interval)
+
+        try:
+            await fn()
+        except BaseException:
+            await self.store.release(key)
+            raise
+        await self.store.complete(key)
+        return value, False
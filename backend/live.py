@@ -0,0 +1,242 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+import orjson
+
+from pagination import encode_cursor
+
+logger = logging.getLogger(__name__)
+
+# SSE comment line: keeps idle connections (and the proxies in between) open
+PING = b": ping\n\n"
+# Sent when a resume point is too old to replay; the client reloads the list
+RESET = b"event: reset\ndata: {}\n\n"
+
+
+def event_id(row: dict) -> str:
+    """SSE id of a contact request: its keyset cursor, so a resume can fall back to a storage query"""
+    return encode_cursor(row["created_at"], row["id"])
+
+
+def format_event(row: dict) -> bytes:
+    return (f"id: {event_id(row)}\nevent: contact_request\n".encode()
+            + b"data: " + orjson.dumps(row) + b"\n\n")
+
+
+class Subscription:
+    """One connected stream: a bounded queue of (row id, SSE frame); None ends the stream"""
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.dropped = False
+
+    async def get(self) -> Optional[Tuple[Optional[str], bytes]]:
+        return await self.queue.get()
+
+
+class LiveBroker:
+    """In-process fan-out of new contact requests to connected SSE streams.
+
+    Each event is serialized once and put on every subscriber's bounded
+    queue. A subscriber whose queue fills up (a client reading slower than
+    leads arrive) is disconnected instead of buffering without limit; it
+    reconnects with Last-Event-ID and catches up from `history`, the last
+    `history_size` events. Rows published twice (a local publish and the
+    storage change feed echoing it) are fanned out once. Idle subscribers
+    get a PING every `heartbeat` seconds from a single broker-wide task.
+    """
+
+    def __init__(self, history_size: int = 1000, queue_size: int = 256, heartbeat: float = 15.0):
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.subscribers: Set[Subscription] = set()
+        # (sequence, row id, frame), oldest first; positions maps a row id to its sequence
+        self.history: deque = deque()
+        self.positions: Dict[str, int] = {}
+        self.sequence = 0
+        self.published = 0
+        self.dropped = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self, row: dict) -> bool:
+        """Fan a new row out to every subscriber; False if it was already published"""
+        if row["id"] in self.positions:
+            return False
+        frame = format_event(row)
+        self.sequence += 1
+        self.history.append((self.sequence, row["id"], frame))
+        self.positions[row["id"]] = self.sequence
+        if len(self.history) > self.history_size:
+            _, old_id, _ = self.history.popleft()
+            del self.positions[old_id]
+        self.published += 1
+        for subscription in list(self.subscribers):
+            try:
+                subscription.queue.put_nowait((row["id"], frame))
+            except asyncio.QueueFull:
+                self._drop(subscription)
+        return True
+
+    def _end(self, subscription: Subscription) -> None:
+        self.subscribers.discard(subscription)
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+    def _drop(self, subscription: Subscription) -> None:
+        # Its backlog is in history: discard the queue and end the stream
+        subscription.dropped = True
+        self.dropped += 1
+        self._end(subscription)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.queue_size)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscribers.discard(subscription)
+
+    def since(self, row_id: str) -> Optional[List[Tuple[str, bytes]]]:
+        """Events published after `row_id`, or None if it is not (or no longer) in history"""
+        position = self.positions.get(row_id)
+        if position is None:
+            return None
+        first = self.history[0][0]
+        return [(rid, frame) for _, rid, frame in list(self.history)[position - first + 1:]]
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            for subscription in list(self.subscribers):
+                # A queue with events in it is not idle
+                if subscription.queue.empty():
+                    subscription.queue.put_nowait((None, PING))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._heartbeat())
+
+    async def stop(self) -> None:
+        """End every stream (so shutdown does not wait on them) and the heartbeat"""
+        for subscription in list(self.subscribers):
+            self._end(subscription)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class MemoryFeed:
+    """In-memory stand-in for the channel between workers, for tests and benchmarks.
+
+    Every attached broker plays one worker; a row published through the feed
+    reaches all of them, as a storage change feed would.
+    """
+
+    def __init__(self, *brokers: LiveBroker):
+        self.brokers = list(brokers)
+
+    def attach(self, broker: LiveBroker) -> None:
+        self.brokers.append(broker)
+
+    def publish(self, row: dict) -> None:
+        for broker in self.brokers:
+            broker.publish(row)
+
+    def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class ChangeFeed:
+    """Relays rows inserted by any worker from the storage change feed into a broker.
+
+    `watch` is the backend's watch_contact_requests (a Mongo change stream or
+    Postgres LISTEN). Local rows are also published straight away, so this
+    worker's own streams do not wait on the round trip; the echo is
+    deduplicated by the broker. A broken feed is reopened with exponential
+    backoff.
+    """
+
+    def __init__(self, broker: LiveBroker, watch: Callable[[], AsyncIterator[dict]], *,
+                 base_delay: float = 1.0, max_delay: float = 30.0):
+        self.broker = broker
+        self.watch = watch
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self, row: dict) -> None:
+        self.broker.publish(row)
+
+    async def _run(self) -> None:
+        failures = 0
+        while True:
+            try:
+                async for row in self.watch():
+                    failures = 0
+                    self.broker.publish(row)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Contact request change feed failed, reopening: {e}")
+            failures += 1
+            await asyncio.sleep(min(self.max_delay, self.base_delay * 2 ** (failures - 1)))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+async def stream_events(broker: LiveBroker, subscription: Subscription, backlog: List[Tuple[str, bytes]], *,
+                        max_age: float = 60.0, retry_ms: int = 3000) -> AsyncIterator[bytes]:
+    """Body of one SSE response: the backlog, then live events until dropped or shut down.
+
+    The stream also ends at the first heartbeat or event after `max_age`
+    seconds, and the client reconnects with Last-Event-ID. uvicorn waits for
+    open responses before the app's shutdown runs, so this bounds how long
+    a restart (or a --reload) waits on connected dashboards.
+    """
+    loop = asyncio.get_running_loop()
+    closes_at = loop.time() + max_age
+    try:
+        yield f"retry: {retry_ms}\n\n".encode()
+        sent = set()
+        for row_id, frame in backlog:
+            sent.add(row_id)
+            yield frame
+        while loop.time() < closes_at:
+            item = await subscription.get()
+            if item is None:
+                return
+            row_id, frame = item
+            # Published while the backlog was being read
+            if row_id in sent:
+                continue
+            yield frame
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def resume_window(cursor: Tuple[str, str], skew: float) -> datetime:
+    """Oldest created_at a storage resume re-reads: rows of other workers can land slightly out of order"""
+    return datetime.fromisoformat(cursor[0]) - timedelta(seconds=skew)
@@ -0,0 +1,217 @@
+"""In-process metrics with Prometheus text exposition.
+
+Counters and histograms are plain dicts keyed by label-value tuples and are
+only touched from the event loop, so recording costs a dict lookup and a
+bisect. Callback metrics read pool/queue state lazily at scrape time and add
+nothing to the request path.
+"""
+import math
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Tuple, Union
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def render(self) -> Iterable[str]:
+        for labelvalues, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(value)}"
+
+
+class _Timer:
+    __slots__ = ("histogram", "labelvalues", "started")
+
+    def __init__(self, histogram: "Histogram", labelvalues: Tuple):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labelvalues)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labelvalues -> [per-bucket counts (last one is +Inf), sum, count]
+        self._values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labelvalues) -> None:
+        state = self._values.get(labelvalues)
+        if state is None:
+            state = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def time(self, *labelvalues) -> _Timer:
+        """Context manager observing the elapsed wall time of its block"""
+        return _Timer(self, labelvalues)
+
+    def count(self, *labelvalues) -> int:
+        state = self._values.get(labelvalues)
+        return state[2] if state else 0
+
+    def render(self) -> Iterable[str]:
+        bounds = self.buckets + (math.inf,)
+        for labelvalues, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket in zip(bounds, counts):
+                cumulative += bucket
+                labels = _labels(self.labelnames, labelvalues, f'le="{_number(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {_number(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class Callback:
+    """Metric whose value is read from `fn` at scrape time.
+
+    `fn` returns a number, or a dict mapping label-value tuples to numbers
+    when `labelnames` is given.
+    """
+
+    def __init__(self, name: str, documentation: str, fn: Callable[[], Union[float, dict]],
+                 labelnames: Iterable[str] = (), kind: str = "gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+
+    def render(self) -> Iterable[str]:
+        value = self.fn()
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        for labelvalues, number in sorted(items):
+            yield f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(number)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, fn: Callable, labelnames: Iterable[str] = ()) -> Callback:
+        return self.register(Callback(name, documentation, fn, labelnames, "gauge"))
+
+    def counter_callback(self, name: str, documentation: str, fn: Callable,
+                         labelnames: Iterable[str] = ()) -> Callback:
+        """Counter kept by another component (e.g. a running total attribute)"""
+        return self.register(Callback(name, documentation, fn, labelnames, "counter"))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+http_requests = REGISTRY.counter(
+    "http_requests_total", "HTTP requests by method, route template and status", ("method", "route", "status")
+)
+http_request_duration = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by method and route template", ("method", "route")
+)
+stage_duration = REGISTRY.histogram(
+    "stage_duration_seconds", "Latency of individual stages inside handlers and the outbox worker", ("stage",)
+)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request count and latency.
+
+    Routes are labelled by their template (/api/contact-requests, never the
+    raw path) so label cardinality stays bounded; unmatched paths share one
+    label. Written against raw ASGI rather than BaseHTTPMiddleware so
+    streaming responses pass through untouched.
+    """
+
+    def __init__(self, app, requests: Counter = http_requests, duration: Histogram = http_request_duration):
+        self.app = app
+        self.requests = requests
+        self.duration = duration
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            self.duration.observe(time.perf_counter() - started, method, template)
+            self.requests.inc(method, template, status)
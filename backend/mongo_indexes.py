@@ -0,0 +1,117 @@
+"""MongoDB index management for the Motor backend.
+
+Mirrors the indexes declared in supabase-schema.sql. Can be run directly:
+
+    python mongo_indexes.py ensure   # create missing indexes (idempotent)
+    python mongo_indexes.py verify   # fail if a hot query would COLLSCAN
+"""
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+
+logger = logging.getLogger(__name__)
+
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True, name="users_email_unique"),
+    ],
+    "contact_requests": [
+        IndexModel([("id", ASCENDING)], unique=True, name="contact_requests_id"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="contact_requests_created_at_id"),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                   name="contact_requests_status_created_at_id"),
+        IndexModel([("project_type", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                   name="contact_requests_project_type_created_at_id"),
+        # Search; a collection can have only one text index
+        IndexModel([("name", TEXT), ("company", TEXT), ("description", TEXT)],
+                   weights={"name": 5, "company": 5, "description": 1}, default_language="spanish",
+                   name="contact_requests_text"),
+    ],
+    "email_outbox": [
+        IndexModel([("id", ASCENDING)], unique=True, name="email_outbox_id"),
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="email_outbox_due"),
+        IndexModel([("digest_id", ASCENDING), ("created_at", ASCENDING)], name="email_outbox_digest"),
+    ],
+}
+
+# (collection, filter, sort) for every query on a request path
+DASHBOARD_SORT = [("created_at", DESCENDING), ("id", DESCENDING)]
+HOT_QUERIES = [
+    ("users", {"email": "admin@lsweb.com"}, None),
+    ("contact_requests", {"id": "00000000-0000-0000-0000-000000000000"}, None),
+    ("contact_requests", {}, DASHBOARD_SORT),
+    ("contact_requests", {"status": "pending"}, DASHBOARD_SORT),
+    ("contact_requests", {"project_type": "e-commerce"}, DASHBOARD_SORT),
+    ("contact_requests", {"created_at": {"$lt": datetime(2100, 1, 1)}}, DASHBOARD_SORT),
+    ("contact_requests", {"$text": {"$search": "tienda online"}}, None),
+    ("email_outbox", {"status": "pending", "next_attempt_at": {"$lte": datetime(2100, 1, 1)}},
+     [("next_attempt_at", ASCENDING)]),
+    ("email_outbox", {"status": "digest", "next_attempt_at": {"$lte": datetime(2100, 1, 1)}},
+     [("next_attempt_at", ASCENDING)]),
+    ("email_outbox", {"status": "digest", "digest_id": "00000000-0000-0000-0000-000000000000"},
+     [("created_at", ASCENDING)]),
+]
+
+
+async def ensure_indexes(db) -> None:
+    """Create any missing index; existing ones are left untouched"""
+    for collection, indexes in INDEXES.items():
+        names = await db[collection].create_indexes(indexes)
+        logger.info(f"Indexes ensured on {collection}: {', '.join(names)}")
+
+
+def _stages(plan: dict):
+    yield plan.get("stage")
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _stages(child)
+
+
+async def verify_query_plans(db) -> List[str]:
+    """Explain every hot query and return the ones whose winning plan is a COLLSCAN"""
+    offenders = []
+    for collection, query, sort in HOT_QUERIES:
+        cursor = db[collection].find(query).limit(50)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        winning_plan = explain["queryPlanner"]["winningPlan"]
+        if "COLLSCAN" in _stages(winning_plan):
+            offenders.append(f"{collection} {query} sort={sort}")
+    return offenders
+
+
+async def _main(command: str) -> int:
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        if command == "ensure":
+            await ensure_indexes(db)
+            return 0
+        offenders = await verify_query_plans(db)
+        for offender in offenders:
+            print(f"COLLSCAN: {offender}")
+        print("All hot queries use an index" if not offenders else f"{len(offenders)} queries would COLLSCAN")
+        return 1 if offenders else 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] not in ("ensure", "verify"):
+        print(__doc__)
+        sys.exit(2)
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main(sys.argv[1])))
@@ -0,0 +1,570 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional
+
+from resilience import OPEN, CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+# Outbox statuses
+STATUS_PENDING = "pending"
+STATUS_SENT = "sent"
+STATUS_DEAD = "dead"
+# Held back to be folded into a summary email (see DigestAssigner)
+STATUS_DIGEST = "digest"
+
+
+def new_outbox_message(recipient: str, subject: str, html: str, text: Optional[str] = None,
+                       reference_id: Optional[str] = None) -> dict:
+    """Build an outbox row for an already rendered email"""
+    now = datetime.utcnow()
+    return {
+        "id": str(uuid.uuid4()),
+        "reference_id": reference_id,
+        "recipient": recipient,
+        "subject": subject,
+        "html": html,
+        "text": text,
+        "status": STATUS_PENDING,
+        "attempts": 0,
+        "last_error": None,
+        "next_attempt_at": now,
+        "created_at": now,
+        "sent_at": None,
+        "digest_id": None,
+    }
+
+
+class DigestAssigner:
+    """Groups outbox messages into per-recipient digests.
+
+    `assign` holds a message back (status digest) in the recipient's open
+    digest. A digest closes `window` seconds after its first message or when
+    it reaches `max_items`, and becomes due `grace` seconds after that; the
+    grace covers enqueues still in flight when it closes. Membership is
+    written with each message, so the open digests kept here are only a
+    routing hint: after a restart new messages start a new digest and the
+    old one is still flushed by whichever worker finds it due.
+    """
+
+    def __init__(self, window: float = 300.0, max_items: int = 25, grace: float = 30.0):
+        self.window = timedelta(seconds=window)
+        self.max_items = max_items
+        self.grace = timedelta(seconds=grace)
+        self._open = {}
+
+    def assign(self, message: dict, now: Optional[datetime] = None) -> dict:
+        now = now or datetime.utcnow()
+        current = self._open.get(message["recipient"])
+        if current is None or now >= current["closes_at"] or current["count"] >= self.max_items:
+            current = {"id": str(uuid.uuid4()), "closes_at": now + self.window, "count": 0}
+            self._open[message["recipient"]] = current
+        current["count"] += 1
+        full = current["count"] >= self.max_items
+        message.update(
+            status=STATUS_DIGEST,
+            digest_id=current["id"],
+            next_attempt_at=(now if full else current["closes_at"]) + self.grace,
+        )
+        return message
+
+
+def digest_message_id(digest_id: str, items: List[dict]) -> str:
+    """Outbox id of the summary for exactly these items, so re-flushing them is a no-op"""
+    return str(uuid.uuid5(uuid.UUID(digest_id), ",".join(sorted(item["id"] for item in items))))
+
+
+# Outbox stores
+#
+# Every store implements the same four coroutines. Claiming a message pushes its
+# next_attempt_at forward by the lease, so a worker that dies mid-send simply
+# lets the lease expire and the message becomes due again. Digests add four
+# more: enqueue_once (insert unless the id exists), due_digests,
+# digest_items and mark_digested.
+
+class MongoOutboxStore:
+    def __init__(self, db):
+        self.collection = db.email_outbox
+
+    async def enqueue(self, message: dict) -> None:
+        await self.collection.insert_one(dict(message))
+
+    async def claim_due(self, now: datetime, limit: int, lease: timedelta) -> List[dict]:
+        from pymongo import ReturnDocument
+
+        claimed = []
+        for _ in range(limit):
+            doc = await self.collection.find_one_and_update(
+                {"status": STATUS_PENDING, "next_attempt_at": {"$lte": now}},
+                {"$set": {"next_attempt_at": now + lease}, "$inc": {"attempts": 1}},
+                sort=[("next_attempt_at", 1)],
+                projection={"_id": False},
+                return_document=ReturnDocument.AFTER,
+            )
+            if doc is None:
+                break
+            claimed.append(doc)
+        return claimed
+
+    async def mark_sent(self, message_id: str, now: datetime) -> None:
+        await self.collection.update_one(
+            {"id": message_id},
+            {"$set": {"status": STATUS_SENT, "sent_at": now, "last_error": None}},
+        )
+
+    async def mark_failed(self, message_id: str, error: str, next_attempt_at: datetime, dead: bool) -> None:
+        await self.collection.update_one(
+            {"id": message_id},
+            {"$set": {
+                "status": STATUS_DEAD if dead else STATUS_PENDING,
+                "last_error": error,
+                "next_attempt_at": next_attempt_at,
+            }},
+        )
+
+    async def enqueue_once(self, message: dict) -> None:
+        await self.collection.update_one({"id": message["id"]}, {"$setOnInsert": dict(message)}, upsert=True)
+
+    async def due_digests(self, now: datetime, limit: int) -> List[str]:
+        cursor = self.collection.find(
+            {"status": STATUS_DIGEST, "next_attempt_at": {"$lte": now}},
+            projection={"_id": False, "digest_id": True},
+        ).sort("next_attempt_at", 1)
+        digest_ids = []
+        async for doc in cursor:
+            if doc["digest_id"] not in digest_ids:
+                digest_ids.append(doc["digest_id"])
+                if len(digest_ids) == limit:
+                    break
+        return digest_ids
+
+    async def digest_items(self, digest_id: str) -> List[dict]:
+        cursor = self.collection.find(
+            {"status": STATUS_DIGEST, "digest_id": digest_id}, projection={"_id": False}
+        ).sort("created_at", 1)
+        return await cursor.to_list(length=None)
+
+    async def mark_digested(self, message_ids: List[str], now: datetime) -> None:
+        await self.collection.update_many(
+            {"id": {"$in": message_ids}, "status": STATUS_DIGEST},
+            {"$set": {"status": STATUS_SENT, "sent_at": now}},
+        )
+
+
+class SupabaseOutboxStore:
+    """Outbox backed by the email_outbox table through PostgREST.
+
+    `db` is the app's SupabaseStorage; its shared client already carries the base
+    URL and auth headers.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def _serialize(message: dict) -> dict:
+        return {k: v.isoformat() if isinstance(v, datetime) else v for k, v in message.items()}
+
+    async def enqueue(self, message: dict) -> None:
+        response = await self.db.http().post("/email_outbox", json=self._serialize(message))
+        response.raise_for_status()
+
+    async def claim_due(self, now: datetime, limit: int, lease: timedelta) -> List[dict]:
+        client = self.db.http()
+        response = await client.get(
+            "/email_outbox",
+            params={
+                "status": f"eq.{STATUS_PENDING}",
+                "next_attempt_at": f"lte.{now.isoformat()}",
+                "order": "next_attempt_at.asc",
+                "limit": str(limit),
+            },
+        )
+        response.raise_for_status()
+        claimed = []
+        for row in response.json():
+            # Conditional PATCH on the previous lease so only one worker wins the row
+            patch = await client.patch(
+                "/email_outbox",
+                headers={'Prefer': 'return=representation'},
+                params={
+                    "id": f"eq.{row['id']}",
+                    "next_attempt_at": f"eq.{row['next_attempt_at']}",
+                },
+                json={
+                    "next_attempt_at": (now + lease).isoformat(),
+                    "attempts": row["attempts"] + 1,
+                },
+            )
+            if patch.status_code == 200 and patch.json():
+                claimed.append(patch.json()[0])
+        return claimed
+
+    async def _patch(self, message_id: str, data: dict) -> None:
+        response = await self.db.http().patch(
+            "/email_outbox",
+            params={"id": f"eq.{message_id}"},
+            json=self._serialize(data),
+        )
+        response.raise_for_status()
+
+    async def mark_sent(self, message_id: str, now: datetime) -> None:
+        await self._patch(message_id, {"status": STATUS_SENT, "sent_at": now, "last_error": None})
+
+    async def mark_failed(self, message_id: str, error: str, next_attempt_at: datetime, dead: bool) -> None:
+        await self._patch(message_id, {
+            "status": STATUS_DEAD if dead else STATUS_PENDING,
+            "last_error": error,
+            "next_attempt_at": next_attempt_at,
+        })
+
+    async def enqueue_once(self, message: dict) -> None:
+        response = await self.db.http().post(
+            "/email_outbox",
+            params={"on_conflict": "id"},
+            headers={"Prefer": "resolution=ignore-duplicates,return=minimal"},
+            json=self._serialize(message),
+        )
+        response.raise_for_status()
+
+    async def due_digests(self, now: datetime, limit: int) -> List[str]:
+        # One row per held message; a digest holds at most a few dozen, so a
+        # page of limit * 50 rows is enough to name `limit` digests
+        response = await self.db.http().get(
+            "/email_outbox",
+            params={
+                "select": "digest_id",
+                "status": f"eq.{STATUS_DIGEST}",
+                "next_attempt_at": f"lte.{now.isoformat()}",
+                "order": "next_attempt_at.asc",
+                "limit": str(limit * 50),
+            },
+        )
+        response.raise_for_status()
+        return list(dict.fromkeys(row["digest_id"] for row in response.json()))[:limit]
+
+    async def digest_items(self, digest_id: str) -> List[dict]:
+        response = await self.db.http().get(
+            "/email_outbox",
+            params={"status": f"eq.{STATUS_DIGEST}", "digest_id": f"eq.{digest_id}", "order": "created_at.asc"},
+        )
+        response.raise_for_status()
+        items = response.json()
+        for item in items:
+            item["created_at"] = datetime.fromisoformat(item["created_at"])
+        return items
+
+    async def mark_digested(self, message_ids: List[str], now: datetime) -> None:
+        response = await self.db.http().patch(
+            "/email_outbox",
+            params={"id": f"in.({','.join(message_ids)})", "status": f"eq.{STATUS_DIGEST}"},
+            json={"status": STATUS_SENT, "sent_at": now.isoformat()},
+        )
+        response.raise_for_status()
+
+
+class SQLiteOutboxStore:
+    """Local stand-in for tests and benchmarks; same semantics as the remote stores"""
+
+    COLUMNS = ("id", "reference_id", "recipient", "subject", "html", "text", "status",
+               "attempts", "last_error", "next_attempt_at", "created_at", "sent_at", "digest_id")
+
+    def __init__(self, path: str = ":memory:"):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS email_outbox (
+                id TEXT PRIMARY KEY,
+                reference_id TEXT,
+                recipient TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                html TEXT NOT NULL,
+                text TEXT,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                next_attempt_at TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                sent_at TEXT,
+                digest_id TEXT
+            )
+        """)
+        # Files created before digests existed
+        columns = [row["name"] for row in self._conn.execute("PRAGMA table_info(email_outbox)")]
+        if "digest_id" not in columns:
+            self._conn.execute("ALTER TABLE email_outbox ADD COLUMN digest_id TEXT")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox(status, next_attempt_at)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_email_outbox_digest ON email_outbox(digest_id)"
+        )
+
+    def _run(self, fn, *args):
+        def locked():
+            with self._lock:
+                return fn(*args)
+        return asyncio.to_thread(locked)
+
+    @staticmethod
+    def _value(v):
+        return v.isoformat() if isinstance(v, datetime) else v
+
+    def _row(self, row: sqlite3.Row) -> dict:
+        data = dict(row)
+        for field in ("next_attempt_at", "created_at", "sent_at"):
+            if data[field]:
+                data[field] = datetime.fromisoformat(data[field])
+        return data
+
+    def _enqueue(self, message: dict, on_conflict: str = "") -> None:
+        columns = ", ".join(self.COLUMNS)
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        self._conn.execute(
+            f"INSERT INTO email_outbox ({columns}) VALUES ({placeholders}) {on_conflict}",
+            [self._value(message.get(c)) for c in self.COLUMNS],
+        )
+
+    def _claim_due(self, now: datetime, limit: int, lease: timedelta) -> List[dict]:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self._conn.execute(
+                "SELECT id FROM email_outbox WHERE status = ? AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at LIMIT ?",
+                (STATUS_PENDING, now.isoformat(), limit),
+            ).fetchall()
+            ids = [row["id"] for row in rows]
+            claimed = []
+            for message_id in ids:
+                self._conn.execute(
+                    "UPDATE email_outbox SET next_attempt_at = ?, attempts = attempts + 1 WHERE id = ?",
+                    ((now + lease).isoformat(), message_id),
+                )
+                row = self._conn.execute("SELECT * FROM email_outbox WHERE id = ?", (message_id,)).fetchone()
+                claimed.append(self._row(row))
+            self._conn.execute("COMMIT")
+            return claimed
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _update(self, message_id: str, data: dict) -> None:
+        assignments = ", ".join(f"{k} = ?" for k in data)
+        self._conn.execute(
+            f"UPDATE email_outbox SET {assignments} WHERE id = ?",
+            [self._value(v) for v in data.values()] + [message_id],
+        )
+
+    def _due_digests(self, now: datetime, limit: int) -> List[str]:
+        rows = self._conn.execute(
+            "SELECT digest_id FROM email_outbox WHERE status = ? AND next_attempt_at <= ? "
+            "GROUP BY digest_id ORDER BY MIN(next_attempt_at) LIMIT ?",
+            (STATUS_DIGEST, now.isoformat(), limit),
+        ).fetchall()
+        return [row["digest_id"] for row in rows]
+
+    def _digest_items(self, digest_id: str) -> List[dict]:
+        rows = self._conn.execute(
+            "SELECT * FROM email_outbox WHERE status = ? AND digest_id = ? ORDER BY created_at",
+            (STATUS_DIGEST, digest_id),
+        ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def _mark_digested(self, message_ids: List[str], now: datetime) -> None:
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                "UPDATE email_outbox SET status = ?, sent_at = ? WHERE id = ? AND status = ?",
+                [(STATUS_SENT, now.isoformat(), message_id, STATUS_DIGEST) for message_id in message_ids],
+            )
+        finally:
+            self._conn.execute("COMMIT")
+
+    def _get(self, message_id: str) -> Optional[dict]:
+        row = self._conn.execute("SELECT * FROM email_outbox WHERE id = ?", (message_id,)).fetchone()
+        return self._row(row) if row else None
+
+    async def enqueue(self, message: dict) -> None:
+        await self._run(self._enqueue, message)
+
+    async def claim_due(self, now: datetime, limit: int, lease: timedelta) -> List[dict]:
+        return await self._run(self._claim_due, now, limit, lease)
+
+    async def mark_sent(self, message_id: str, now: datetime) -> None:
+        await self._run(self._update, message_id, {"status": STATUS_SENT, "sent_at": now, "last_error": None})
+
+    async def mark_failed(self, message_id: str, error: str, next_attempt_at: datetime, dead: bool) -> None:
+        await self._run(self._update, message_id, {
+            "status": STATUS_DEAD if dead else STATUS_PENDING,
+            "last_error": error,
+            "next_attempt_at": next_attempt_at,
+        })
+
+    async def enqueue_once(self, message: dict) -> None:
+        await self._run(self._enqueue, message, "ON CONFLICT(id) DO NOTHING")
+
+    async def due_digests(self, now: datetime, limit: int) -> List[str]:
+        return await self._run(self._due_digests, now, limit)
+
+    async def digest_items(self, digest_id: str) -> List[dict]:
+        return await self._run(self._digest_items, digest_id)
+
+    async def mark_digested(self, message_ids: List[str], now: datetime) -> None:
+        await self._run(self._mark_digested, message_ids, now)
+
+    async def get(self, message_id: str) -> Optional[dict]:
+        return await self._run(self._get, message_id)
+
+
+class OutboxWorker:
+    """Background task that drains the outbox through `send`.
+
+    `send` receives the outbox row and raises on failure. When `send_batch` is
+    given, each claimed batch is handed over at once (e.g. to push it through a
+    single SMTP session) and must return one exception or None per message.
+    Failed messages are retried with exponential backoff and parked as dead
+    after `max_attempts`. While `breaker` (the relay's circuit breaker) is
+    open nothing is claimed, so messages do not use up attempts on a relay
+    known to be down.
+
+    Messages held for a digest (status digest) are folded, once their digest
+    is due, into one summary built by `render_digest` from the held rows.
+    The summary is enqueued under an id derived from the digest and its
+    items (`digest_message_id`) before the items are marked, so a worker
+    that dies in between re-enqueues nothing on the next pass: as long as
+    every enqueue lands within the digest's grace, no item is lost or folded
+    into two summaries. One that lands later goes out in a summary of its own.
+    """
+
+    def __init__(self, store, send: Callable[[dict], Awaitable[None]], *,
+                 send_batch: Optional[Callable[[List[dict]], Awaitable[List[Optional[Exception]]]]] = None,
+                 batch_size: int = 10, poll_interval: float = 5.0, max_attempts: int = 5,
+                 base_delay: float = 30.0, max_delay: float = 3600.0, lease: float = 300.0,
+                 breaker: Optional[CircuitBreaker] = None,
+                 render_digest: Optional[Callable[[List[dict]], dict]] = None):
+        self.store = store
+        self.send = send
+        self.send_batch = send_batch
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease = timedelta(seconds=lease)
+        self.breaker = breaker
+        self.render_digest = render_digest
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        # Running totals of delivery outcomes, for metrics
+        self.results = {"sent": 0, "retry": 0, "dead": 0, "digested": 0}
+
+    def backoff(self, attempts: int) -> timedelta:
+        return timedelta(seconds=min(self.base_delay * (2 ** (attempts - 1)), self.max_delay))
+
+    async def enqueue(self, message: dict) -> None:
+        await self.store.enqueue(message)
+        self._wakeup.set()
+
+    async def _record(self, message: dict, error: Optional[Exception]) -> None:
+        if error is None:
+            await self.store.mark_sent(message["id"], datetime.utcnow())
+            self.results["sent"] += 1
+            return
+        dead = message["attempts"] >= self.max_attempts
+        next_attempt_at = datetime.utcnow() + self.backoff(message["attempts"])
+        await self.store.mark_failed(message["id"], str(error), next_attempt_at, dead)
+        self.results["dead" if dead else "retry"] += 1
+        if dead:
+            logger.error(f"Email {message['id']} moved to dead letter after {message['attempts']} attempts: {error}")
+        else:
+            logger.warning(f"Email {message['id']} failed (attempt {message['attempts']}), retrying: {error}")
+
+    async def _send_one(self, message: dict) -> Optional[Exception]:
+        try:
+            await self.send(message)
+        except Exception as e:
+            return e
+        return None
+
+    async def flush_digests(self) -> int:
+        """Fold due digests into summary messages and return how many items were folded"""
+        if self.render_digest is None:
+            return 0
+        folded = 0
+        now = datetime.utcnow()
+        for digest_id in await self.store.due_digests(now, self.batch_size):
+            items = await self.store.digest_items(digest_id)
+            if not items:
+                continue
+            summary = self.render_digest(items)
+            summary["id"] = digest_message_id(digest_id, items)
+            await self.store.enqueue_once(summary)
+            await self.store.mark_digested([item["id"] for item in items], now)
+            folded += len(items)
+        self.results["digested"] += folded
+        return folded
+
+    async def run_once(self) -> int:
+        """Send one batch of due messages and return how many were claimed"""
+        # Folding only touches storage, so it goes on while the relay is down
+        await self.flush_digests()
+        if self.breaker is not None and self.breaker.state == OPEN:
+            return 0
+        messages = await self.store.claim_due(datetime.utcnow(), self.batch_size, self.lease)
+        if not messages:
+            return 0
+        if self.send_batch is not None:
+            try:
+                errors = await self.send_batch(messages)
+            except Exception as e:
+                errors = [e] * len(messages)
+        else:
+            errors = [await self._send_one(message) for message in messages]
+        for message, error in zip(messages, errors):
+            await self._record(message, error)
+        return len(messages)
+
+    async def _idle(self) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self) -> None:
+        # Messages left by a previous process wait one interval (or the first
+        # enqueue), so the first claim and its client setup stay off the cold start
+        await self._idle()
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                if await self.run_once() == self.batch_size:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox worker iteration failed: {e}")
+            await self._idle()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # The flag covers a cancel swallowed by wait_for() when the wakeup
+            # fires in the same loop iteration (Python 3.11 and earlier)
+            self._stopping = True
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
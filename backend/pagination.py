@@ -0,0 +1,44 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple, Union
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Ranked search pages by offset; deeper pages cost a re-rank of everything before them
+MAX_SEARCH_OFFSET = 1000
+
+
+def encode_cursor(created_at: Union[datetime, str], row_id: str) -> str:
+    """Opaque keyset cursor pointing just after (created_at, id)"""
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    raw = json.dumps([created_at, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Return the (created_at, id) pair of a cursor; raises ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        datetime.fromisoformat(created_at)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    return created_at, str(row_id)
+
+
+def split_page(rows: List[dict], limit: int) -> Tuple[List[dict], Optional[str]]:
+    """Drop the look-ahead row fetched past `limit` and derive the next cursor"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last['created_at'], last['id'])
+
+
+def split_ranked_page(rows: List[dict], limit: int, offset: int) -> Tuple[List[dict], Optional[int]]:
+    """Like split_page for offset-paginated (ranked) results: the rows and the next offset"""
+    if len(rows) <= limit:
+        return rows, None
+    return rows[:limit], offset + limit
@@ -0,0 +1,53 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many password operations are already running or queued"""
+
+
+def _hash(password: str) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+def _verify(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL while hashing, so `max_workers` threads give real
+    parallelism. At most `max_queue` further calls may wait for a thread; past
+    that, callers get PasswordHasherBusy immediately instead of piling up.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 16):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bcrypt')
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def _run(self, fn, *args):
+        if self._in_flight >= self.max_workers + self.max_queue:
+            raise PasswordHasherBusy()
+        self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(_verify, password, hashed)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
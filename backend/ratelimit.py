@@ -0,0 +1,190 @@
+import asyncio
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+class Rule:
+    """`capacity` requests per `period` seconds, refilled continuously"""
+
+    __slots__ = ("name", "capacity", "period", "rate")
+
+    def __init__(self, name: str, capacity: float, period: float):
+        self.name = name
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+
+    @classmethod
+    def parse(cls, name: str, spec: str) -> "Rule":
+        """Parse "5/60" as 5 requests per 60 seconds"""
+        capacity, _, period = spec.partition("/")
+        return cls(name, float(capacity), float(period or 1))
+
+
+def _refill(tokens: float, last: float, now: float, rule: Rule) -> Tuple[float, float]:
+    """Take one token; returns (tokens left, seconds to wait or 0 if allowed)"""
+    tokens = min(rule.capacity, tokens + (now - last) * rule.rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rule.rate
+
+
+class MemoryBucketStore:
+    """Buckets of this worker, evicted once idle long enough to be full again.
+
+    Entries sit in an OrderedDict in last-use order, so eviction only ever
+    looks at the oldest ones: O(1) memory per active key and amortised O(1)
+    work per request.
+    """
+
+    def __init__(self, idle_ttl: float = 3600.0):
+        self.idle_ttl = idle_ttl
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _evict(self, now: float) -> None:
+        buckets = self._buckets
+        while buckets:
+            key, bucket = next(iter(buckets.items()))
+            if now - bucket[1] < self.idle_ttl:
+                return
+            del buckets[key]
+
+    async def take(self, key: str, rule: Rule) -> float:
+        """Take a token from `key`'s bucket; returns 0, or the seconds until one is available"""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._evict(now)
+            self._buckets[key] = [rule.capacity - 1, now]
+            return 0.0
+        bucket[0], wait = _refill(bucket[0], bucket[1], now, rule)
+        bucket[1] = now
+        self._buckets.move_to_end(key)
+        return wait
+
+
+class SQLiteBucketStore:
+    """Buckets shared by every worker on the host through one SQLite file"""
+
+    def __init__(self, path: str, idle_ttl: float = 3600.0, purge_every: int = 1000):
+        self.idle_ttl = idle_ttl
+        self.purge_every = purge_every
+        self._calls = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_rate_limit_updated ON rate_limit_buckets(updated_at)")
+
+    def _take(self, key: str, rule: Rule) -> float:
+        # Wall clock, since the buckets are shared between processes
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute(
+                "SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                tokens, wait = rule.capacity - 1, 0.0
+            else:
+                tokens, wait = _refill(row[0], row[1], now, rule)
+            self._conn.execute(
+                "INSERT INTO rate_limit_buckets (key, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (key, tokens, now)
+            )
+            self._calls += 1
+            if self._calls % self.purge_every == 0:
+                self._conn.execute("DELETE FROM rate_limit_buckets WHERE updated_at < ?", (now - self.idle_ttl,))
+        finally:
+            self._conn.execute("COMMIT")
+        return wait
+
+    async def take(self, key: str, rule: Rule) -> float:
+        def locked():
+            with self._lock:
+                return self._take(key, rule)
+        return await asyncio.to_thread(locked)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware applying a token bucket per client IP and route.
+
+    `rules` maps (method, path) to a Rule; requests under `default_prefix`
+    without their own rule share `default`. Rejections get 429 with
+    Retry-After before the app (and its DB/SMTP/bcrypt work) is reached.
+
+    Behind `trusted_proxies` reverse proxies the client is the address the
+    outermost of them appended to X-Forwarded-For, counted from the right;
+    entries to its left came from the client and may be forged.
+    """
+
+    def __init__(self, app, store, rules: Dict[Tuple[str, str], Rule], *, default: Optional[Rule] = None,
+                 default_prefix: str = "/api/", trusted_proxies: int = 0, on_reject=None):
+        self.app = app
+        self.store = store
+        self.rules = rules
+        self.default = default
+        self.default_prefix = default_prefix
+        self.trusted_proxies = trusted_proxies
+        self.on_reject = on_reject
+
+    def _client(self, scope) -> str:
+        if self.trusted_proxies:
+            # Repeated headers are one list, in order
+            forwarded = [entry.strip() for name, value in scope["headers"] if name == b"x-forwarded-for"
+                         for entry in value.decode("latin-1").split(",")]
+            forwarded = [entry for entry in forwarded if entry]
+            if len(forwarded) >= self.trusted_proxies:
+                return forwarded[-self.trusted_proxies]
+        # Not through every proxy: only the peer address can be trusted
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        rule = self.rules.get((scope["method"], scope["path"]))
+        if rule is None and self.default is not None and scope["path"].startswith(self.default_prefix):
+            rule = self.default
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        wait = await self.store.take(f"{rule.name}:{self._client(scope)}", rule)
+        if not wait:
+            await self.app(scope, receive, send)
+            return
+
+        if self.on_reject is not None:
+            self.on_reject(rule)
+        body = json.dumps({"detail": "Demasiadas solicitudes, intenta nuevamente más tarde"}, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(wait)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
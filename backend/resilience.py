@@ -0,0 +1,109 @@
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+STATES = (CLOSED, OPEN, HALF_OPEN)
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit {name} is open; retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one upstream.
+
+    closed: calls go through; `failure_threshold` failures in a row open it.
+    open: calls fail fast with CircuitOpen for `reset_timeout` seconds.
+    half_open: up to `half_open_max_calls` probe calls go through at a time;
+    a success closes the breaker, a failure opens it again.
+
+    Single event loop only: state changes are not locked.
+    """
+
+    def __init__(self, name: str, *, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 half_open_max_calls: int = 1, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        # Running totals, for metrics
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a probe through"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (self.clock() - self._opened_at))
+
+    def _transition(self, state: str) -> None:
+        if state == self._state:
+            return
+        logger.warning(f"Circuit {self.name}: {self._state} -> {state}")
+        self._state = state
+        self._probes = 0
+        if state == OPEN:
+            self._opened_at = self.clock()
+            self.opened += 1
+        elif state == CLOSED:
+            self._failures = 0
+
+    def acquire(self) -> None:
+        """Admit one call or raise CircuitOpen; every admitted call must be followed by `release`"""
+        state = self.state
+        if state == OPEN or (state == HALF_OPEN and self._probes >= self.half_open_max_calls):
+            self.rejected += 1
+            raise CircuitOpen(self.name, self.retry_after() or self.reset_timeout)
+        if state == HALF_OPEN:
+            self._probes += 1
+
+    def release(self, success: Optional[bool]) -> None:
+        """Record the outcome of an admitted call; None (e.g. cancelled) counts as neither"""
+        if self._state == HALF_OPEN:
+            self._probes = max(0, self._probes - 1)
+            if success is True:
+                self._transition(CLOSED)
+            elif success is False:
+                self._transition(OPEN)
+        elif success is True:
+            self._failures = 0
+        elif success is False and self._state == CLOSED:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._transition(OPEN)
+
+    @asynccontextmanager
+    async def guard(self, is_failure: Callable[[Exception], bool] = lambda e: True):
+        """Run the block as one call; exceptions matching `is_failure` count against the upstream"""
+        self.acquire()
+        try:
+            yield
+        except Exception as e:
+            self.release(False if is_failure(e) else True)
+            raise
+        except BaseException:
+            self.release(None)
+            raise
+        self.release(True)
@@ -0,0 +1,74 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag from the body, so every worker agrees on it"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison (RFC 9110 13.1.2)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+class ResponseCache:
+    """Serialized responses keyed by query, valid for one data version.
+
+    Writers call `bump()` after changing the underlying data, which drops
+    every entry. Entries are also dropped after `ttl` seconds, which bounds
+    how stale a worker can be when the write happened in another worker (or
+    outside the API). Size is bounded by `max_bytes` of bodies, evicting the
+    least recently used entries first.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, ttl: float = 5.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.version = 0
+        self.size = 0
+        # key -> (expires_at, etag, body)
+        self._entries: "OrderedDict[Hashable, Tuple[float, str, bytes]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def bump(self) -> None:
+        self.version += 1
+        self._entries.clear()
+        self.size = 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[str, bytes]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1], entry[2]
+
+    def put(self, key: Hashable, version: int, body: bytes) -> str:
+        """Store `body` computed at `version`; returns its ETag.
+
+        A body computed before a concurrent `bump()` is not stored, since it
+        may predate the write.
+        """
+        etag = make_etag(body)
+        if version != self.version or len(body) > self.max_bytes:
+            return etag
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, etag, body)
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+        return etag
+
+    def _drop(self, key: Hashable) -> None:
+        self.size -= len(self._entries.pop(key)[2])
@@ -1,31 +1,61 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+import orjson
 import os
 import logging
+import math
+import re
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr, validator
-from typing import List, Optional
+from typing import Dict, List, Optional
 import uuid
 from datetime import datetime, timedelta
-import smtplib
 import email.mime.text
 import email.mime.multipart
-import jwt
-import bcrypt
-from jinja2 import Template
+import email_templates
+import metrics
+from auth import InvalidToken, TokenVerifier, parse_secrets
+from export import MEDIA_TYPES, export_filename, export_stream
+from idempotency import IdempotencyCache, IdempotencyConflict, SQLiteIdempotencyStore, fingerprint
+from live import RESET, ChangeFeed, LiveBroker, MemoryFeed, format_event, resume_window, stream_events
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, MAX_SEARCH_OFFSET, decode_cursor
+from passwords import PasswordHasher, PasswordHasherBusy
+from ratelimit import MemoryBucketStore, RateLimitMiddleware, Rule, SQLiteBucketStore
+from resilience import STATES, CircuitBreaker, CircuitOpen
+from response_cache import ResponseCache, etag_matches
+from smtp_pool import SMTPPool
+from spool import ContactRequestSpool, SpoolReplayer
+from outbox import DigestAssigner, OutboxWorker, SQLiteOutboxStore, new_outbox_message
+from storage import (CONTACT_REQUEST_STATUSES, STATUS_NOT_FOUND, STATUS_UPDATED, WriteBehindBuffer, create_storage,
+                     search_terms)
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Storage backend: mongo, supabase or sqlite (embedded, for local runs and load tests)
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'mongo')
+storage = create_storage(STORAGE_BACKEND)
+# Write-behind: coalesce contact request inserts into bulk writes during spikes
+WRITE_BEHIND_ENABLED = os.environ.get('WRITE_BEHIND_ENABLED', 'false').lower() == 'true'
+WRITE_BEHIND_MAX_ROWS = int(os.environ.get('WRITE_BEHIND_MAX_ROWS', '100'))
+WRITE_BEHIND_MAX_DELAY_MS = float(os.environ.get('WRITE_BEHIND_MAX_DELAY_MS', '10'))
+# Write-ahead spool: accepted submissions are fsync'd to this local file first and
+# replayed into storage if the insert fails (empty disables it); relative to this
+# directory, so every working directory shares one file
+CONTACT_SPOOL_PATH = os.environ.get('CONTACT_SPOOL_PATH', '')
+if CONTACT_SPOOL_PATH:
+    CONTACT_SPOOL_PATH = str(ROOT_DIR / CONTACT_SPOOL_PATH)
+CONTACT_SPOOL_GRACE = float(os.environ.get('CONTACT_SPOOL_GRACE', '30'))  # > the storage deadline
+CONTACT_SPOOL_REPLAY_INTERVAL = float(os.environ.get('CONTACT_SPOOL_REPLAY_INTERVAL', '5'))
+CONTACT_SPOOL_BATCH = int(os.environ.get('CONTACT_SPOOL_BATCH', '100'))
 
 # Create the main app without a prefix
-app = FastAPI()
+# orjson renders responses (datetimes included) natively, several times faster than json.dumps
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -34,6 +64,9 @@ api_router = APIRouter(prefix="/api")
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-this')
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
+# Comma-separated secrets still accepted after rotating JWT_SECRET
+JWT_PREVIOUS_SECRETS = os.environ.get('JWT_PREVIOUS_SECRETS', '')
+JWT_CACHE_SIZE = int(os.environ.get('JWT_CACHE_SIZE', '1024'))
 
 # Email Configuration
 SMTP_HOST = os.environ.get('SMTP_HOST', 'smtp.gmail.com')
@@ -41,6 +74,79 @@ SMTP_PORT = int(os.environ.get('SMTP_PORT', '587'))
 SMTP_USER = os.environ.get('SMTP_USER', '')
 SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD', '')
 EMAIL_TO = os.environ.get('EMAIL_TO', 'alexisromeroezequiel139@gmail.com')
+SMTP_STARTTLS = os.environ.get('SMTP_STARTTLS', 'true').lower() == 'true'
+SMTP_TIMEOUT = float(os.environ.get('SMTP_TIMEOUT', '30'))
+SMTP_POOL_SIZE = int(os.environ.get('SMTP_POOL_SIZE', '2'))
+SMTP_DEADLINE = float(os.environ.get('SMTP_DEADLINE', '60'))  # whole send/batch, connect included
+# Circuit breaker: consecutive failures that open it, seconds before a probe is let through
+SMTP_BREAKER_THRESHOLD = int(os.environ.get('SMTP_BREAKER_THRESHOLD', '3'))
+SMTP_BREAKER_RESET = float(os.environ.get('SMTP_BREAKER_RESET', '60'))
+SEND_CUSTOMER_AUTOREPLY = os.environ.get('SEND_CUSTOMER_AUTOREPLY', 'false').lower() == 'true'
+
+# Admin Seeding (`python -m backend seed-admin`; never done at startup)
+ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@lsweb.com')
+ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', '')
+
+# Readiness probe: seconds /readyz waits for the storage backend
+READY_TIMEOUT = float(os.environ.get('READY_TIMEOUT', '2'))
+
+# Password Hashing Configuration
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', '16'))
+
+# Email Outbox Configuration
+OUTBOX_SQLITE_PATH = os.environ.get('OUTBOX_SQLITE_PATH', '')  # local stand-in for tests
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '5'))
+OUTBOX_POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL', '5'))
+OUTBOX_BASE_DELAY = float(os.environ.get('OUTBOX_BASE_DELAY', '30'))
+
+# Email Digest Configuration (admin notifications batched into one summary per window)
+EMAIL_DIGEST_ENABLED = os.environ.get('EMAIL_DIGEST_ENABLED', 'false').lower() == 'true'
+EMAIL_DIGEST_WINDOW = float(os.environ.get('EMAIL_DIGEST_WINDOW', '300'))
+EMAIL_DIGEST_MAX_ITEMS = int(os.environ.get('EMAIL_DIGEST_MAX_ITEMS', '25'))
+EMAIL_DIGEST_GRACE = float(os.environ.get('EMAIL_DIGEST_GRACE', '30'))  # longer than any storage write
+# Priority leads skip the digest: any of these project types, or a budget starting at this amount
+EMAIL_DIGEST_PRIORITY_PROJECT_TYPES = os.environ.get(
+    'EMAIL_DIGEST_PRIORITY_PROJECT_TYPES', 'sistema-ventas-bd,crm-personalizado,app-web'
+)
+EMAIL_DIGEST_PRIORITY_MIN_BUDGET = int(os.environ.get('EMAIL_DIGEST_PRIORITY_MIN_BUDGET', '5000'))
+
+# Idempotency Configuration (repeated submissions answer with the original id)
+IDEMPOTENCY_TTL = float(os.environ.get('IDEMPOTENCY_TTL', '600'))
+IDEMPOTENCY_MAX_KEYS = int(os.environ.get('IDEMPOTENCY_MAX_KEYS', '10000'))
+IDEMPOTENCY_SQLITE_PATH = os.environ.get('IDEMPOTENCY_SQLITE_PATH', '')  # shared by workers on one host
+
+# Dashboard List Cache (serialized pages, revalidated with ETag/If-None-Match; 0 bytes disables it)
+LIST_CACHE_MAX_BYTES = int(os.environ.get('LIST_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+LIST_CACHE_TTL = float(os.environ.get('LIST_CACHE_TTL', '5'))  # bounds staleness from writes in other workers
+
+# Rate Limiting Configuration ("<requests>/<seconds>" per client IP and route)
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+RATE_LIMIT_CONTACT = os.environ.get('RATE_LIMIT_CONTACT', '5/60')
+RATE_LIMIT_LOGIN = os.environ.get('RATE_LIMIT_LOGIN', '10/60')
+RATE_LIMIT_DEFAULT = os.environ.get('RATE_LIMIT_DEFAULT', '300/60')
+RATE_LIMIT_TRUST_PROXY = os.environ.get('RATE_LIMIT_TRUST_PROXY', 'false').lower() == 'true'
+# Reverse proxies in front of the app that append to X-Forwarded-For (with RATE_LIMIT_TRUST_PROXY)
+RATE_LIMIT_TRUSTED_PROXIES = int(os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', '1')) if RATE_LIMIT_TRUST_PROXY else 0
+RATE_LIMIT_SQLITE_PATH = os.environ.get('RATE_LIMIT_SQLITE_PATH', '')  # shared by workers on one host
+
+# Bulk status updates: ids accepted per PATCH /api/contact-requests/status
+BULK_STATUS_MAX_IDS = int(os.environ.get('BULK_STATUS_MAX_IDS', '10000'))
+
+# Live feed (GET /api/contact-requests/stream, server-sent events)
+# memory: inserts made by this worker; storage: every worker's, through the backend's change feed
+# (Mongo change stream, or Postgres LISTEN with SUPABASE_DB_URL)
+LIVE_FEED_SOURCE = os.environ.get('LIVE_FEED_SOURCE', 'memory')
+LIVE_HEARTBEAT = float(os.environ.get('LIVE_HEARTBEAT', '15'))
+LIVE_STREAM_MAX_AGE = float(os.environ.get('LIVE_STREAM_MAX_AGE', '60'))  # then the client reconnects
+LIVE_HISTORY = int(os.environ.get('LIVE_HISTORY', '1000'))  # events a reconnecting client can catch up on
+LIVE_QUEUE_SIZE = int(os.environ.get('LIVE_QUEUE_SIZE', '256'))  # events held for a slow client before dropping it
+# Older Last-Event-IDs are resumed from storage: at most this many rows, else the client reloads the list
+LIVE_RESUME_LIMIT = int(os.environ.get('LIVE_RESUME_LIMIT', '200'))
+LIVE_RESUME_SKEW = float(os.environ.get('LIVE_RESUME_SKEW', '5'))  # seconds re-read before the resume point
+
+# Metrics Configuration (Prometheus text format on /metrics)
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
 
 # Models
 class ContactRequestCreate(BaseModel):
@@ -78,6 +184,47 @@ class ContactRequest(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     status: str = Field(default="pending")
 
+class ContactRequestPage(BaseModel):
+    items: List[ContactRequest]
+    next_cursor: Optional[str] = None
+
+class ContactRequestSearchPage(BaseModel):
+    items: List[ContactRequest]
+    next_offset: Optional[int] = None
+
+class ContactRequestStats(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+    by_project_type: Dict[str, int]
+    by_day: Dict[str, int]
+
+class ContactRequestStatusUpdate(BaseModel):
+    ids: List[str]
+    status: str
+    # Optimistic concurrency: only rows still in this status change, the rest come back as conflicts
+    expected_status: Optional[str] = None
+
+    @validator('ids')
+    def validate_ids(cls, v):
+        if not 1 <= len(v) <= BULK_STATUS_MAX_IDS:
+            raise ValueError(f'Between 1 and {BULK_STATUS_MAX_IDS} ids are required')
+        return v
+
+    @validator('status', 'expected_status')
+    def validate_status(cls, v):
+        if v is not None and v not in CONTACT_REQUEST_STATUSES:
+            raise ValueError(f'Status must be one of: {", ".join(CONTACT_REQUEST_STATUSES)}')
+        return v
+
+class ContactRequestStatusResult(BaseModel):
+    id: str
+    result: str  # updated, unchanged, conflict or not_found
+    status: Optional[str] = None  # current status of the request
+
+class ContactRequestStatusUpdateResponse(BaseModel):
+    updated: int
+    results: List[ContactRequestStatusResult]
+
 class LoginRequest(BaseModel):
     email: EmailStr
     password: str = Field(..., min_length=6)
@@ -101,144 +248,336 @@ class User(BaseModel):
     role: str = Field(default="admin")
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
-# Email Templates
-EMAIL_TEMPLATE = """
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Nueva Solicitud de Web - LS WEB</title>
-    <style>
-        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
-        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
-        .header { background: linear-gradient(135deg, #3b82f6, #1d4ed8); color: white; padding: 20px; text-align: center; }
-        .content { background: #f8f9fa; padding: 30px; }
-        .field { margin-bottom: 15px; }
-        .label { font-weight: bold; color: #2563eb; }
-        .value { margin-left: 10px; }
-        .footer { text-align: center; padding: 20px; color: #666; font-size: 14px; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🌐 LS WEB - Nueva Solicitud</h1>
-            <p>Has recibido una nueva solicitud de web personalizada</p>
-        </div>
-        <div class="content">
-            <div class="field">
-                <span class="label">👤 Nombre:</span>
-                <span class="value">{{ name }}</span>
-            </div>
-            <div class="field">
-                <span class="label">📧 Email:</span>
-                <span class="value">{{ email }}</span>
-            </div>
-            {% if phone %}
-            <div class="field">
-                <span class="label">📱 Teléfono:</span>
-                <span class="value">{{ phone }}</span>
-            </div>
-            {% endif %}
-            {% if company %}
-            <div class="field">
-                <span class="label">🏢 Empresa:</span>
-                <span class="value">{{ company }}</span>
-            </div>
-            {% endif %}
-            <div class="field">
-                <span class="label">🎯 Tipo de Proyecto:</span>
-                <span class="value">
-                    {% if project_type == 'web-corporativa' %}Web Corporativa
-                    {% elif project_type == 'e-commerce' %}E-commerce
-                    {% elif project_type == 'sistema-ventas-bd' %}Sistema de Ventas y Base de Datos
-                    {% elif project_type == 'crm-personalizado' %}CRM Personalizado
-                    {% elif project_type == 'landing-page' %}Landing Page
-                    {% elif project_type == 'blog' %}Blog/Portfolio
-                    {% elif project_type == 'app-web' %}Aplicación Web
-                    {% elif project_type == 'marketing-digital' %}Marketing Digital
-                    {% elif project_type == 'community-management' %}Community Management
-                    {% else %}{{ project_type }}
-                    {% endif %}
-                </span>
-            </div>
-            {% if budget %}
-            <div class="field">
-                <span class="label">💰 Presupuesto:</span>
-                <span class="value">{{ budget }}</span>
-            </div>
-            {% endif %}
-            {% if timeline %}
-            <div class="field">
-                <span class="label">⏰ Tiempo de Entrega:</span>
-                <span class="value">{{ timeline }}</span>
-            </div>
-            {% endif %}
-            <div class="field">
-                <span class="label">📝 Descripción del Proyecto:</span>
-                <div style="background: white; padding: 15px; border-left: 4px solid #3b82f6; margin-top: 10px;">
-                    {{ description }}
-                </div>
-            </div>
-        </div>
-        <div class="footer">
-            <p><strong>LS WEB</strong> - Creando experiencias digitales excepcionales</p>
-            <p>Fecha: {{ created_at.strftime('%d/%m/%Y %H:%M') }}</p>
-        </div>
-    </div>
-</body>
-</html>
-"""
-
 # Utility Functions
+token_verifier = TokenVerifier(
+    parse_secrets(JWT_SECRET, JWT_PREVIOUS_SECRETS),
+    algorithm=JWT_ALGORITHM,
+    cache_size=JWT_CACHE_SIZE
+)
+bearer_scheme = HTTPBearer(auto_error=False)
+
 def create_jwt_token(user_email: str, user_role: str) -> str:
     payload = {
         "email": user_email,
         "role": user_role,
         "exp": datetime.utcnow() + timedelta(hours=JWT_EXPIRATION_HOURS)
     }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
-
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return token_verifier.encode(payload)
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+def upstream_unavailable(e: CircuitOpen) -> HTTPException:
+    """503 right away while a dependency's circuit breaker is open, instead of waiting on it"""
+    return HTTPException(
+        status_code=503,
+        detail="Servicio temporalmente no disponible, intenta nuevamente más tarde",
+        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+    )
 
-async def send_email(contact_data: dict) -> bool:
+async def require_admin(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> dict:
+    """Claims of a valid admin Bearer token; 401/403 otherwise"""
+    if credentials is None:
+        raise HTTPException(
+            status_code=401,
+            detail="No autorizado",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
     try:
-        # Create message
-        msg = email.mime.multipart.MimeMultipart('alternative')
-        msg['Subject'] = f"Nueva Solicitud de Web - {contact_data['name']}"
-        msg['From'] = SMTP_USER
-        msg['To'] = EMAIL_TO
-
-        # Render HTML template
-        template = Template(EMAIL_TEMPLATE)
-        html_content = template.render(**contact_data)
-        
-        # Create HTML part
-        html_part = email.mime.text.MimeText(html_content, 'html')
-        msg.attach(html_part)
-
-        # Send email
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-            server.starttls()
-            server.login(SMTP_USER, SMTP_PASSWORD)
-            server.send_message(msg)
-        
+        claims = token_verifier.verify(credentials.credentials)
+    except InvalidToken:
+        raise HTTPException(
+            status_code=401,
+            detail="Token inválido o expirado",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    if claims.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Acceso denegado")
+    return claims
+
+# bcrypt runs on its own bounded thread pool, never on the event loop
+password_hasher = PasswordHasher(max_workers=PASSWORD_HASH_WORKERS, max_queue=PASSWORD_HASH_QUEUE)
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
+
+async def seed_admin(email: str, password: str) -> bool:
+    """Create the admin user unless one with this email exists; True if created"""
+    if await storage.get_user_by_email(email):
+        return False
+    admin_user = User(
+        email=email,
+        password_hash=await hash_password(password),
+        role="admin"
+    )
+    await storage.insert_user(admin_user.dict())
+    return True
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await password_hasher.verify(password, hashed)
+
+# Holds non-priority admin notifications for the digest; None sends each one at once
+email_digest = DigestAssigner(
+    window=EMAIL_DIGEST_WINDOW,
+    max_items=EMAIL_DIGEST_MAX_ITEMS,
+    grace=EMAIL_DIGEST_GRACE
+) if EMAIL_DIGEST_ENABLED else None
+
+priority_project_types = {t.strip() for t in EMAIL_DIGEST_PRIORITY_PROJECT_TYPES.split(',') if t.strip()}
+
+def is_priority_lead(contact_data: dict) -> bool:
+    """Leads worth an immediate email: a priority project type or a large enough budget"""
+    if contact_data.get('project_type') in priority_project_types:
         return True
-    except Exception as e:
-        logging.error(f"Email sending failed: {str(e)}")
+    # The form sends ranges in USD: "500-1000", "1000-2500", "2500-5000", "5000+" or "por-definir";
+    # the lower bound decides, so the default 5000 only matches "5000+"
+    match = re.search(r'\d[\d,.]*', contact_data.get('budget') or '')
+    if match is None:
         return False
+    return int(re.sub(r'[,.]', '', match.group())) >= EMAIL_DIGEST_PRIORITY_MIN_BUDGET
+
+def render_email(contact_data: dict) -> List[dict]:
+    """Render the emails for a new contact request into outbox messages"""
+    if email_digest is not None and not is_priority_lead(contact_data):
+        # Only this lead's fragment; render_digest wraps the fragments of a whole digest
+        html, text = email_templates.render(email_templates.ADMIN_DIGEST_ITEM, contact_data)
+        messages = [email_digest.assign(new_outbox_message(
+            recipient=EMAIL_TO,
+            subject=f"Nueva Solicitud de Web - {contact_data['name']}",
+            html=html,
+            text=text,
+            reference_id=contact_data['id']
+        ))]
+    else:
+        html, text = email_templates.render(email_templates.ADMIN_NOTIFICATION, contact_data)
+        messages = [new_outbox_message(
+            recipient=EMAIL_TO,
+            subject=f"Nueva Solicitud de Web - {contact_data['name']}",
+            html=html,
+            text=text,
+            reference_id=contact_data['id']
+        )]
+    if SEND_CUSTOMER_AUTOREPLY:
+        html, text = email_templates.render(email_templates.CUSTOMER_AUTOREPLY, contact_data)
+        messages.append(new_outbox_message(
+            recipient=contact_data['email'],
+            subject="Recibimos tu solicitud - LS WEB",
+            html=html,
+            text=text,
+            reference_id=contact_data['id']
+        ))
+    return messages
+
+def render_digest(items: List[dict]) -> dict:
+    """Fold held admin notifications (oldest first) into one summary message"""
+    html, text = email_templates.render(email_templates.ADMIN_DIGEST, {
+        'items': items,
+        'first_at': items[0]['created_at'],
+        'last_at': items[-1]['created_at'],
+    })
+    return new_outbox_message(
+        recipient=items[0]['recipient'],
+        subject=f"Resumen de Solicitudes de Web - {len(items)} nuevas",
+        html=html,
+        text=text
+    )
+
+def build_message(message: dict) -> email.mime.multipart.MIMEMultipart:
+    msg = email.mime.multipart.MIMEMultipart('alternative')
+    # Stable per outbox row: a resend after a lost SMTP reply is recognisable as the same email
+    msg['Message-ID'] = f"<{message['id']}@lsweb.outbox>"
+    msg['Subject'] = message['subject']
+    msg['From'] = SMTP_USER
+    msg['To'] = message['recipient']
+    if message.get('text'):
+        msg.attach(email.mime.text.MIMEText(message['text'], 'plain'))
+    msg.attach(email.mime.text.MIMEText(message['html'], 'html'))
+    return msg
+
+# Authenticated SMTP sessions are kept open and shared by all sends
+smtp_pool = SMTPPool(
+    SMTP_HOST,
+    SMTP_PORT,
+    SMTP_USER,
+    SMTP_PASSWORD,
+    size=SMTP_POOL_SIZE,
+    start_tls=SMTP_STARTTLS,
+    timeout=SMTP_TIMEOUT,
+    deadline=SMTP_DEADLINE,
+    breaker=CircuitBreaker("smtp", failure_threshold=SMTP_BREAKER_THRESHOLD, reset_timeout=SMTP_BREAKER_RESET)
+)
+
+async def send_email(message: dict) -> None:
+    with metrics.stage_duration.time("smtp_send"):
+        await smtp_pool.send(build_message(message))
+
+async def send_emails(messages: List[dict]) -> List[Optional[Exception]]:
+    """Deliver a batch of outbox messages over a single SMTP session"""
+    with metrics.stage_duration.time("smtp_send_batch"):
+        return await smtp_pool.send_many([build_message(m) for m in messages])
+
+# Email outbox: handlers enqueue, the background worker delivers with retries
+outbox = OutboxWorker(
+    SQLiteOutboxStore(OUTBOX_SQLITE_PATH) if OUTBOX_SQLITE_PATH else storage.outbox_store(),
+    send_email,
+    send_batch=send_emails,
+    poll_interval=OUTBOX_POLL_INTERVAL,
+    max_attempts=OUTBOX_MAX_ATTEMPTS,
+    base_delay=OUTBOX_BASE_DELAY,
+    breaker=smtp_pool.breaker,
+    render_digest=render_digest
+)
+
+# Inserts go through the buffer when enabled; handlers still wait for their own row
+contact_writer = WriteBehindBuffer(
+    storage.insert_contact_requests,
+    max_rows=WRITE_BEHIND_MAX_ROWS,
+    max_delay=WRITE_BEHIND_MAX_DELAY_MS / 1000
+) if WRITE_BEHIND_ENABLED else None
+
+async def insert_contact_request(data: dict) -> None:
+    if contact_writer is not None:
+        await contact_writer.submit(data)
+    else:
+        await storage.insert_contact_request(data)
+
+async def replay_contact_requests(rows: List[dict]) -> List[Optional[Exception]]:
+    errors = await storage.insert_missing_contact_requests(rows)
+    list_cache.bump()
+    return errors
+
+# Opened at startup, so CLI commands importing this module leave the file alone
+contact_spool: Optional[ContactRequestSpool] = None
+spool_replayer: Optional[SpoolReplayer] = None
+
+def open_contact_spool() -> None:
+    global contact_spool, spool_replayer
+    if not CONTACT_SPOOL_PATH or contact_spool is not None:
+        return
+    contact_spool = ContactRequestSpool(CONTACT_SPOOL_PATH, grace=CONTACT_SPOOL_GRACE)
+    spool_replayer = SpoolReplayer(
+        contact_spool,
+        replay_contact_requests,
+        batch_size=CONTACT_SPOOL_BATCH,
+        interval=CONTACT_SPOOL_REPLAY_INTERVAL,
+        breaker=storage.breaker
+    )
+
+async def close_contact_spool() -> None:
+    global contact_spool, spool_replayer
+    if contact_spool is None:
+        return
+    await spool_replayer.stop()
+    contact_spool.close()
+    contact_spool = spool_replayer = None
+
+spooled_submissions = metrics.REGISTRY.counter(
+    "contact_spool_acknowledged_total", "Submissions acknowledged from the spool after the insert failed"
+)
+
+async def save_contact_request(data: dict) -> None:
+    if contact_spool is None:
+        await insert_contact_request(data)
+        return
+    # Durable before anything else: from here on the lead survives storage outages and crashes
+    await contact_spool.append(data)
+    try:
+        await insert_contact_request(data)
+    except Exception as e:
+        logging.warning(f"Contact request {data['id']} kept in the spool for replay: {e}")
+        spooled_submissions.inc()
+        return
+    contact_spool.forget(data['id'])
+
+idempotency = IdempotencyCache(
+    ttl=IDEMPOTENCY_TTL,
+    max_keys=IDEMPOTENCY_MAX_KEYS,
+    store=SQLiteIdempotencyStore(IDEMPOTENCY_SQLITE_PATH) if IDEMPOTENCY_SQLITE_PATH else None
+)
+idempotent_replays = metrics.REGISTRY.counter(
+    "idempotent_replays_total", "Contact submissions answered from the idempotency cache", ("source",)
+)
+
+# Bumped on every write to contact requests
+list_cache = ResponseCache(max_bytes=LIST_CACHE_MAX_BYTES, ttl=LIST_CACHE_TTL)
+list_cache_lookups = metrics.REGISTRY.counter(
+    "list_cache_lookups_total", "Dashboard list pages served from cache or storage", ("result",)
+)
+
+# New contact requests fanned out to dashboard streams
+live_broker = LiveBroker(history_size=LIVE_HISTORY, queue_size=LIVE_QUEUE_SIZE, heartbeat=LIVE_HEARTBEAT)
+if LIVE_FEED_SOURCE == 'storage':
+    if not storage.change_feed:
+        raise ValueError(f"LIVE_FEED_SOURCE=storage needs a change feed, which {storage.name} storage does not have "
+                         "(Supabase needs SUPABASE_DB_URL)")
+    live_feed = ChangeFeed(live_broker, storage.watch_contact_requests)
+elif LIVE_FEED_SOURCE == 'memory':
+    live_feed = MemoryFeed(live_broker)
+else:
+    raise ValueError(f"Unknown LIVE_FEED_SOURCE {LIVE_FEED_SOURCE!r}; expected memory or storage")
+
+# Pool and queue state, read at scrape time
+metrics.REGISTRY.gauge("password_hasher_in_flight", "bcrypt operations running or queued",
+                       lambda: password_hasher.in_flight)
+metrics.REGISTRY.gauge("password_hasher_capacity", "bcrypt operations accepted before rejecting as busy",
+                       lambda: password_hasher.max_workers + password_hasher.max_queue)
+metrics.REGISTRY.gauge("smtp_pool_sessions", "SMTP sessions by state",
+                       lambda: {("in_use",): smtp_pool.in_use, ("idle",): smtp_pool.idle}, ("state",))
+metrics.REGISTRY.counter_callback("smtp_pool_connections_opened_total", "SMTP connections opened",
+                                  lambda: smtp_pool.connections_opened)
+# Circuit breakers of the upstreams (SMTP relay, and Supabase when it is the storage)
+breakers = [smtp_pool.breaker] + ([storage.breaker] if storage.breaker is not None else [])
+metrics.REGISTRY.gauge("circuit_breaker_state", "Circuit breaker state per upstream (1 for the current one)",
+                       lambda: {(b.name, state): int(b.state == state) for b in breakers for state in STATES},
+                       ("upstream", "state"))
+metrics.REGISTRY.counter_callback("circuit_breaker_opened_total", "Times each circuit breaker opened",
+                                  lambda: {(b.name,): b.opened for b in breakers}, ("upstream",))
+metrics.REGISTRY.counter_callback("circuit_breaker_rejected_total", "Calls failed fast by an open circuit breaker",
+                                  lambda: {(b.name,): b.rejected for b in breakers}, ("upstream",))
+metrics.REGISTRY.gauge("idempotency_keys", "Submission keys remembered in this worker", lambda: len(idempotency))
+metrics.REGISTRY.gauge("write_behind_pending", "Contact requests buffered for the next bulk insert",
+                       lambda: contact_writer.pending if contact_writer else 0)
+metrics.REGISTRY.counter_callback("contact_spool_replays_total", "Spooled contact requests replayed into storage",
+                                  lambda: {("stored",): spool_replayer.replayed if spool_replayer else 0,
+                                           ("failed",): spool_replayer.failed if spool_replayer else 0},
+                                  ("result",))
+metrics.REGISTRY.gauge("list_cache_bytes", "Serialized list pages held in the cache", lambda: list_cache.size)
+metrics.REGISTRY.gauge("live_subscribers", "Open contact request streams", lambda: len(live_broker.subscribers))
+metrics.REGISTRY.counter_callback("live_events_published_total", "Contact requests fanned out to streams",
+                                  lambda: live_broker.published)
+metrics.REGISTRY.counter_callback("live_subscribers_dropped_total", "Streams closed for falling behind",
+                                  lambda: live_broker.dropped)
+metrics.REGISTRY.counter_callback("outbox_messages_total", "Outbox delivery outcomes",
+                                  lambda: {(result,): count for result, count in outbox.results.items()},
+                                  ("result",))
 
 # API Routes
 @api_router.get("/")
 async def root():
-    return {"message": "LS WEB API - Ready"}
+    return {"message": "LS WEB API - Ready", "storage": storage.name}
+
+async def store_contact_request(contact_obj: ContactRequest) -> None:
+    contact_data = contact_obj.dict()
+
+    # Save to database
+    with metrics.stage_duration.time("db_insert"):
+        await save_contact_request(contact_data)
+    list_cache.bump()
+    live_feed.publish(contact_data)
+    
+    # Queue notification email; the outbox worker sends it in the background
+    try:
+        with metrics.stage_duration.time("render_email"):
+            messages = render_email(contact_data)
+        with metrics.stage_duration.time("outbox_enqueue"):
+            for message in messages:
+                await outbox.enqueue(message)
+    except Exception as e:
+        logging.warning(f"Failed to queue email for request {contact_obj.id}: {e}")
 
 @api_router.post("/contact-request", response_model=ContactRequestResponse)
-async def create_contact_request(contact_data: ContactRequestCreate):
+async def create_contact_request(
+    contact_data: ContactRequestCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
+):
     try:
         # Create contact request object
         contact_dict = contact_data.dict()
@@ -246,23 +585,29 @@ async def create_contact_request(contact_data: ContactRequestCreate):
         
         contact_obj = ContactRequest(**contact_dict)
         
-        # Save to database
-        await db.contact_requests.insert_one(contact_obj.dict())
-        
-        # Send email
-        email_data = contact_obj.dict()
-        email_sent = await send_email(email_data)
-        
-        if not email_sent:
-            logging.warning(f"Email failed to send for request {contact_obj.id}")
-            # Still return success since the request was saved
+        # Double clicks and client retries get the original id without a second insert or email
+        key = f"key:{idempotency_key}" if idempotency_key else fingerprint(
+            contact_obj.email, contact_obj.description, contact_obj.project_type
+        )
+        request_id, replayed = await idempotency.run(key, contact_obj.id, lambda: store_contact_request(contact_obj))
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+            idempotent_replays.inc("header" if idempotency_key else "fingerprint")
         
         return ContactRequestResponse(
             success=True,
             message="Solicitud enviada exitosamente. Te contactaremos pronto.",
-            id=contact_obj.id
+            id=request_id
         )
         
+    except IdempotencyConflict:
+        raise HTTPException(
+            status_code=409,
+            detail="La solicitud original todavía se está procesando",
+            headers={"Retry-After": "1"}
+        )
+    except CircuitOpen as e:
+        raise upstream_unavailable(e)
     except Exception as e:
         logging.error(f"Contact request creation failed: {str(e)}")
         raise HTTPException(
@@ -274,7 +619,8 @@ async def create_contact_request(contact_data: ContactRequestCreate):
 async def login(login_data: LoginRequest):
     try:
         # Find user in database
-        user_doc = await db.users.find_one({"email": login_data.email})
+        with metrics.stage_duration.time("get_user"):
+            user_doc = await storage.get_user_by_email(login_data.email)
         
         if not user_doc:
             return LoginResponse(
@@ -283,7 +629,9 @@ async def login(login_data: LoginRequest):
             )
         
         # Verify password
-        if not verify_password(login_data.password, user_doc['password_hash']):
+        with metrics.stage_duration.time("verify_password"):
+            valid = await verify_password(login_data.password, user_doc['password_hash'])
+        if not valid:
             return LoginResponse(
                 success=False,
                 message="Credenciales inválidas"
@@ -302,6 +650,14 @@ async def login(login_data: LoginRequest):
             }
         )
         
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Servidor ocupado, intenta nuevamente en unos segundos",
+            headers={"Retry-After": "1"}
+        )
+    except CircuitOpen as e:
+        raise upstream_unavailable(e)
     except Exception as e:
         logging.error(f"Login failed: {str(e)}")
         raise HTTPException(
@@ -309,47 +665,248 @@ async def login(login_data: LoginRequest):
             detail="Error interno del servidor"
         )
 
-@api_router.get("/contact-requests", response_model=List[ContactRequest])
-async def get_contact_requests():
+def contact_requests_filters(status: Optional[str] = None, project_type: Optional[str] = None,
+                             created_from: Optional[datetime] = None, created_to: Optional[datetime] = None) -> dict:
+    return {
+        "status": status,
+        "project_type": project_type,
+        "created_from": created_from,
+        "created_to": created_to
+    }
+
+@api_router.get("/contact-requests", response_model=ContactRequestPage)
+async def get_contact_requests(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    project_type: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    _admin: dict = Depends(require_admin)
+):
+    cache_key = (limit, cursor, status, project_type, created_from, created_to)
+    cached = list_cache.get(cache_key)
+    if cached is not None:
+        list_cache_lookups.inc("hit")
+        etag, body = cached
+    else:
+        after = None
+        if cursor:
+            try:
+                after = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Cursor inválido")
+
+        try:
+            version = list_cache.version
+            items, next_cursor = await storage.page_contact_requests(
+                limit,
+                after,
+                contact_requests_filters(status, project_type, created_from, created_to)
+            )
+        except CircuitOpen as e:
+            raise upstream_unavailable(e)
+        except Exception as e:
+            logging.error(f"Failed to fetch contact requests: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail="Error interno del servidor"
+            )
+        list_cache_lookups.inc("miss")
+        # Rows from our own storage already have exactly the ContactRequest fields;
+        # serialize them as-is instead of rebuilding and re-validating models
+        body = orjson.dumps({"items": items, "next_cursor": next_cursor})
+        etag = list_cache.put(cache_key, version, body)
+
+    # no-cache: clients may keep the page but must revalidate it every time
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@api_router.get("/contact-requests/search", response_model=ContactRequestSearchPage)
+async def search_contact_requests(
+    q: str = Query(..., min_length=2, max_length=200),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET),
+    _admin: dict = Depends(require_admin)
+):
+    terms = search_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="La búsqueda debe contener al menos una palabra")
     try:
-        requests = await db.contact_requests.find().sort("created_at", -1).to_list(100)
-        return [ContactRequest(**request) for request in requests]
+        items, next_offset = await storage.search_contact_requests(terms, limit, offset)
+    except CircuitOpen as e:
+        raise upstream_unavailable(e)
     except Exception as e:
-        logging.error(f"Failed to fetch contact requests: {str(e)}")
+        logging.error(f"Failed to search contact requests: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail="Error interno del servidor"
         )
+    return Response(
+        content=orjson.dumps({"items": items, "next_offset": next_offset}),
+        media_type="application/json"
+    )
 
-# Initialize default admin user
-@api_router.post("/init-admin")
-async def initialize_admin():
+@api_router.get("/contact-requests/stats", response_model=ContactRequestStats)
+async def get_contact_request_stats(_admin: dict = Depends(require_admin)):
+    # Read from counters maintained on write: cost does not grow with the table
     try:
-        # Check if admin already exists
-        existing_admin = await db.users.find_one({"email": "admin@lsweb.com"})
-        if existing_admin:
-            return {"message": "Admin user already exists"}
-        
-        # Create default admin
-        admin_user = User(
-            email="admin@lsweb.com",
-            password_hash=hash_password("admin123"),
-            role="admin"
+        return await storage.contact_request_stats()
+    except CircuitOpen as e:
+        raise upstream_unavailable(e)
+    except Exception as e:
+        logging.error(f"Failed to fetch contact request stats: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Error interno del servidor"
         )
-        
-        await db.users.insert_one(admin_user.dict())
-        return {"message": "Admin user created successfully"}
-        
+
+@api_router.patch("/contact-requests/status", response_model=ContactRequestStatusUpdateResponse)
+async def update_contact_request_statuses(update: ContactRequestStatusUpdate, admin: dict = Depends(require_admin)):
+    ids, invalid = [], []
+    for request_id in update.ids:
+        try:
+            # Canonical form, as stored and as PostgREST returns uuids
+            ids.append(str(uuid.UUID(request_id)))
+        except ValueError:
+            invalid.append(request_id)
+    ids = list(dict.fromkeys(ids))
+
+    try:
+        outcomes = await storage.update_contact_request_statuses(ids, update.status, update.expected_status) if ids else {}
+    except CircuitOpen as e:
+        raise upstream_unavailable(e)
     except Exception as e:
-        logging.error(f"Admin initialization failed: {str(e)}")
+        # Writes already made stay; a retry reports them as unchanged
+        logging.error(f"Failed to update contact request statuses: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail="Error interno del servidor"
         )
 
+    results = [{"id": request_id, "result": result, "status": status} for request_id, (result, status) in outcomes.items()]
+    results.extend({"id": request_id, "result": STATUS_NOT_FOUND, "status": None} for request_id in invalid)
+    updated = sum(1 for item in results if item["result"] == STATUS_UPDATED)
+    if updated:
+        list_cache.bump()
+    logging.info(f"{admin.get('email')} set {updated} of {len(results)} contact requests to {update.status}")
+    return Response(
+        content=orjson.dumps({"updated": updated, "results": results}),
+        media_type="application/json"
+    )
+
+async def live_backlog(last_event_id: str) -> list:
+    """Events a reconnecting client missed: from this worker's history, else re-read from storage"""
+    try:
+        cursor = decode_cursor(last_event_id)
+    except ValueError:
+        return [(None, RESET)]
+    backlog = live_broker.since(cursor[1])
+    if backlog is not None:
+        return backlog
+    # Older than the history, or streamed by another worker. Rows from just
+    # before the resume point are re-sent; clients merge events by id
+    rows, next_cursor = await storage.page_contact_requests(
+        LIVE_RESUME_LIMIT,
+        None,
+        contact_requests_filters(created_from=resume_window(cursor, LIVE_RESUME_SKEW))
+    )
+    if next_cursor is not None:
+        return [(None, RESET)]
+    return [(row['id'], format_event(row)) for row in reversed(rows) if row['id'] != cursor[1]]
+
+@api_router.get("/contact-requests/stream")
+async def stream_contact_requests(
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID", max_length=512),
+    _admin: dict = Depends(require_admin)
+):
+    # Subscribe before reading the backlog, so nothing published meanwhile is missed
+    subscription = live_broker.subscribe()
+    try:
+        backlog = await live_backlog(last_event_id) if last_event_id else []
+    except CircuitOpen as e:
+        live_broker.unsubscribe(subscription)
+        raise upstream_unavailable(e)
+    except Exception as e:
+        live_broker.unsubscribe(subscription)
+        logging.error(f"Failed to resume contact request stream: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Error interno del servidor"
+        )
+    return StreamingResponse(
+        stream_events(live_broker, subscription, backlog, max_age=LIVE_STREAM_MAX_AGE),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: nginx would otherwise hold events back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/contact-requests/export")
+async def export_contact_requests(
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    compress: bool = Query(False, alias="gzip"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    _admin: dict = Depends(require_admin)
+):
+    # Rows are streamed straight from the backend, never held in memory
+    rows = storage.iter_contact_requests(
+        contact_requests_filters(created_from=created_from, created_to=created_to)
+    )
+    return StreamingResponse(
+        export_stream(rows, fmt, compress),
+        media_type="application/gzip" if compress else MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(fmt, compress)}"'}
+    )
+
 # Include the router in the main app
 app.include_router(api_router)
 
+# Liveness: the process serves requests. Readiness: it can also reach its storage.
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    try:
+        await asyncio.wait_for(storage.ping(), READY_TIMEOUT)
+    except Exception as e:
+        logging.warning(f"Readiness check failed: {e!r}")
+        return ORJSONResponse({"status": "unavailable", "storage": storage.name}, status_code=503)
+    return {"status": "ready", "storage": storage.name}
+
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+# Inside CORS, so browsers can read the 429
+if RATE_LIMIT_ENABLED:
+    rate_limit_rules = {
+        ("POST", "/api/contact-request"): Rule.parse("contact", RATE_LIMIT_CONTACT),
+        ("POST", "/api/login"): Rule.parse("login", RATE_LIMIT_LOGIN),
+    }
+    rate_limit_default = Rule.parse("api", RATE_LIMIT_DEFAULT)
+    # Buckets idle for a full period are full again, so dropping them loses nothing
+    rate_limit_idle = max(rule.period for rule in [rate_limit_default, *rate_limit_rules.values()])
+    rate_limit_store = (SQLiteBucketStore(RATE_LIMIT_SQLITE_PATH, idle_ttl=rate_limit_idle)
+                        if RATE_LIMIT_SQLITE_PATH else MemoryBucketStore(idle_ttl=rate_limit_idle))
+    rate_limited = metrics.REGISTRY.counter(
+        "rate_limited_total", "Requests rejected with 429 by the rate limiter", ("rule",)
+    )
+    app.add_middleware(
+        RateLimitMiddleware,
+        store=rate_limit_store,
+        rules=rate_limit_rules,
+        default=rate_limit_default,
+        trusted_proxies=RATE_LIMIT_TRUSTED_PROXIES,
+        on_reject=lambda rule: rate_limited.inc(rule.name),
+    )
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -359,6 +916,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so CORS preflights are counted too
+if METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -368,21 +929,27 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("startup")
 async def startup_event():
-    logger.info("LS WEB API Starting up...")
-    # Initialize admin user on startup
-    try:
-        existing_admin = await db.users.find_one({"email": "admin@lsweb.com"})
-        if not existing_admin:
-            admin_user = User(
-                email="admin@lsweb.com",
-                password_hash=hash_password("admin123"),
-                role="admin"
-            )
-            await db.users.insert_one(admin_user.dict())
-            logger.info("Default admin user created")
-    except Exception as e:
-        logger.error(f"Failed to initialize admin: {e}")
+    # No I/O here: clients connect on first use, the admin is seeded with `python -m backend seed-admin`
+    logger.info(f"LS WEB API Starting up ({storage.name} storage)...")
+    await storage.connect()
+    outbox.start()
+    live_broker.start()
+    live_feed.start()
+    open_contact_spool()
+    if spool_replayer is not None:
+        spool_replayer.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    await live_feed.stop()
+    await live_broker.stop()
+    # Flush buffered inserts before the storage client goes away
+    if contact_writer is not None:
+        await contact_writer.close()
+    await close_contact_spool()
+    await outbox.stop()
+    await smtp_pool.close()
+    password_hasher.shutdown()
+    if RATE_LIMIT_ENABLED and isinstance(rate_limit_store, SQLiteBucketStore):
+        rate_limit_store.close()
+    await storage.close()
\ No newline at end of file
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from email.message import Message
+from typing import List, Optional
+
+import aiosmtplib
+
+from resilience import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+# Errors after which a session can no longer be trusted
+CONNECTION_ERRORS = (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError,
+                     aiosmtplib.SMTPTimeoutError, ConnectionError, OSError)
+# Refusals of one message (recipient, sender, content): the relay itself is working
+MESSAGE_ERRORS = (aiosmtplib.SMTPRecipientsRefused, aiosmtplib.SMTPRecipientRefused,
+                  aiosmtplib.SMTPSenderRefused, aiosmtplib.SMTPDataError)
+
+
+def relay_failure(error: Exception) -> bool:
+    """Whether an error counts against the relay: anything but a single message's refusal,
+    or a 421 (service not available), whatever command it answered"""
+    return not isinstance(error, MESSAGE_ERRORS) or getattr(error, "code", None) == 421
+
+
+class _Session:
+    def __init__(self, client: aiosmtplib.SMTP):
+        self.client = client
+        self.last_used = time.monotonic()
+        self.sent = 0
+
+
+class SMTPPool:
+    """Pool of authenticated SMTP sessions.
+
+    Sessions are reused across messages instead of paying TCP + STARTTLS + AUTH
+    for every email. An idle session is probed with NOOP before reuse, dropped
+    once it has been idle for `max_idle` seconds or carried `max_messages`
+    messages, and reconnected transparently when the server hangs up.
+
+    Each send/send_many call must finish within `deadline` seconds and goes
+    through `breaker`: connection failures, timeouts and a relay refusing
+    the session count against it, per-message rejections do not. While it
+    is open, calls raise resilience.CircuitOpen without touching the network.
+    """
+
+    def __init__(self, host: str, port: int, username: str = "", password: str = "", *,
+                 size: int = 2, start_tls: bool = True, timeout: float = 30.0,
+                 noop_after: float = 30.0, max_idle: float = 240.0, max_messages: int = 100,
+                 deadline: float = 60.0, breaker: Optional[CircuitBreaker] = None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.start_tls = start_tls
+        self.timeout = timeout
+        self.noop_after = noop_after
+        self.max_idle = max_idle
+        self.max_messages = max_messages
+        self.deadline = deadline
+        self.breaker = breaker or CircuitBreaker("smtp")
+        self._idle: List[_Session] = []
+        self._slots = asyncio.Semaphore(size)
+        self.connections_opened = 0
+        self.in_use = 0
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    async def _connect(self) -> _Session:
+        client = aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            username=self.username or None,
+            password=self.password or None,
+            start_tls=self.start_tls,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        self.connections_opened += 1
+        return _Session(client)
+
+    @staticmethod
+    async def _discard(session: _Session) -> None:
+        try:
+            if session.client.is_connected:
+                await session.client.quit()
+        except Exception:
+            session.client.close()
+
+    async def _healthy(self, session: _Session) -> bool:
+        idle = time.monotonic() - session.last_used
+        if not session.client.is_connected or idle > self.max_idle or session.sent >= self.max_messages:
+            return False
+        if idle > self.noop_after:
+            try:
+                await session.client.noop()
+            except Exception:
+                return False
+        return True
+
+    async def _checkout(self) -> _Session:
+        while self._idle:
+            session = self._idle.pop()
+            if await self._healthy(session):
+                return session
+            await self._discard(session)
+        return await self._connect()
+
+    @asynccontextmanager
+    async def session(self):
+        """Borrow a connected session; it goes back to the pool unless it broke"""
+        async with self._slots:
+            session = await self._checkout()
+            self.in_use += 1
+            try:
+                yield session
+            except BaseException:
+                await self._discard(session)
+                raise
+            else:
+                session.last_used = time.monotonic()
+                self._idle.append(session)
+            finally:
+                self.in_use -= 1
+
+    async def _send(self, session: _Session, message: Message) -> None:
+        try:
+            await session.client.send_message(message)
+        except CONNECTION_ERRORS as e:
+            # Stale connection: reconnect once and retry on a fresh session
+            logger.info(f"SMTP session dropped ({e}), reconnecting")
+            await self._discard(session)
+            fresh = await self._connect()
+            session.client = fresh.client
+            session.sent = 0
+            await session.client.send_message(message)
+        session.sent += 1
+
+    async def _send_one(self, message: Message) -> None:
+        async with self.session() as session:
+            await self._send(session, message)
+
+    async def send(self, message: Message) -> None:
+        async with self.breaker.guard(is_failure=relay_failure):
+            await asyncio.wait_for(self._send_one(message), self.deadline)
+
+    async def send_many(self, messages: List[Message]) -> List[Optional[Exception]]:
+        """Send messages over one session, returning the error (or None) for each"""
+        self.breaker.acquire()
+        success = None
+        try:
+            results = await asyncio.wait_for(self._send_many(messages), self.deadline)
+            success = not any(relay_failure(error) for error in results if error is not None)
+            return results
+        except Exception:
+            success = False
+            raise
+        finally:
+            self.breaker.release(success)
+
+    async def _send_many(self, messages: List[Message]) -> List[Optional[Exception]]:
+        results: List[Optional[Exception]] = []
+        async with self.session() as session:
+            for message in messages:
+                try:
+                    await self._send(session, message)
+                    results.append(None)
+                except CONNECTION_ERRORS as e:
+                    # The relay is unreachable: fail what is left of the batch and
+                    # let the closed session be discarded on the next checkout
+                    session.client.close()
+                    results.extend([e] * (len(messages) - len(results)))
+                    break
+                except aiosmtplib.SMTPException as e:
+                    # Recipient/data errors only affect this message
+                    results.append(e)
+                    await session.client.rset()
+        return results
+
+    async def close(self) -> None:
+        while self._idle:
+            await self._discard(self._idle.pop())
@@ -0,0 +1,220 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional, Set
+
+from resilience import OPEN, CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+
+class ContactRequestSpool:
+    """Local write-ahead journal of accepted contact requests.
+
+    `append` returns once the row is fsync'd to a SQLite WAL file (synchronous
+    = FULL), so a submission acknowledged after it survives an upstream outage
+    and a crash of the process. Rows become due for replay `grace` seconds
+    after they were appended, which leaves time for the caller's own insert;
+    rows the caller did store are marked with `forget` and deleted in
+    batches. A forget lost in a crash only costs a harmless replay, since
+    replays skip ids that are already stored.
+
+    Several workers on one host may share the file; a row replayed by two of
+    them is still stored once.
+    """
+
+    def __init__(self, path: str, grace: float = 30.0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.grace = timedelta(seconds=grace)
+        self._forgotten: Set[str] = set()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS contact_request_spool (
+                id TEXT PRIMARY KEY,
+                row TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                next_attempt_at TEXT NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_contact_request_spool_due ON contact_request_spool(next_attempt_at)"
+        )
+
+    def _run(self, fn, *args):
+        def locked():
+            with self._lock:
+                return fn(*args)
+        return asyncio.to_thread(locked)
+
+    @staticmethod
+    def _dump(row: dict) -> str:
+        return json.dumps({k: v.isoformat() if isinstance(v, datetime) else v for k, v in row.items()})
+
+    @staticmethod
+    def _load(data: str) -> dict:
+        row = json.loads(data)
+        row["created_at"] = datetime.fromisoformat(row["created_at"])
+        return row
+
+    def _append(self, row: dict, due_at: datetime) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO contact_request_spool (id, row, next_attempt_at) VALUES (?, ?, ?)",
+            (row["id"], self._dump(row), due_at.isoformat()),
+        )
+
+    def _due(self, now: datetime, limit: int) -> List[dict]:
+        rows = self._conn.execute(
+            "SELECT id, row, attempts FROM contact_request_spool WHERE next_attempt_at <= ? "
+            "ORDER BY next_attempt_at LIMIT ?",
+            (now.isoformat(), limit + len(self._forgotten)),
+        ).fetchall()
+        due = []
+        for row_id, data, attempts in rows:
+            if row_id not in self._forgotten:
+                due.append({"row": self._load(data), "attempts": attempts})
+        return due[:limit]
+
+    def _delete(self, ids: List[str]) -> None:
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany("DELETE FROM contact_request_spool WHERE id = ?", [(i,) for i in ids])
+        finally:
+            self._conn.execute("COMMIT")
+
+    def _mark_failed(self, row_id: str, error: str, next_attempt_at: datetime) -> None:
+        self._conn.execute(
+            "UPDATE contact_request_spool SET attempts = attempts + 1, last_error = ?, next_attempt_at = ? "
+            "WHERE id = ?",
+            (error, next_attempt_at.isoformat(), row_id),
+        )
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM contact_request_spool").fetchone()[0]
+
+    async def append(self, row: dict) -> None:
+        """Durably record a row before it is acknowledged"""
+        await self._run(self._append, row, datetime.utcnow() + self.grace)
+
+    def forget(self, row_id: str) -> None:
+        """The row was stored by its submitter; drop it from the spool at the next flush"""
+        self._forgotten.add(row_id)
+
+    async def flush(self) -> None:
+        """Delete forgotten rows in one transaction"""
+        if self._forgotten:
+            ids = list(self._forgotten)
+            await self._run(self._delete, ids)
+            self._forgotten.difference_update(ids)
+
+    async def due(self, now: datetime, limit: int) -> List[dict]:
+        """Up to `limit` rows due for replay, each as {"row": ..., "attempts": ...}"""
+        return await self._run(self._due, now, limit)
+
+    async def remove(self, ids: List[str]) -> None:
+        if ids:
+            await self._run(self._delete, ids)
+
+    async def mark_failed(self, row_id: str, error: str, next_attempt_at: datetime) -> None:
+        await self._run(self._mark_failed, row_id, error, next_attempt_at)
+
+    async def count(self) -> int:
+        """Rows still waiting, forgotten ones included until the next flush"""
+        return await self._run(self._count)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SpoolReplayer:
+    """Background worker that drains a ContactRequestSpool into the storage backend.
+
+    Due rows go out in batches of `batch_size` through `write_many` (the
+    storage's insert_missing_contact_requests), which returns one exception or
+    None per row. Stored rows leave the spool; failed ones are retried with
+    exponential backoff, without limit: a spooled lead is never dropped. While
+    `breaker` (the backend's circuit breaker) is open nothing is attempted.
+    """
+
+    def __init__(self, spool: ContactRequestSpool,
+                 write_many: Callable[[List[dict]], Awaitable[List[Optional[Exception]]]], *,
+                 batch_size: int = 100, interval: float = 5.0, base_delay: float = 5.0, max_delay: float = 300.0,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.spool = spool
+        self.write_many = write_many
+        self.batch_size = batch_size
+        self.interval = interval
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+        self.replayed = 0
+        self.failed = 0
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def backoff(self, attempts: int) -> timedelta:
+        return timedelta(seconds=min(self.max_delay, self.base_delay * 2 ** attempts))
+
+    async def run_once(self) -> int:
+        """Replay one batch of due rows and return how many were attempted"""
+        await self.spool.flush()
+        if self.breaker is not None and self.breaker.state == OPEN:
+            return 0
+        now = datetime.utcnow()
+        entries = await self.spool.due(now, self.batch_size)
+        if not entries:
+            return 0
+        rows = [entry["row"] for entry in entries]
+        try:
+            errors = await self.write_many(rows)
+        except Exception as e:
+            errors = [e] * len(rows)
+        await self.spool.remove([row["id"] for row, error in zip(rows, errors) if error is None])
+        for entry, error in zip(entries, errors):
+            if error is None:
+                self.replayed += 1
+                continue
+            self.failed += 1
+            row_id = entry["row"]["id"]
+            logger.warning(f"Spooled contact request {row_id} not stored yet "
+                           f"(attempt {entry['attempts'] + 1}): {error}")
+            await self.spool.mark_failed(row_id, str(error), now + self.backoff(entry["attempts"]))
+        return len(rows)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                if await self.run_once() == self.batch_size:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Spool replay iteration failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._stopping = True
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Forgotten rows that were stored need no replay on the next start
+        await self.spool.flush()
@@ -0,0 +1,26 @@
+"""Pluggable persistence for the API; pick one with STORAGE_BACKEND"""
+from storage.base import (CONTACT_REQUEST_STATUSES, STATUS_CONFLICT, STATUS_NOT_FOUND, STATUS_UNCHANGED, STATUS_UPDATED,
+                          Storage, StorageError, search_terms)
+from storage.write_behind import WriteBehindBuffer
+
+BACKENDS = ("mongo", "supabase", "sqlite")
+
+
+def create_storage(backend: str) -> Storage:
+    """Build the configured backend from env; imports are lazy so each only needs its own driver"""
+    if backend == "mongo":
+        from storage.mongo import MongoStorage
+        return MongoStorage.from_env()
+    if backend == "supabase":
+        from storage.supabase import SupabaseStorage
+        return SupabaseStorage.from_env()
+    if backend == "sqlite":
+        from storage.sqlite import SQLiteStorage
+        return SQLiteStorage.from_env()
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}")
+
+
+__all__ = [
+    "BACKENDS", "CONTACT_REQUEST_STATUSES", "STATUS_CONFLICT", "STATUS_NOT_FOUND", "STATUS_UNCHANGED", "STATUS_UPDATED",
+    "Storage", "StorageError", "WriteBehindBuffer", "create_storage", "search_terms",
+]
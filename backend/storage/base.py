@@ -0,0 +1,199 @@
+import re
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from pagination import decode_cursor
+
+# Cursor as decoded by pagination.decode_cursor: (created_at ISO string, id)
+Cursor = Tuple[str, str]
+
+# Every backend returns contact request rows with exactly these keys (the ContactRequest fields)
+CONTACT_REQUEST_FIELDS = ("id", "name", "email", "phone", "company", "project_type", "budget",
+                          "timeline", "description", "created_at", "status")
+
+
+CONTACT_REQUEST_STATUSES = ("pending", "contacted", "completed")
+
+# Per-id outcomes of a bulk status update
+STATUS_UPDATED = "updated"
+STATUS_UNCHANGED = "unchanged"  # already had the target status
+STATUS_CONFLICT = "conflict"  # current status is not the expected one
+STATUS_NOT_FOUND = "not_found"
+
+# Cap on the words of a search query; each one is an index lookup
+MAX_SEARCH_TERMS = 16
+
+
+class StorageError(Exception):
+    """Raised when the backing store rejects or fails an operation"""
+
+
+def as_utc_naive(value: datetime) -> datetime:
+    """Normalize a datetime to naive UTC, the representation every backend stores"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def contact_request_stat_keys(row: dict) -> List[Tuple[str, str]]:
+    """(dimension, value) counters one contact request counts towards; "day" is its UTC date"""
+    created_at = row["created_at"]
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    return [
+        ("total", ""),
+        ("status", row["status"]),
+        ("project_type", row["project_type"]),
+        ("day", as_utc_naive(created_at).date().isoformat()),
+    ]
+
+
+def stats_from_counts(counts: Iterable[Tuple[str, str, int]]) -> dict:
+    """Shape (dimension, value, count) counters as the stats response, dropping zeros"""
+    stats = {"total": 0, "by_status": {}, "by_project_type": {}, "by_day": {}}
+    for dimension, value, count in counts:
+        if dimension == "total":
+            stats["total"] = count
+        elif count:
+            stats[f"by_{dimension}"][value] = count
+    stats["by_day"] = dict(sorted(stats["by_day"].items()))
+    return stats
+
+
+def search_terms(query: str) -> List[str]:
+    """Lowercased distinct words of a search query, in order; punctuation and operators are dropped"""
+    terms = []
+    for word in re.findall(r"\w+", query.lower()):
+        if word not in terms:
+            terms.append(word)
+    return terms[:MAX_SEARCH_TERMS]
+
+
+def plan_status_update(current: Dict[str, str], ids: List[str], status: str,
+                       expected_status: Optional[str]) -> Tuple[Dict[str, Tuple[str, Optional[str]]], Dict[str, List[str]]]:
+    """Split a bulk status update given the current status of each existing id.
+
+    Returns the outcome and resulting status of every id, as they will be if
+    the writes apply, and the ids to write grouped by their current status so
+    each write can be conditioned on it.
+    """
+    outcomes, writes = {}, {}
+    for request_id in ids:
+        before = current.get(request_id)
+        if before is None:
+            outcomes[request_id] = (STATUS_NOT_FOUND, None)
+        elif before == status:
+            outcomes[request_id] = (STATUS_UNCHANGED, before)
+        elif expected_status is not None and before != expected_status:
+            outcomes[request_id] = (STATUS_CONFLICT, before)
+        else:
+            outcomes[request_id] = (STATUS_UPDATED, status)
+            writes.setdefault(before, []).append(request_id)
+    return outcomes, writes
+
+
+class Storage(ABC):
+    """Persistence interface the API is written against.
+
+    Contact request rows are plain dicts with the CONTACT_REQUEST_FIELDS keys
+    and `created_at` as a naive UTC datetime, ready to serialize as-is. `filters` is a dict with any of status,
+    project_type, created_from and created_to (created_to is exclusive).
+    """
+
+    name = "base"
+    # resilience.CircuitBreaker guarding the backend's upstream, for backends that have one
+    breaker = None
+    # Whether watch_contact_requests works, i.e. inserts by other workers can be followed
+    change_feed = False
+
+    async def connect(self) -> None:
+        """Open clients/pools; called once at startup"""
+
+    async def close(self) -> None:
+        """Release clients/pools; called once at shutdown"""
+
+    @abstractmethod
+    async def ping(self) -> None:
+        """One cheap round trip; raises if the backend is unreachable"""
+
+    @abstractmethod
+    async def insert_contact_request(self, data: dict) -> None:
+        ...
+
+    async def insert_contact_requests(self, rows: List[dict]) -> List[Optional[Exception]]:
+        """Insert several rows; returns one exception (or None) per row, in order"""
+        results: List[Optional[Exception]] = []
+        for row in rows:
+            try:
+                await self.insert_contact_request(row)
+                results.append(None)
+            except Exception as e:
+                results.append(e)
+        return results
+
+    @abstractmethod
+    async def insert_missing_contact_requests(self, rows: List[dict]) -> List[Optional[Exception]]:
+        """Like insert_contact_requests, but a row whose id is already stored counts as written
+        and is left untouched; used to replay rows that may or may not have been inserted"""
+
+    @abstractmethod
+    async def page_contact_requests(self, limit: int, cursor: Optional[Cursor] = None,
+                                    filters: Optional[dict] = None) -> Tuple[List[dict], Optional[str]]:
+        """Newest-first page of at most `limit` rows and the cursor of the next page"""
+
+    async def iter_contact_requests(self, filters: Optional[dict] = None,
+                                    page_size: int = 1000) -> AsyncIterator[dict]:
+        """Yield every matching row, newest first, without loading them all at once"""
+        cursor = None
+        while True:
+            rows, next_cursor = await self.page_contact_requests(page_size, cursor, filters)
+            for row in rows:
+                yield row
+            if next_cursor is None:
+                return
+            cursor = decode_cursor(next_cursor)
+
+    def watch_contact_requests(self) -> AsyncIterator[dict]:
+        """Rows inserted by any worker, as they are inserted, until the feed breaks (then it raises)"""
+        raise NotImplementedError(f"{self.name} storage has no change feed")
+
+    @abstractmethod
+    async def search_contact_requests(self, terms: List[str], limit: int,
+                                      offset: int = 0) -> Tuple[List[dict], Optional[int]]:
+        """Rows matching any of `terms` in name, company or description, best match first (ties newest
+        first), from a full-text index; returns at most `limit` rows and the offset of the next page"""
+
+    @abstractmethod
+    async def update_contact_request_status(self, request_id: str, status: str) -> bool:
+        """Set the status of one request; False if it does not exist"""
+
+    @abstractmethod
+    async def update_contact_request_statuses(self, ids: List[str], status: str,
+                                              expected_status: Optional[str] = None) -> Dict[str, Tuple[str, Optional[str]]]:
+        """Set the status of many requests in as few writes as the backend allows.
+
+        With `expected_status`, only rows currently in that status change (the
+        rest are conflicts). Returns (outcome, current status) per id, see
+        plan_status_update.
+        """
+
+    @abstractmethod
+    async def contact_request_stats(self) -> dict:
+        """Counts per status, project_type and day, read from counters kept up to date on write"""
+
+    @abstractmethod
+    async def rebuild_contact_request_stats(self) -> dict:
+        """Recompute the counters with a full scan (after imports or out-of-band edits) and return them"""
+
+    @abstractmethod
+    async def get_user_by_email(self, email: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def insert_user(self, data: dict) -> None:
+        ...
+
+    @abstractmethod
+    def outbox_store(self):
+        """Email outbox store living next to this backend's data"""
@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import os
+from collections import Counter
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from mongo_indexes import ensure_indexes
+from outbox import MongoOutboxStore
+from pagination import split_page, split_ranked_page
+from storage.base import (CONTACT_REQUEST_FIELDS, STATUS_CONFLICT, STATUS_NOT_FOUND, Cursor, Storage, StorageError,
+                          contact_request_stat_keys, plan_status_update, stats_from_counts)
+
+DASHBOARD_SORT = [("created_at", -1), ("id", -1)]
+# Only the API fields: no _id (an ObjectId) and nothing added to documents out of band
+CONTACT_REQUEST_PROJECTION = {"_id": False, **{field: True for field in CONTACT_REQUEST_FIELDS}}
+TEXT_SCORE = {"$meta": "textScore"}
+DUPLICATE_KEY = 11000
+
+
+def contact_requests_query(filters: Optional[dict]) -> dict:
+    filters = filters or {}
+    query = {}
+    for field in ("status", "project_type"):
+        if filters.get(field):
+            query[field] = filters[field]
+    if filters.get("created_from") or filters.get("created_to"):
+        query["created_at"] = {}
+        if filters.get("created_from"):
+            query["created_at"]["$gte"] = filters["created_from"]
+        if filters.get("created_to"):
+            query["created_at"]["$lt"] = filters["created_to"]
+    return query
+
+
+class MongoStorage(Storage):
+    name = "mongo"
+    change_feed = True
+
+    def __init__(self, mongo_url: str, db_name: str, *, create_indexes: bool = True, batch_size: int = 1000):
+        self.client = AsyncIOMotorClient(mongo_url)
+        self.db = self.client[db_name]
+        self.create_indexes = create_indexes
+        self.batch_size = batch_size
+        self._indexes: Optional[asyncio.Task] = None
+        # Resume token of the last change seen, so a reopened change stream misses nothing
+        self._watch_token = None
+
+    @classmethod
+    def from_env(cls) -> "MongoStorage":
+        return cls(
+            os.environ['MONGO_URL'],
+            os.environ['DB_NAME'],
+            # Create missing indexes at startup (or run `python mongo_indexes.py ensure`)
+            create_indexes=os.environ.get('MONGO_ENSURE_INDEXES', 'true').lower() == 'true',
+            batch_size=int(os.environ.get('EXPORT_BATCH_SIZE', '1000')),
+        )
+
+    async def connect(self) -> None:
+        # In the background: the motor client connects lazily and a cold start should not wait on index builds
+        if self.create_indexes:
+            self._indexes = asyncio.ensure_future(self._ensure_indexes())
+
+    async def _ensure_indexes(self) -> None:
+        try:
+            await ensure_indexes(self.db)
+        except Exception as e:
+            logging.error(f"Failed to ensure indexes: {e}")
+
+    async def close(self) -> None:
+        if self._indexes is not None:
+            self._indexes.cancel()
+        self.client.close()
+
+    async def ping(self) -> None:
+        await self.db.command("ping")
+
+    async def _bump_stats(self, deltas: Counter) -> None:
+        """$inc the counters in contact_request_stats, one document per (dimension, value).
+
+        Not transactional with the write it follows: a failure in between
+        leaves the counters short until `rebuild_contact_request_stats`.
+        """
+        updates = [
+            UpdateOne(
+                {"_id": f"{dimension}:{value}"},
+                {"$inc": {"count": delta}, "$setOnInsert": {"dimension": dimension, "value": value}},
+                upsert=True
+            )
+            for (dimension, value), delta in deltas.items() if delta
+        ]
+        if updates:
+            await self.db.contact_request_stats.bulk_write(updates, ordered=False)
+
+    async def insert_contact_request(self, data: dict) -> None:
+        await self.db.contact_requests.insert_one(dict(data))
+        await self._bump_stats(Counter(contact_request_stat_keys(data)))
+
+    async def insert_contact_requests(self, rows: List[dict]) -> List[Optional[Exception]]:
+        results: List[Optional[Exception]] = [None] * len(rows)
+        try:
+            # Unordered: a failing document does not stop the rest
+            await self.db.contact_requests.insert_many([dict(row) for row in rows], ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                results[error["index"]] = StorageError(error.get("errmsg", "Insert failed"))
+        await self._bump_stats(Counter(
+            key for row, error in zip(rows, results) if error is None for key in contact_request_stat_keys(row)
+        ))
+        return results
+
+    async def insert_missing_contact_requests(self, rows: List[dict]) -> List[Optional[Exception]]:
+        results: List[Optional[Exception]] = [None] * len(rows)
+        inserted = [True] * len(rows)
+        try:
+            await self.db.contact_requests.insert_many([dict(row) for row in rows], ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                inserted[error["index"]] = False
+                # Duplicate key on the unique contact_requests_id index: already stored
+                if error.get("code") != DUPLICATE_KEY:
+                    results[error["index"]] = StorageError(error.get("errmsg", "Insert failed"))
+        await self._bump_stats(Counter(
+            key for row, new in zip(rows, inserted) if new for key in contact_request_stat_keys(row)
+        ))
+        return results
+
+    async def page_contact_requests(self, limit: int, cursor: Optional[Cursor] = None,
+                                    filters: Optional[dict] = None) -> Tuple[List[dict], Optional[str]]:
+        query = contact_requests_query(filters)
+        if cursor:
+            # Keyset: rows strictly after the last one of the previous page
+            cursor_created_at, cursor_id = datetime.fromisoformat(cursor[0]), cursor[1]
+            query['$or'] = [
+                {'created_at': {'$lt': cursor_created_at}},
+                {'created_at': cursor_created_at, 'id': {'$lt': cursor_id}}
+            ]
+        rows = await self.db.contact_requests.find(query, CONTACT_REQUEST_PROJECTION).sort(
+            DASHBOARD_SORT
+        ).limit(limit + 1).to_list(limit + 1)
+        return split_page(rows, limit)
+
+    async def search_contact_requests(self, terms: List[str], limit: int,
+                                      offset: int = 0) -> Tuple[List[dict], Optional[int]]:
+        # Served by the contact_requests_text index; bare words are OR-ed and stemmed as Spanish
+        rows = await self.db.contact_requests.find(
+            {"$text": {"$search": " ".join(terms)}},
+            {**CONTACT_REQUEST_PROJECTION, "score": TEXT_SCORE}
+        ).sort([("score", TEXT_SCORE), *DASHBOARD_SORT]).skip(offset).limit(limit + 1).to_list(limit + 1)
+        for row in rows:
+            del row["score"]
+        return split_ranked_page(rows, limit, offset)
+
+    async def iter_contact_requests(self, filters: Optional[dict] = None,
+                                    page_size: int = 1000) -> AsyncIterator[dict]:
+        # A single server-side cursor is cheaper than re-issuing keyset queries
+        cursor = self.db.contact_requests.find(
+            contact_requests_query(filters), CONTACT_REQUEST_PROJECTION
+        ).sort(DASHBOARD_SORT).batch_size(self.batch_size)
+        async for row in cursor:
+            yield row
+
+    async def watch_contact_requests(self) -> AsyncIterator[dict]:
+        # Change streams need a replica set (Atlas clusters always are one)
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        async with self.db.contact_requests.watch(pipeline, resume_after=self._watch_token) as stream:
+            async for change in stream:
+                self._watch_token = change["_id"]
+                document = change["fullDocument"]
+                yield {field: document.get(field) for field in CONTACT_REQUEST_FIELDS}
+
+    async def update_contact_request_status(self, request_id: str, status: str) -> bool:
+        before = await self.db.contact_requests.find_one_and_update(
+            {"id": request_id},
+            {"$set": {"status": status}},
+            projection={"_id": False, "status": True},
+            return_document=ReturnDocument.BEFORE
+        )
+        if before is None:
+            return False
+        if before["status"] != status:
+            await self._bump_stats(Counter({("status", before["status"]): -1, ("status", status): 1}))
+        return True
+
+    async def _current_statuses(self, ids: List[str]) -> Dict[str, str]:
+        docs = self.db.contact_requests.find({"id": {"$in": ids}}, {"_id": False, "id": True, "status": True})
+        return {doc["id"]: doc["status"] async for doc in docs}
+
+    async def update_contact_request_statuses(self, ids: List[str], status: str,
+                                              expected_status: Optional[str] = None) -> Dict[str, Tuple[str, Optional[str]]]:
+        outcomes, writes = plan_status_update(await self._current_statuses(ids), ids, status, expected_status)
+        deltas, raced = Counter(), []
+        # One update_many per current status (just one with expected_status), each conditioned on
+        # that status: a row changed since the read is skipped, and the counter deltas stay exact
+        for before, group in writes.items():
+            result = await self.db.contact_requests.update_many(
+                {"id": {"$in": group}, "status": before}, {"$set": {"status": status}}
+            )
+            deltas[("status", before)] -= result.modified_count
+            deltas[("status", status)] += result.modified_count
+            if result.modified_count < len(group):
+                raced.extend(group)
+        await self._bump_stats(deltas)
+        if raced:
+            # Rare: a concurrent write got in between. Rows now in the target status count as updated
+            current = await self._current_statuses(raced)
+            for request_id in raced:
+                if request_id not in current:
+                    outcomes[request_id] = (STATUS_NOT_FOUND, None)
+                elif current[request_id] != status:
+                    outcomes[request_id] = (STATUS_CONFLICT, current[request_id])
+        return outcomes
+
+    async def contact_request_stats(self) -> dict:
+        docs = await self.db.contact_request_stats.find({}, {"_id": False}).to_list(None)
+        return stats_from_counts((doc["dimension"], doc["value"], doc["count"]) for doc in docs)
+
+    async def rebuild_contact_request_stats(self) -> dict:
+        """Full recount; writes landing while it runs may be counted twice or not at all, so run it when quiet"""
+        deltas = Counter()
+        groups = self.db.contact_requests.aggregate([{"$group": {
+            "_id": {
+                "status": "$status",
+                "project_type": "$project_type",
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+            },
+            "count": {"$sum": 1},
+        }}])
+        async for group in groups:
+            for dimension in ("status", "project_type", "day"):
+                deltas[(dimension, group["_id"][dimension])] += group["count"]
+            deltas[("total", "")] += group["count"]
+        await self.db.contact_request_stats.delete_many({})
+        await self._bump_stats(deltas)
+        return await self.contact_request_stats()
+
+    async def get_user_by_email(self, email: str) -> Optional[dict]:
+        return await self.db.users.find_one({"email": email}, {"_id": False})
+
+    async def insert_user(self, data: dict) -> None:
+        await self.db.users.insert_one(dict(data))
+
+    def outbox_store(self):
+        return MongoOutboxStore(self.db)
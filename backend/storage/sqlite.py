@@ -0,0 +1,323 @@
+import asyncio
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from outbox import SQLiteOutboxStore
+from pagination import split_page, split_ranked_page
+from storage.base import (CONTACT_REQUEST_FIELDS, Cursor, Storage, StorageError, as_utc_naive, plan_status_update,
+                          stats_from_counts)
+
+CONTACT_REQUEST_COLUMNS = CONTACT_REQUEST_FIELDS
+USER_COLUMNS = ("id", "email", "password_hash", "role", "created_at")
+# Ids per IN (...) list, well under SQLITE_MAX_VARIABLE_NUMBER
+IN_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contact_requests (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    phone TEXT,
+    company TEXT,
+    project_type TEXT NOT NULL,
+    budget TEXT,
+    timeline TEXT,
+    description TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending'
+);
+CREATE INDEX IF NOT EXISTS idx_contact_requests_created_at_id ON contact_requests(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_contact_requests_status ON contact_requests(status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_contact_requests_project_type ON contact_requests(project_type, created_at DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    role TEXT NOT NULL DEFAULT 'admin',
+    created_at TEXT NOT NULL
+);
+
+-- Dashboard counters, kept in step with contact_requests by triggers (same transaction)
+CREATE TABLE IF NOT EXISTS contact_request_stats (
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, value)
+);
+CREATE TRIGGER IF NOT EXISTS contact_requests_stats_insert AFTER INSERT ON contact_requests BEGIN
+    INSERT INTO contact_request_stats (dimension, value, count) VALUES
+        ('total', '', 1), ('status', NEW.status, 1), ('project_type', NEW.project_type, 1),
+        ('day', substr(NEW.created_at, 1, 10), 1)
+    ON CONFLICT (dimension, value) DO UPDATE SET count = count + excluded.count;
+END;
+CREATE TRIGGER IF NOT EXISTS contact_requests_stats_update
+AFTER UPDATE OF status, project_type, created_at ON contact_requests BEGIN
+    INSERT INTO contact_request_stats (dimension, value, count) VALUES
+        ('status', OLD.status, -1), ('project_type', OLD.project_type, -1),
+        ('day', substr(OLD.created_at, 1, 10), -1)
+    ON CONFLICT (dimension, value) DO UPDATE SET count = count + excluded.count;
+    INSERT INTO contact_request_stats (dimension, value, count) VALUES
+        ('status', NEW.status, 1), ('project_type', NEW.project_type, 1),
+        ('day', substr(NEW.created_at, 1, 10), 1)
+    ON CONFLICT (dimension, value) DO UPDATE SET count = count + excluded.count;
+END;
+CREATE TRIGGER IF NOT EXISTS contact_requests_stats_delete AFTER DELETE ON contact_requests BEGIN
+    INSERT INTO contact_request_stats (dimension, value, count) VALUES
+        ('total', '', -1), ('status', OLD.status, -1), ('project_type', OLD.project_type, -1),
+        ('day', substr(OLD.created_at, 1, 10), -1)
+    ON CONFLICT (dimension, value) DO UPDATE SET count = count + excluded.count;
+END;
+
+-- Full-text index (inverted index inside the database file) over the searchable columns.
+-- Keeps its own copy of the text keyed by id: the implicit rowid of contact_requests may change on VACUUM
+CREATE VIRTUAL TABLE IF NOT EXISTS contact_requests_fts USING fts5(
+    id UNINDEXED, name, company, description, tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS contact_requests_fts_insert AFTER INSERT ON contact_requests BEGIN
+    INSERT INTO contact_requests_fts (id, name, company, description)
+    VALUES (NEW.id, NEW.name, NEW.company, NEW.description);
+END;
+-- The API never edits or deletes requests; these scan the index by id and are for manual maintenance
+CREATE TRIGGER IF NOT EXISTS contact_requests_fts_update
+AFTER UPDATE OF name, company, description ON contact_requests BEGIN
+    UPDATE contact_requests_fts SET name = NEW.name, company = NEW.company, description = NEW.description
+    WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS contact_requests_fts_delete AFTER DELETE ON contact_requests BEGIN
+    DELETE FROM contact_requests_fts WHERE id = OLD.id;
+END;
+"""
+
+REBUILD_STATS = """
+INSERT INTO contact_request_stats (dimension, value, count)
+SELECT 'total', '', COUNT(*) FROM contact_requests
+UNION ALL SELECT 'status', status, COUNT(*) FROM contact_requests GROUP BY status
+UNION ALL SELECT 'project_type', project_type, COUNT(*) FROM contact_requests GROUP BY project_type
+UNION ALL SELECT 'day', substr(created_at, 1, 10), COUNT(*) FROM contact_requests GROUP BY 2
+"""
+
+# New index: bm25 column weights (id, name, company, description) as its rank, so a hit in the name
+# or company counts more, then the rows of databases created before the index existed
+SETUP_FTS = """
+INSERT INTO contact_requests_fts (contact_requests_fts, rank) VALUES ('rank', 'bm25(0.0, 5.0, 5.0, 1.0)');
+INSERT INTO contact_requests_fts (id, name, company, description)
+SELECT id, name, company, description FROM contact_requests ORDER BY created_at;
+"""
+
+# Ranked inside the index, joining only the page: index rowids follow insertion, so ties go newest first
+SEARCH = """
+SELECT c.* FROM (
+    SELECT id, rank, rowid FROM contact_requests_fts WHERE contact_requests_fts MATCH ?
+    ORDER BY rank, rowid DESC LIMIT ? OFFSET ?
+) AS hits JOIN contact_requests c ON c.id = hits.id
+ORDER BY hits.rank, hits.rowid DESC
+"""
+
+
+def _timestamp(value) -> str:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return as_utc_naive(value).isoformat(timespec='microseconds')
+
+
+def _fts_term(term: str) -> str:
+    """FTS5 prefix query for one search word, with a plural ending dropped.
+
+    FTS5 has no Spanish stemmer; matching on the singular as a prefix makes
+    "tiendas" find "tienda" and "clientes" find "cliente", as the Mongo and
+    Postgres stemmers do.
+    """
+    if len(term) > 4 and term.endswith("es"):
+        term = term[:-2]
+    elif len(term) > 3 and term.endswith("s"):
+        term = term[:-1]
+    return '"' + term.replace('"', '""') + '"*'
+
+
+def _row(row: sqlite3.Row) -> dict:
+    data = dict(row)
+    data["created_at"] = datetime.fromisoformat(data["created_at"])
+    return data
+
+
+class SQLiteStorage(Storage):
+    """Embedded backend for local runs, load tests and benchmarks; no external services"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        new_index = not self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'contact_requests_fts'"
+        ).fetchone()
+        self._conn.executescript(SCHEMA)
+        if new_index:
+            self._conn.executescript(SETUP_FTS)
+
+    @classmethod
+    def from_env(cls) -> "SQLiteStorage":
+        return cls(os.environ.get('SQLITE_PATH', ':memory:'))
+
+    def _run(self, fn, *args):
+        def locked():
+            with self._lock:
+                return fn(*args)
+        return asyncio.to_thread(locked)
+
+    async def close(self) -> None:
+        await self._run(self._conn.close)
+
+    async def ping(self) -> None:
+        await self._run(self._conn.execute, "SELECT 1")
+
+    def _insert(self, table: str, columns: tuple, data: dict, on_conflict: str = "") -> None:
+        values = [_timestamp(data[c]) if c == "created_at" else data.get(c) for c in columns]
+        try:
+            self._conn.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) {on_conflict}",
+                values,
+            )
+        except sqlite3.IntegrityError as e:
+            raise StorageError(f"Insert into {table} failed: {e}") from e
+
+    async def insert_contact_request(self, data: dict) -> None:
+        await self._run(self._insert, "contact_requests", CONTACT_REQUEST_COLUMNS, data)
+
+    def _insert_many(self, rows: List[dict], on_conflict: str = "") -> List[Optional[Exception]]:
+        results: List[Optional[Exception]] = []
+        # One transaction per batch; a failing row only rolls back its own statement
+        self._conn.execute("BEGIN")
+        try:
+            for row in rows:
+                try:
+                    self._insert("contact_requests", CONTACT_REQUEST_COLUMNS, row, on_conflict)
+                    results.append(None)
+                except StorageError as e:
+                    results.append(e)
+        finally:
+            self._conn.execute("COMMIT")
+        return results
+
+    async def insert_contact_requests(self, rows: List[dict]) -> List[Optional[Exception]]:
+        return await self._run(self._insert_many, rows)
+
+    async def insert_missing_contact_requests(self, rows: List[dict]) -> List[Optional[Exception]]:
+        # Not OR IGNORE: that would also swallow NOT NULL violations; triggers skip ignored rows
+        return await self._run(self._insert_many, rows, "ON CONFLICT(id) DO NOTHING")
+
+    def _page(self, limit: int, cursor: Optional[Cursor], filters: Optional[dict]) -> List[dict]:
+        filters = filters or {}
+        clauses, params = [], []
+        for column in ("status", "project_type"):
+            if filters.get(column):
+                clauses.append(f"{column} = ?")
+                params.append(filters[column])
+        if filters.get("created_from"):
+            clauses.append("created_at >= ?")
+            params.append(_timestamp(filters["created_from"]))
+        if filters.get("created_to"):
+            clauses.append("created_at < ?")
+            params.append(_timestamp(filters["created_to"]))
+        if cursor:
+            # A row value, unlike the equivalent OR, is a range on the (created_at, id) indexes
+            clauses.append("(created_at, id) < (?, ?)")
+            params.extend([_timestamp(cursor[0]), cursor[1]])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn.execute(
+            f"SELECT * FROM contact_requests {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+            params + [limit + 1],
+        ).fetchall()
+        return [_row(row) for row in rows]
+
+    async def page_contact_requests(self, limit: int, cursor: Optional[Cursor] = None,
+                                    filters: Optional[dict] = None) -> Tuple[List[dict], Optional[str]]:
+        return split_page(await self._run(self._page, limit, cursor, filters), limit)
+
+    def _search(self, terms: List[str], limit: int, offset: int) -> List[dict]:
+        rows = self._conn.execute(SEARCH, (" OR ".join(_fts_term(t) for t in terms), limit + 1, offset)).fetchall()
+        return [_row(row) for row in rows]
+
+    async def search_contact_requests(self, terms: List[str], limit: int,
+                                      offset: int = 0) -> Tuple[List[dict], Optional[int]]:
+        return split_ranked_page(await self._run(self._search, terms, limit, offset), limit, offset)
+
+    def _update_status(self, request_id: str, status: str) -> bool:
+        cursor = self._conn.execute("UPDATE contact_requests SET status = ? WHERE id = ?", (status, request_id))
+        return cursor.rowcount == 1
+
+    async def update_contact_request_status(self, request_id: str, status: str) -> bool:
+        return await self._run(self._update_status, request_id, status)
+
+    def _update_statuses(self, ids: List[str], status: str,
+                         expected_status: Optional[str]) -> Dict[str, Tuple[str, Optional[str]]]:
+        # IMMEDIATE: statuses cannot change between the read and the writes, so the plan is exact
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = {}
+            for start in range(0, len(ids), IN_CHUNK):
+                chunk = ids[start:start + IN_CHUNK]
+                current.update(self._conn.execute(
+                    f"SELECT id, status FROM contact_requests WHERE id IN ({', '.join('?' for _ in chunk)})", chunk
+                ).fetchall())
+            outcomes, writes = plan_status_update(current, ids, status, expected_status)
+            for group in writes.values():
+                for start in range(0, len(group), IN_CHUNK):
+                    chunk = group[start:start + IN_CHUNK]
+                    self._conn.execute(
+                        f"UPDATE contact_requests SET status = ? WHERE id IN ({', '.join('?' for _ in chunk)})",
+                        [status, *chunk]
+                    )
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        return outcomes
+
+    async def update_contact_request_statuses(self, ids: List[str], status: str,
+                                              expected_status: Optional[str] = None) -> Dict[str, Tuple[str, Optional[str]]]:
+        return await self._run(self._update_statuses, ids, status, expected_status)
+
+    def _stats(self) -> dict:
+        rows = self._conn.execute("SELECT dimension, value, count FROM contact_request_stats").fetchall()
+        return stats_from_counts(tuple(row) for row in rows)
+
+    async def contact_request_stats(self) -> dict:
+        return await self._run(self._stats)
+
+    def _rebuild_stats(self) -> dict:
+        # IMMEDIATE: no write can slip in between the delete and the recount
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.execute("DELETE FROM contact_request_stats")
+            self._conn.execute(REBUILD_STATS)
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        return self._stats()
+
+    async def rebuild_contact_request_stats(self) -> dict:
+        return await self._run(self._rebuild_stats)
+
+    def _get_user(self, email: str) -> Optional[dict]:
+        row = self._conn.execute("SELECT * FROM users WHERE email = ?", (email,)).fetchone()
+        return _row(row) if row else None
+
+    async def get_user_by_email(self, email: str) -> Optional[dict]:
+        return await self._run(self._get_user, email)
+
+    async def insert_user(self, data: dict) -> None:
+        await self._run(self._insert, "users", USER_COLUMNS, data)
+
+    def outbox_store(self):
+        return SQLiteOutboxStore(self.path)
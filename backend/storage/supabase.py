@@ -0,0 +1,368 @@
+import asyncio
+import base64
+import json
+import os
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from outbox import SupabaseOutboxStore
+from resilience import CircuitBreaker
+from pagination import split_page, split_ranked_page
+from storage.base import (CONTACT_REQUEST_FIELDS, STATUS_CONFLICT, STATUS_NOT_FOUND, STATUS_UNCHANGED, STATUS_UPDATED,
+                          Cursor, Storage, StorageError, as_utc_naive, stats_from_counts)
+
+
+# pg_notify channel of the contact_requests_notify trigger; the payload is the new row's id
+CONTACT_REQUEST_CHANNEL = "contact_requests_inserted"
+
+
+def _timestamp(value) -> str:
+    """UTC timestamptz literal; naive datetimes/strings are taken as UTC"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec='microseconds')
+
+
+def _serialize(data: dict) -> dict:
+    return {k: _timestamp(v) if isinstance(v, datetime) else v for k, v in data.items()}
+
+
+def key_role(key: str) -> Optional[str]:
+    """The `role` claim of a Supabase API key (a JWT), or None if the key is not one"""
+    # The newer, non-JWT keys: a publishable key has the anon role, a secret key service_role
+    if key.startswith("sb_publishable_"):
+        return "anon"
+    if key.startswith("sb_secret_"):
+        return "service_role"
+    try:
+        payload = key.split(".")[1]
+        return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))).get("role")
+    except (IndexError, ValueError, AttributeError):
+        return None
+
+
+def _parse_row(row: dict) -> dict:
+    if isinstance(row.get("created_at"), str):
+        row["created_at"] = as_utc_naive(datetime.fromisoformat(row["created_at"]))
+    return row
+
+
+class GuardedTransport(httpx.AsyncBaseTransport):
+    """Transport that puts every request through a circuit breaker and an overall deadline.
+
+    The deadline covers the whole exchange, body included; httpx's own
+    timeouts only bound each connect/read/write step. Transport errors,
+    deadline overruns and 5xx responses count as failures.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, breaker: CircuitBreaker, deadline: float):
+        self.transport = transport
+        self.breaker = breaker
+        self.deadline = deadline
+
+    async def _exchange(self, request: httpx.Request) -> httpx.Response:
+        response = await self.transport.handle_async_request(request)
+        try:
+            await response.aread()
+        except BaseException:
+            await response.aclose()
+            raise
+        return response
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.breaker.acquire()
+        success = None
+        try:
+            response = await asyncio.wait_for(self._exchange(request), self.deadline)
+            success = response.status_code < 500
+            return response
+        except asyncio.TimeoutError as e:
+            success = False
+            raise httpx.TimeoutException(f"No response within the {self.deadline}s deadline", request=request) from e
+        except Exception:
+            success = False
+            raise
+        finally:
+            self.breaker.release(success)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class SupabaseStorage(Storage):
+    """Supabase tables through PostgREST, over one shared keep-alive client"""
+
+    name = "supabase"
+
+    # Gateway errors worth retrying on idempotent reads
+    RETRY_STATUS = (502, 503, 504)
+    # Ids per id=in.(...) filter: keeps the URL near 4 KB, under proxy limits
+    IN_FILTER_CHUNK = 100
+
+    def __init__(self, url: str, key: str, *, http2: bool = True, max_connections: int = 20,
+                 max_keepalive: int = 10, connect_timeout: float = 5.0, read_timeout: float = 10.0,
+                 read_retries: int = 2, deadline: float = 15.0, breaker: Optional[CircuitBreaker] = None,
+                 db_url: str = ''):
+        self.url = url
+        self.key = key
+        # Direct Postgres connection string, only used to LISTEN for new contact requests
+        self.db_url = db_url
+        self.change_feed = bool(db_url)
+        self.headers = {
+            'apikey': self.key,
+            'Authorization': f'Bearer {self.key}',
+            'Content-Type': 'application/json'
+        }
+        self.http2 = http2
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.read_retries = read_retries
+        self.deadline = deadline
+        # Shared by every call to this project (storage and outbox alike)
+        self.breaker = breaker or CircuitBreaker("supabase")
+        self.client: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    def from_env(cls) -> "SupabaseStorage":
+        key = os.environ.get('SUPABASE_KEY', '')
+        # RLS hides the outbox, the stats, users and the lead list from client keys; with one,
+        # writes fail at runtime and notification emails are silently never queued
+        if key_role(key) in ('anon', 'authenticated'):
+            raise ValueError(f"SUPABASE_KEY is the {key_role(key)} key; the backend needs the service_role key "
+                             "(Settings > API in the Supabase dashboard)")
+        return cls(
+            os.environ.get('SUPABASE_URL', ''),
+            key,
+            http2=os.environ.get('SUPABASE_HTTP2', 'true').lower() == 'true',
+            max_connections=int(os.environ.get('SUPABASE_MAX_CONNECTIONS', '20')),
+            max_keepalive=int(os.environ.get('SUPABASE_MAX_KEEPALIVE', '10')),
+            connect_timeout=float(os.environ.get('SUPABASE_CONNECT_TIMEOUT', '5')),
+            read_timeout=float(os.environ.get('SUPABASE_READ_TIMEOUT', '10')),
+            read_retries=int(os.environ.get('SUPABASE_READ_RETRIES', '2')),
+            deadline=float(os.environ.get('SUPABASE_DEADLINE', '15')),
+            breaker=CircuitBreaker(
+                "supabase",
+                failure_threshold=int(os.environ.get('SUPABASE_BREAKER_THRESHOLD', '5')),
+                reset_timeout=float(os.environ.get('SUPABASE_BREAKER_RESET', '30')),
+            ),
+            db_url=os.environ.get('SUPABASE_DB_URL', ''),
+        )
+
+    def http(self) -> httpx.AsyncClient:
+        """Shared keep-alive client, created on first use so startup does no TLS/HTTP2 setup"""
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                base_url=f"{self.url}/rest/v1",
+                headers=self.headers,
+                timeout=self.timeout,
+                transport=GuardedTransport(
+                    httpx.AsyncHTTPTransport(http2=self.http2, limits=self.limits),
+                    self.breaker,
+                    self.deadline
+                )
+            )
+        return self.client
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def ping(self) -> None:
+        # No retries: a probe should report the current state
+        response = await self.http().get("/users", params={"select": "id", "limit": "1"})
+        response.raise_for_status()
+
+    async def _get(self, path: str, params) -> httpx.Response:
+        """GET with retries on transport errors and gateway failures"""
+        for attempt in range(self.read_retries + 1):
+            try:
+                response = await self.http().get(path, params=params)
+                if response.status_code not in self.RETRY_STATUS or attempt == self.read_retries:
+                    response.raise_for_status()
+                    return response
+            except httpx.TransportError:
+                if attempt == self.read_retries:
+                    raise
+            await asyncio.sleep(0.1 * 2 ** attempt)
+
+    async def _post(self, path: str, data, params=None, headers=None) -> httpx.Response:
+        response = await self.http().post(path, json=data, params=params, headers=headers)
+        if response.status_code not in (200, 201):
+            raise StorageError(f"Supabase insert into {path} failed: {response.status_code} {response.text}")
+        return response
+
+    async def insert_contact_request(self, data: dict) -> None:
+        await self._post("/contact_requests", _serialize(data))
+
+    async def insert_contact_requests(self, rows: List[dict]) -> List[Optional[Exception]]:
+        # PostgREST inserts a JSON array in one statement
+        try:
+            await self._post("/contact_requests", [_serialize(row) for row in rows])
+        except StorageError as e:
+            if len(rows) == 1:
+                return [e]
+            # The whole array was rolled back: retry row by row so one bad row
+            # does not fail its neighbours
+            return await super().insert_contact_requests(rows)
+        except httpx.HTTPError as e:
+            # Outcome unknown; a blind retry could duplicate rows
+            return [e] * len(rows)
+        return [None] * len(rows)
+
+    async def insert_missing_contact_requests(self, rows: List[dict]) -> List[Optional[Exception]]:
+        # INSERT ... ON CONFLICT (id) DO NOTHING; the stats trigger does not fire for skipped rows
+        try:
+            await self._post("/contact_requests", [_serialize(row) for row in rows], params={"on_conflict": "id"},
+                             headers={"Prefer": "resolution=ignore-duplicates,return=minimal"})
+        except StorageError as e:
+            if len(rows) == 1:
+                return [e]
+            # Isolate the bad row; replaying the rest again is harmless
+            return [(await self.insert_missing_contact_requests([row]))[0] for row in rows]
+        except httpx.HTTPError as e:
+            return [e] * len(rows)
+        return [None] * len(rows)
+
+    @staticmethod
+    def _contact_requests_params(limit: int, cursor: Optional[Cursor], filters: Optional[dict]) -> list:
+        params = [
+            ("select", ",".join(CONTACT_REQUEST_FIELDS)),
+            ("order", "created_at.desc,id.desc"),
+            ("limit", str(limit + 1))
+        ]
+        filters = filters or {}
+        for column in ("status", "project_type"):
+            if filters.get(column):
+                params.append((column, f"eq.{filters[column]}"))
+        if filters.get("created_from"):
+            params.append(("created_at", f"gte.{_timestamp(filters['created_from'])}"))
+        if filters.get("created_to"):
+            params.append(("created_at", f"lt.{_timestamp(filters['created_to'])}"))
+        if cursor:
+            created_at, row_id = _timestamp(cursor[0]), cursor[1]
+            params.append(("or", f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id}))'))
+        return params
+
+    async def page_contact_requests(self, limit: int, cursor: Optional[Cursor] = None,
+                                    filters: Optional[dict] = None) -> Tuple[List[dict], Optional[str]]:
+        response = await self._get("/contact_requests", self._contact_requests_params(limit, cursor, filters))
+        return split_page([_parse_row(row) for row in response.json()], limit)
+
+    async def watch_contact_requests(self) -> AsyncIterator[dict]:
+        # PostgREST cannot LISTEN: a direct connection receives the ids that the
+        # contact_requests_notify trigger (SUPABASE_SETUP_GUIDE.md) sends, and the rows
+        # are then read in batches through PostgREST like any other read
+        import asyncpg
+
+        ids: asyncio.Queue = asyncio.Queue()
+        connection = await asyncpg.connect(self.db_url)
+        try:
+            await connection.add_listener(CONTACT_REQUEST_CHANNEL, lambda *args: ids.put_nowait(args[-1]))
+            connection.add_termination_listener(lambda _connection: ids.put_nowait(None))
+            while True:
+                batch = [await ids.get()]
+                while not ids.empty():
+                    batch.append(ids.get_nowait())
+                if None in batch:
+                    raise StorageError("Postgres LISTEN connection lost")
+                for start in range(0, len(batch), self.IN_FILTER_CHUNK):
+                    response = await self._get("/contact_requests", [
+                        ("id", f"in.({','.join(batch[start:start + self.IN_FILTER_CHUNK])})"),
+                        ("select", ",".join(CONTACT_REQUEST_FIELDS)),
+                        ("order", "created_at.asc,id.asc"),
+                    ])
+                    for row in response.json():
+                        yield _parse_row(row)
+        finally:
+            await connection.close()
+
+    async def search_contact_requests(self, terms: List[str], limit: int,
+                                      offset: int = 0) -> Tuple[List[dict], Optional[int]]:
+        # Ranked by ts_rank over the GIN-indexed `search` column (SUPABASE_SETUP_GUIDE.md); the
+        # function is STABLE, so PostgREST takes it as a GET and it can be retried like any read
+        response = await self._get("/rpc/search_contact_requests", [
+            ("q", " ".join(terms)),
+            ("max_rows", str(limit + 1)),
+            ("skip", str(offset)),
+            ("select", ",".join(CONTACT_REQUEST_FIELDS)),
+        ])
+        return split_ranked_page([_parse_row(row) for row in response.json()], limit, offset)
+
+    async def update_contact_request_status(self, request_id: str, status: str) -> bool:
+        response = await self.http().patch(
+            "/contact_requests",
+            params={"id": f"eq.{request_id}"},
+            headers={"Prefer": "return=representation"},
+            json={"status": status}
+        )
+        response.raise_for_status()
+        return bool(response.json())
+
+    async def _update_statuses_chunk(self, ids: List[str], status: str,
+                                     expected_status: Optional[str]) -> Dict[str, Tuple[str, Optional[str]]]:
+        id_filter = ("id", f"in.({','.join(ids)})")
+        params = [id_filter, ("status", f"neq.{status}"), ("select", "id")]
+        if expected_status is not None:
+            params.append(("status", f"eq.{expected_status}"))
+        # One filtered PATCH; the conditions are checked row by row as Postgres updates
+        response = await self.http().patch(
+            "/contact_requests",
+            params=params,
+            headers={"Prefer": "return=representation"},
+            json={"status": status}
+        )
+        response.raise_for_status()
+        updated = {row["id"] for row in response.json()}
+        outcomes = {request_id: (STATUS_UPDATED, status) for request_id in updated}
+        rest = [request_id for request_id in ids if request_id not in updated]
+        if rest:
+            # Only to tell apart why the others were skipped
+            response = await self._get("/contact_requests", [("id", f"in.({','.join(rest)})"), ("select", "id,status")])
+            current = {row["id"]: row["status"] for row in response.json()}
+            for request_id in rest:
+                if request_id not in current:
+                    outcomes[request_id] = (STATUS_NOT_FOUND, None)
+                elif current[request_id] == status:
+                    outcomes[request_id] = (STATUS_UNCHANGED, status)
+                else:
+                    outcomes[request_id] = (STATUS_CONFLICT, current[request_id])
+        return outcomes
+
+    async def update_contact_request_statuses(self, ids: List[str], status: str,
+                                              expected_status: Optional[str] = None) -> Dict[str, Tuple[str, Optional[str]]]:
+        # Chunks run concurrently over the shared client (bounded by its connection limit)
+        chunks = await asyncio.gather(*(
+            self._update_statuses_chunk(ids[start:start + self.IN_FILTER_CHUNK], status, expected_status)
+            for start in range(0, len(ids), self.IN_FILTER_CHUNK)
+        ))
+        outcomes = {}
+        for chunk in chunks:
+            outcomes.update(chunk)
+        return {request_id: outcomes[request_id] for request_id in ids}
+
+    async def contact_request_stats(self) -> dict:
+        # contact_request_stats is maintained by a trigger on contact_requests (SUPABASE_SETUP_GUIDE.md)
+        response = await self._get("/contact_request_stats", {"select": "dimension,value,count"})
+        return stats_from_counts((row["dimension"], row["value"], row["count"]) for row in response.json())
+
+    async def rebuild_contact_request_stats(self) -> dict:
+        response = await self.http().post("/rpc/rebuild_contact_request_stats", json={})
+        if response.status_code not in (200, 204):
+            raise StorageError(f"Supabase stats rebuild failed: {response.status_code} {response.text}")
+        return await self.contact_request_stats()
+
+    async def get_user_by_email(self, email: str) -> Optional[dict]:
+        response = await self._get("/users", {"email": f"eq.{email}"})
+        users = response.json()
+        return _parse_row(users[0]) if users else None
+
+    async def insert_user(self, data: dict) -> None:
+        await self._post("/users", _serialize(data))
+
+    def outbox_store(self):
+        return SupabaseOutboxStore(self)
@@ -0,0 +1,71 @@
+import asyncio
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+
+class WriteBehindBuffer:
+    """Coalesces single-row writes into bulk writes.
+
+    Rows wait until `max_rows` are pending or `max_delay` seconds have passed
+    since the first one, then go out in a single `write_many` call, which
+    returns one exception (or None) per row. Each submitter awaits its own
+    row's outcome, so a handler still only acknowledges what was stored.
+    """
+
+    def __init__(self, write_many: Callable[[List[dict]], Awaitable[List[Optional[Exception]]]], *,
+                 max_rows: int = 100, max_delay: float = 0.01):
+        self.write_many = write_many
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+        self._closed = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def submit(self, row: dict) -> None:
+        """Queue a row and wait until its batch has been written"""
+        if self._closed:
+            raise RuntimeError("Write-behind buffer is closed")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future))
+        if len(self._pending) >= self.max_rows:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._write(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _write(self, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        try:
+            errors = await self.write_many([row for row, _ in batch])
+        except Exception as e:
+            errors = [e] * len(batch)
+        for (_, future), error in zip(batch, errors):
+            # A submitter that went away (client disconnect) still gets its row written
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+    async def close(self) -> None:
+        """Stop accepting rows and wait until everything buffered is written"""
+        self._closed = True
+        self._flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Button } from './ui/button';
 import { Input } from './ui/input';
 import { Textarea } from './ui/textarea';
@@ -43,9 +43,12 @@ const HomePage = () => {
     description: ''
   });
   const { toast } = useToast();
+  // One key per filled-in form, reused on retries so the backend stores it only once
+  const submissionKey = useRef(null);
 
   const handleInputChange = (e) => {
     const { name, value } = e.target;
+    submissionKey.current = null;
     setFormData(prev => ({
       ...prev,
       [name]: value
@@ -55,11 +58,15 @@ const HomePage = () => {
   const handleSubmit = async (e) => {
     e.preventDefault();
     setIsSubmitting(true);
+    if (!submissionKey.current) {
+      submissionKey.current = crypto.randomUUID();
+    }
     
     try {
       const response = await axios.post(`${API}/contact-request`, formData, {
         headers: {
-          'Content-Type': 'application/json'
+          'Content-Type': 'application/json',
+          'Idempotency-Key': submissionKey.current
         }
       });
 
@@ -70,6 +77,7 @@ const HomePage = () => {
         });
         
         // Reset form
+        submissionKey.current = null;
         setFormData({
           name: '',
           email: '',
@@ -25,15 +25,129 @@ CREATE TABLE IF NOT EXISTS public.contact_requests (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Create email_outbox table (notification emails waiting for delivery)
+CREATE TABLE IF NOT EXISTS public.email_outbox (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    reference_id UUID,
+    recipient VARCHAR(255) NOT NULL,
+    subject VARCHAR(255) NOT NULL,
+    html TEXT NOT NULL,
+    text TEXT,
+    status VARCHAR(20) DEFAULT 'pending',  -- pending, sent, dead, digest
+    attempts INTEGER DEFAULT 0,
+    last_error TEXT,
+    next_attempt_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    sent_at TIMESTAMP WITH TIME ZONE
+);
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_contact_requests_created_at ON public.contact_requests(created_at DESC);
+-- Keyset pagination of the dashboard list orders by (created_at, id)
+CREATE INDEX IF NOT EXISTS idx_contact_requests_created_at_id ON public.contact_requests(created_at DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_contact_requests_status ON public.contact_requests(status);
 CREATE INDEX IF NOT EXISTS idx_contact_requests_project_type ON public.contact_requests(project_type);
 CREATE INDEX IF NOT EXISTS idx_users_email ON public.users(email);
+CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON public.email_outbox(status, next_attempt_at);
+
+-- Digest mode (EMAIL_DIGEST_ENABLED): admin notifications held for the same summary email share a digest_id
+ALTER TABLE public.email_outbox ADD COLUMN IF NOT EXISTS digest_id UUID;
+CREATE INDEX IF NOT EXISTS idx_email_outbox_digest ON public.email_outbox(digest_id, created_at);
+
+-- Dashboard counters (GET /api/contact-requests/stats): kept per status, project type and UTC day by a
+-- trigger, in the same transaction as each insert/update, so the stats never scan contact_requests
+CREATE TABLE IF NOT EXISTS public.contact_request_stats (
+    dimension TEXT NOT NULL, -- total | status | project_type | day
+    value TEXT NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, value)
+);
+
+CREATE OR REPLACE FUNCTION public.bump_contact_request_stats(r public.contact_requests, delta INT, with_total BOOLEAN)
+RETURNS void LANGUAGE sql AS $$
+    INSERT INTO public.contact_request_stats (dimension, value, count)
+    SELECT d, v, delta FROM (VALUES
+        ('total', ''),
+        ('status', r.status),
+        ('project_type', r.project_type),
+        ('day', to_char(r.created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD'))
+    ) AS keys(d, v)
+    WHERE with_total OR d <> 'total'
+    ON CONFLICT (dimension, value) DO UPDATE SET count = public.contact_request_stats.count + EXCLUDED.count;
+$$;
+
+-- SECURITY DEFINER: whoever inserts needs no privileges on the counters table
+CREATE OR REPLACE FUNCTION public.contact_request_stats_trigger()
+RETURNS trigger LANGUAGE plpgsql SECURITY DEFINER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM public.bump_contact_request_stats(OLD, -1, TG_OP = 'DELETE');
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM public.bump_contact_request_stats(NEW, 1, TG_OP = 'INSERT');
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS contact_requests_stats ON public.contact_requests;
+CREATE TRIGGER contact_requests_stats
+AFTER INSERT OR DELETE OR UPDATE OF status, project_type, created_at ON public.contact_requests
+FOR EACH ROW EXECUTE FUNCTION public.contact_request_stats_trigger();
+
+-- Full recount (python -m backend rebuild-stats), also needed once if contact_requests already had rows;
+-- blocks writes while it runs
+CREATE OR REPLACE FUNCTION public.rebuild_contact_request_stats()
+RETURNS void LANGUAGE plpgsql SECURITY DEFINER AS $$
+BEGIN
+  LOCK TABLE public.contact_requests IN SHARE MODE;
+  DELETE FROM public.contact_request_stats WHERE true;
+  INSERT INTO public.contact_request_stats (dimension, value, count)
+  SELECT 'total', '', count(*) FROM public.contact_requests
+  UNION ALL SELECT 'status', status, count(*) FROM public.contact_requests GROUP BY status
+  UNION ALL SELECT 'project_type', project_type, count(*) FROM public.contact_requests GROUP BY project_type
+  UNION ALL SELECT 'day', to_char(created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD'), count(*)
+    FROM public.contact_requests GROUP BY 2;
+END;
+$$;
+
+-- Full-text search (GET /api/contact-requests/search): Spanish tsvector kept by Postgres, GIN-indexed.
+-- Name and company weigh A, the description B
+ALTER TABLE public.contact_requests ADD COLUMN IF NOT EXISTS search tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('spanish', coalesce(name, '') || ' ' || coalesce(company, '')), 'A') ||
+    setweight(to_tsvector('spanish', coalesce(description, '')), 'B')
+) STORED;
+CREATE INDEX IF NOT EXISTS idx_contact_requests_search ON public.contact_requests USING GIN (search);
+
+-- Rows matching any word of q, best rank first; STABLE so PostgREST serves it as GET /rpc/search_contact_requests
+CREATE OR REPLACE FUNCTION public.search_contact_requests(q TEXT, max_rows INT, skip INT DEFAULT 0)
+RETURNS SETOF public.contact_requests LANGUAGE sql STABLE AS $$
+    SELECT c.* FROM public.contact_requests c,
+        to_tsquery('spanish', replace(plainto_tsquery('spanish', q)::text, ' & ', ' | ')) AS query
+    WHERE c.search @@ query
+    ORDER BY ts_rank('{0.1, 0.2, 0.2, 1.0}', c.search, query) DESC, c.created_at DESC, c.id DESC
+    LIMIT max_rows OFFSET skip;
+$$;
+
+-- Live feed across workers (LIVE_FEED_SOURCE=storage): each insert notifies its id to the LISTENing workers
+CREATE OR REPLACE FUNCTION public.contact_requests_notify()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  PERFORM pg_notify('contact_requests_inserted', NEW.id::text);
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS contact_requests_notify ON public.contact_requests;
+CREATE TRIGGER contact_requests_notify
+AFTER INSERT ON public.contact_requests
+FOR EACH ROW EXECUTE FUNCTION public.contact_requests_notify();
 
 -- Enable Row Level Security (RLS)
 ALTER TABLE public.users ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.contact_requests ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.email_outbox ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.contact_request_stats ENABLE ROW LEVEL SECURITY;
 
 -- Create policies for users table (only for authenticated admin users)
 CREATE POLICY "Users can view their own data" ON public.users
@@ -69,6 +183,16 @@ GRANT SELECT, INSERT, UPDATE, DELETE ON public.contact_requests TO authenticated
 GRANT SELECT, INSERT ON public.users TO anon;
 GRANT SELECT, INSERT, UPDATE, DELETE ON public.users TO authenticated;
 
+-- The backend connects with the service_role key (SUPABASE_KEY), which bypasses RLS;
+-- the anon key is rejected at startup. Clients never touch the tables below.
+-- The outbox is only touched by the backend (service role), never by clients
+GRANT SELECT, INSERT, UPDATE, DELETE ON public.email_outbox TO service_role;
+
+-- Counters are read and rebuilt by the backend only; the rebuild locks contact_requests
+GRANT SELECT ON public.contact_request_stats TO service_role;
+REVOKE EXECUTE ON FUNCTION public.rebuild_contact_request_stats() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.rebuild_contact_request_stats() TO service_role;
+
 -- Insert default admin user (password: admin123)
 -- Note: The password hash is for 'admin123' using bcrypt
 INSERT INTO public.users (id, email, password_hash, role, created_at)
@@ -87,7 +211,7 @@ SELECT
     tableowner
 FROM pg_tables 
 WHERE schemaname = 'public' 
-AND tablename IN ('users', 'contact_requests');
+AND tablename IN ('users', 'contact_requests', 'email_outbox', 'contact_request_stats');
 
 -- Show the structure of created tables
 \d public.users;
@@ -0,0 +1,78 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+# The backend modules import each other as top-level modules, as they do under uvicorn
+sys.path.insert(0, BACKEND_DIR)
+
+STORAGE_BACKENDS = ("sqlite", "supabase", "mongo")
+
+
+@pytest.fixture
+def anyio_backend():
+    # Async tests run through anyio's pytest plugin (installed with httpx/starlette), on asyncio only
+    return "asyncio"
+
+
+@pytest.fixture(params=STORAGE_BACKENDS)
+async def storage(request, monkeypatch):
+    """Each backend against its local stand-in: in-memory SQLite, FakePostgREST, mongomock-motor"""
+    if request.param == "sqlite":
+        from storage.sqlite import SQLiteStorage
+        backend = SQLiteStorage()
+        await backend.connect()
+        yield backend
+        await backend.close()
+    elif request.param == "supabase":
+        from benchmarks.fakes import FakePostgREST
+        from storage.supabase import SupabaseStorage
+        with FakePostgREST() as postgrest:
+            backend = SupabaseStorage(postgrest.url, "test-key")
+            await backend.connect()
+            yield backend
+            await backend.close()
+    else:
+        mongomock_motor = pytest.importorskip("mongomock_motor")
+        from storage import mongo
+        monkeypatch.setattr(mongo, "AsyncIOMotorClient", mongomock_motor.AsyncMongoMockClient)
+        backend = mongo.MongoStorage("mongodb://localhost:27017", "test")
+        await backend.connect()
+        # The unique id index is what makes insert_missing skip stored rows
+        await backend._indexes
+        yield backend
+        await backend.close()
+
+
+@pytest.fixture(scope="session")
+def server(tmp_path_factory):
+    """The app module on embedded SQLite, imported once: it reads its settings at import time"""
+    directory = tmp_path_factory.mktemp("server")
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in {
+            "STORAGE_BACKEND": "sqlite", "SQLITE_PATH": ":memory:", "CONTACT_SPOOL_PATH": "",
+            "OUTBOX_SQLITE_PATH": str(directory / "outbox.sqlite3"), "OUTBOX_POLL_INTERVAL": "3600",
+            "IDEMPOTENCY_SQLITE_PATH": "", "RATE_LIMIT_ENABLED": "false", "EMAIL_DIGEST_ENABLED": "false",
+            "SEND_CUSTOMER_AUTOREPLY": "false", "LIVE_FEED_SOURCE": "memory",
+        }.items():
+            patch.setenv(name, value)
+        import server
+    return server
+
+
+@pytest.fixture
+def postgrest():
+    from benchmarks.fakes import FakePostgREST
+    with FakePostgREST() as fake:
+        yield fake
+        # Let handlers stuck in a "hang" fault finish
+        fake.fault = None
+
+
+@pytest.fixture
+def smtp_server():
+    from benchmarks.fakes import FakeSMTPServer
+    with FakeSMTPServer(keep=True) as fake:
+        yield fake
+        fake.fault = None
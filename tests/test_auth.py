@@ -0,0 +1,82 @@
+"""Cached JWT verification and the admin dependency"""
+import time
+
+import httpx
+import jwt
+import pytest
+
+import auth
+from auth import InvalidToken, TokenVerifier, parse_secrets
+
+
+def token(secret: str, **claims) -> str:
+    return jwt.encode({"email": "admin@lsweb.com", "role": "admin", **claims}, secret, algorithm="HS256")
+
+
+def test_cached_token_is_rejected_once_it_expires(monkeypatch):
+    verifier = TokenVerifier(["current"])
+    now = time.time()
+    expiring = token("current", exp=int(now) + 60)
+    assert verifier.verify(expiring)["role"] == "admin"
+    assert verifier.cached() == 1
+
+    # Served from the cache, so only the stored exp stands between it and a replay
+    monkeypatch.setattr(auth.time, "time", lambda: now + 61)
+    with pytest.raises(InvalidToken):
+        verifier.verify(expiring)
+    assert verifier.cached() == 0
+
+
+def test_token_signed_with_a_previous_secret_is_accepted():
+    verifier = TokenVerifier(parse_secrets("current", " old-1 , old-2"))
+    assert verifier.secrets == ["current", "old-1", "old-2"]
+    assert verifier.verify(token("old-2", exp=int(time.time()) + 60))["email"] == "admin@lsweb.com"
+    # New tokens are signed with the current secret only
+    assert jwt.decode(verifier.encode({"exp": int(time.time()) + 60}), "current", algorithms=["HS256"])
+
+    with pytest.raises(InvalidToken):
+        verifier.verify(token("retired", exp=int(time.time()) + 60))
+
+
+@pytest.mark.parametrize("bad", [
+    token("current"),
+    token("other", exp=int(time.time()) + 60),
+    token("current", exp=int(time.time()) - 60),
+    "not-a-jwt",
+])
+def test_invalid_tokens_are_rejected_and_not_cached(bad):
+    verifier = TokenVerifier(["current"])
+    for _ in range(2):
+        with pytest.raises(InvalidToken):
+            verifier.verify(bad)
+    assert verifier.cached() == 0
+
+
+@pytest.fixture
+def client(server):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test")
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("headers", [
+    {},
+    {"Authorization": "Bearer not-a-jwt"},
+    {"Authorization": f"Bearer {token('wrong-secret', exp=int(time.time()) + 3600)}"},
+])
+async def test_missing_or_invalid_token_is_401_with_a_challenge(client, headers):
+    async with client:
+        response = await client.get("/api/contact-requests", headers=headers)
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+@pytest.mark.anyio
+async def test_non_admin_role_is_403(server, client):
+    user = server.create_jwt_token("cliente@example.com", "user")
+    admin = server.create_jwt_token("admin@lsweb.com", "admin")
+    async with client:
+        response = await client.get("/api/contact-requests", headers={"Authorization": f"Bearer {user}"})
+        assert response.status_code == 403
+        assert "WWW-Authenticate" not in response.headers
+        response = await client.get("/api/contact-requests", headers={"Authorization": f"Bearer {admin}"})
+        assert response.status_code == 200
@@ -0,0 +1,22 @@
+import pytest
+
+
+@pytest.mark.parametrize("budget, min_budget, priority", [
+    # The values of the budget <select> on the home page
+    ("500-1000", 5000, False),
+    ("1000-2500", 5000, False),
+    ("2500-5000", 5000, False),
+    ("5000+", 5000, True),
+    ("por-definir", 5000, False),
+    (None, 5000, False),
+    ("2500-5000", 2500, True),
+    ("1000-2500", 2500, False),
+])
+def test_priority_by_the_lower_bound_of_the_budget_range(server, monkeypatch, budget, min_budget, priority):
+    monkeypatch.setattr(server, "EMAIL_DIGEST_PRIORITY_MIN_BUDGET", min_budget)
+    assert server.is_priority_lead({"project_type": "landing-page", "budget": budget}) is priority
+
+
+def test_priority_project_types_ignore_the_budget(server):
+    project_type = next(iter(server.priority_project_types))
+    assert server.is_priority_lead({"project_type": project_type, "budget": "por-definir"})
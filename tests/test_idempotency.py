@@ -0,0 +1,115 @@
+"""Concurrent identical submissions must store one row and queue one email, all answered with its id"""
+import asyncio
+
+import httpx
+import pytest
+
+from idempotency import IdempotencyCache, SQLiteIdempotencyStore
+
+pytestmark = pytest.mark.anyio
+
+REQUESTS = 20
+
+
+@pytest.fixture
+def inserts(server, monkeypatch):
+    """Slows every insert down so the requests overlap; `fail_next` makes the next ones fail"""
+    insert = server.storage.insert_contact_request
+    state = {"fail_next": 0}
+
+    async def slow_insert(data):
+        await asyncio.sleep(0.05)
+        if state["fail_next"]:
+            state["fail_next"] -= 1
+            raise RuntimeError("database unavailable")
+        await insert(data)
+
+    monkeypatch.setattr(server.storage, "insert_contact_request", slow_insert)
+    return state
+
+
+@pytest.fixture
+async def client(server):
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+def submission(name: str, **fields) -> dict:
+    body = {"name": name, "email": "cliente@example.com", "projectType": "landing-page",
+            "description": f"Necesitamos una landing page para {name}."}
+    body.update(fields)
+    return body
+
+
+async def stored(server, name: str) -> list:
+    return [row["id"] async for row in server.storage.iter_contact_requests() if row["name"] == name]
+
+
+def queued(server, name: str) -> list:
+    rows = server.outbox.store._conn.execute(
+        "SELECT reference_id FROM email_outbox WHERE subject = ?", (f"Nueva Solicitud de Web - {name}",)
+    )
+    return [row["reference_id"] for row in rows]
+
+
+async def check_single_submission(server, name: str, ids: set) -> None:
+    assert len(ids) == 1
+    assert await stored(server, name) == list(ids)
+    assert queued(server, name) == list(ids)
+
+
+@pytest.mark.parametrize("fail_first", [False, True])
+async def test_racing_requests_with_the_same_idempotency_key(server, inserts, client, fail_first):
+    name = f"Cliente con clave {fail_first}"
+    inserts["fail_next"] = int(fail_first)
+    # Retries may change the body; the key alone decides
+    responses = await asyncio.gather(*(
+        client.post("/api/contact-request", json=submission(name, description=f"Intento número {i} de la landing."),
+                    headers={"Idempotency-Key": f"race-{fail_first}"})
+        for i in range(REQUESTS)
+    ))
+
+    ok = [r for r in responses if r.status_code == 200]
+    # Only the request whose insert failed sees the error; a waiting one takes over
+    assert len(ok) == REQUESTS - fail_first
+    assert sum(r.headers.get("Idempotent-Replayed") == "true" for r in ok) == len(ok) - 1
+    await check_single_submission(server, name, {r.json()["id"] for r in ok})
+
+
+@pytest.mark.parametrize("fail_first", [False, True])
+async def test_racing_requests_with_the_same_body(server, inserts, client, fail_first):
+    name = f"Cliente sin clave {fail_first}"
+    inserts["fail_next"] = int(fail_first)
+    # Case and whitespace differences still make the same fingerprint
+    bodies = [submission(name, email="Cliente@Example.com " if i % 2 else "cliente@example.com",
+                         description=f"Necesitamos una  landing page\npara {name}.")
+              if i % 3 else submission(name) for i in range(REQUESTS)]
+    responses = await asyncio.gather(*(client.post("/api/contact-request", json=body) for body in bodies))
+
+    ok = [r for r in responses if r.status_code == 200]
+    assert len(ok) == REQUESTS - fail_first
+    assert sum(r.headers.get("Idempotent-Replayed") == "true" for r in ok) == len(ok) - 1
+    await check_single_submission(server, name, {r.json()["id"] for r in ok})
+
+
+@pytest.mark.parametrize("fail_first", [False, True])
+async def test_racing_requests_across_workers_sharing_a_store(server, inserts, tmp_path, fail_first):
+    name = f"Cliente en dos workers {fail_first}"
+    inserts["fail_next"] = int(fail_first)
+    path = str(tmp_path / "idempotency.sqlite3")
+    # Each worker has its own in-process cache; only the SQLite file is shared
+    workers = [IdempotencyCache(store=SQLiteIdempotencyStore(path), poll_interval=0.01) for _ in range(2)]
+
+    async def submit(i: int):
+        contact = server.ContactRequest(name=name, email="cliente@example.com", phone=None, company=None,
+                                        project_type="landing-page", budget=None, timeline=None,
+                                        description=f"Necesitamos una landing page para {name}.")
+        return await workers[i % 2].run("key:shared", contact.id, lambda: server.store_contact_request(contact))
+
+    results = await asyncio.gather(*(submit(i) for i in range(REQUESTS)), return_exceptions=True)
+
+    ok = [result for result in results if not isinstance(result, Exception)]
+    assert len(ok) == REQUESTS - fail_first
+    assert [replayed for _, replayed in ok].count(False) == 1
+    await check_single_submission(server, name, {request_id for request_id, _ in ok})
@@ -0,0 +1,122 @@
+"""ETag revalidation of the dashboard list and the cache behind it"""
+import uuid
+
+import httpx
+import pytest
+
+from response_cache import ResponseCache, etag_matches, make_etag
+from storage.sqlite import SQLiteStorage
+
+pytestmark = pytest.mark.anyio
+
+
+def test_etag_matching():
+    etag = make_etag(b'{"items":[]}')
+    assert etag == make_etag(b'{"items":[]}') != make_etag(b'{"items":[1]}')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
+
+
+def test_body_computed_before_a_bump_is_not_stored():
+    cache = ResponseCache()
+    version = cache.version
+    cache.bump()
+    etag = cache.put("page", version, b"stale")
+    assert etag == make_etag(b"stale")
+    assert cache.get("page") is None
+
+
+@pytest.fixture
+async def client(server, monkeypatch):
+    # A table and a cache of its own, whatever other tests stored
+    monkeypatch.setattr(server, "storage", SQLiteStorage())
+    monkeypatch.setattr(server, "contact_writer", None)
+    monkeypatch.setattr(server, "list_cache", ResponseCache())
+    token = server.create_jwt_token("admin@lsweb.com", "admin")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test",
+                                 headers={"Authorization": f"Bearer {token}"}) as client:
+        yield client
+    server.storage._conn.close()
+
+
+async def submit(client, project_type: str = "landing-page") -> str:
+    response = await client.post("/api/contact-request", json={
+        "name": "Cliente", "email": "cliente@example.com", "projectType": project_type,
+        "description": f"Necesitamos una web nueva {uuid.uuid4()}",
+    })
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+async def test_matching_if_none_match_is_304_without_a_body(server, client):
+    await submit(client)
+    first = await client.get("/api/contact-requests")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    response = await client.get("/api/contact-requests", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    # Served from the cache, not from storage
+    assert len(server.list_cache) == 1
+
+    response = await client.get("/api/contact-requests", headers={"If-None-Match": '"stale"'})
+    assert (response.status_code, response.content) == (200, first.content)
+
+
+async def test_insert_invalidates_the_etag(server, client):
+    await submit(client)
+    etag = (await client.get("/api/contact-requests")).headers["ETag"]
+    await submit(client)
+    assert len(server.list_cache) == 0
+
+    response = await client.get("/api/contact-requests", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(response.json()["items"]) == 2
+
+
+async def test_status_change_invalidates_the_etag(client):
+    request_id = await submit(client)
+    etag = (await client.get("/api/contact-requests")).headers["ETag"]
+
+    response = await client.patch("/api/contact-requests/status", json={"ids": [request_id], "status": "contacted"})
+    assert response.json()["updated"] == 1
+    response = await client.get("/api/contact-requests", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["items"][0]["status"] == "contacted"
+
+    # Setting the same status again changes nothing, and the new ETag still holds
+    etag = response.headers["ETag"]
+    response = await client.patch("/api/contact-requests/status", json={"ids": [request_id], "status": "contacted"})
+    assert response.json()["updated"] == 0
+    assert (await client.get("/api/contact-requests", headers={"If-None-Match": etag})).status_code == 304
+
+
+async def test_filters_and_cursors_never_share_an_entry(server, client):
+    for project_type in ("landing-page", "landing-page", "ecommerce"):
+        await submit(client, project_type)
+    first_page = await client.get("/api/contact-requests", params={"limit": 1})
+    cursor = first_page.json()["next_cursor"]
+    responses = [
+        first_page,
+        await client.get("/api/contact-requests", params={"limit": 1, "cursor": cursor}),
+        await client.get("/api/contact-requests", params={"limit": 2}),
+        await client.get("/api/contact-requests", params={"project_type": "landing-page"}),
+        await client.get("/api/contact-requests", params={"project_type": "ecommerce"}),
+        await client.get("/api/contact-requests", params={"status": "contacted"}),
+    ]
+    assert [len(response.json()["items"]) for response in responses] == [1, 1, 2, 2, 1, 0]
+    assert len({response.headers["ETag"] for response in responses}) == len(responses)
+    assert len(server.list_cache) == len(responses)
+
+    # Each query still revalidates against its own entry only
+    response = await client.get("/api/contact-requests", params={"limit": 1, "cursor": cursor},
+                                headers={"If-None-Match": first_page.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.content == responses[1].content
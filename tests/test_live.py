@@ -0,0 +1,128 @@
+"""Live feed: resuming from Last-Event-ID, heartbeats, slow subscribers and access to the stream"""
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from live import PING, RESET, LiveBroker, event_id, stream_events
+
+pytestmark = pytest.mark.anyio
+
+BASE = datetime(2024, 1, 1)
+
+
+def rows(count: int) -> list:
+    return [{"id": str(uuid.uuid4()), "name": f"Cliente {i}", "email": "cliente@example.com",
+             "project_type": "landing-page", "created_at": BASE + timedelta(seconds=i), "status": "pending"}
+            for i in range(count)]
+
+
+def ids_in(body: bytes) -> list:
+    return [line[len(b"id: "):].decode() for line in body.split(b"\n") if line.startswith(b"id: ")]
+
+
+async def collect(broker: LiveBroker, backlog: list) -> bytes:
+    """Body of a stream that ends right after its backlog"""
+    subscription = broker.subscribe()
+    return b"".join([chunk async for chunk in stream_events(broker, subscription, backlog, max_age=0)])
+
+
+async def test_since_returns_what_followed_the_last_event_id():
+    broker = LiveBroker(history_size=3)
+    published = rows(5)
+    for row in published:
+        assert broker.publish(row)
+    # The storage change feed echoing a local row
+    assert not broker.publish(published[-1])
+
+    backlog = broker.since(published[2]["id"])
+    assert [row_id for row_id, _ in backlog] == [published[3]["id"], published[4]["id"]]
+    assert broker.since(published[4]["id"]) == []
+    # Older than the history
+    assert broker.since(published[1]["id"]) is None
+
+    body = await collect(broker, backlog)
+    assert body.startswith(b"retry: ")
+    assert ids_in(body) == [event_id(row) for row in published[3:]]
+
+
+async def test_heartbeat_pings_idle_subscribers_only():
+    broker = LiveBroker(heartbeat=0.05)
+    idle, busy = broker.subscribe(), broker.subscribe()
+    broker.start()
+    try:
+        broker.publish(rows(1)[0])
+        assert (await asyncio.wait_for(idle.get(), 1))[1].startswith(b"id: ")
+        assert await asyncio.wait_for(idle.get(), 1) == (None, PING)
+        # The unread event is still waiting: nothing piled up behind it
+        await asyncio.sleep(0.15)
+        assert busy.queue.qsize() == 1
+    finally:
+        await broker.stop()
+    assert await idle.get() is None and await busy.get() is None
+    assert not broker.subscribers
+
+
+async def test_slow_subscriber_is_dropped_without_blocking_the_publisher():
+    broker = LiveBroker(queue_size=2)
+    slow, fast = broker.subscribe(), broker.subscribe()
+    published = rows(50)
+    received = []
+    start = time.perf_counter()
+    for row in published:
+        broker.publish(row)
+        received.append(fast.queue.get_nowait()[0])
+    assert time.perf_counter() - start < 1
+    assert received == [row["id"] for row in published]
+
+    assert slow.dropped and not fast.dropped
+    assert broker.dropped == 1
+    assert broker.subscribers == {fast}
+    # Its queue was discarded and the stream ends at once
+    assert slow.queue.qsize() == 1
+    body = b"".join([chunk async for chunk in stream_events(broker, slow, [])])
+    assert ids_in(body) == []
+
+    # Reconnecting with the last id it got, it catches up from history
+    last_seen = published[1]["id"]
+    assert [row_id for row_id, _ in broker.since(last_seen)] == [row["id"] for row in published[2:]]
+
+
+@pytest.fixture
+async def client(server, monkeypatch):
+    monkeypatch.setattr(server, "live_broker", LiveBroker())
+    # Streams end after their backlog, so a whole response can be read
+    monkeypatch.setattr(server, "LIVE_STREAM_MAX_AGE", 0)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test") as client:
+        yield client
+
+
+async def test_stream_resumes_after_last_event_id(server, client):
+    published = rows(4)
+    for row in published:
+        server.live_broker.publish(row)
+    headers = {"Authorization": f"Bearer {server.create_jwt_token('admin@lsweb.com', 'admin')}"}
+
+    response = await client.get("/api/contact-requests/stream",
+                                headers={**headers, "Last-Event-ID": event_id(published[1])})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert ids_in(response.content) == [event_id(row) for row in published[2:]]
+
+    response = await client.get("/api/contact-requests/stream", headers={**headers, "Last-Event-ID": "garbage"})
+    assert response.content.endswith(RESET)
+    assert not server.live_broker.subscribers
+
+
+@pytest.mark.parametrize("role, status", [(None, 401), ("user", 403)])
+async def test_stream_requires_an_admin(server, client, role, status):
+    headers = {"Authorization": f"Bearer {server.create_jwt_token('cliente@example.com', role)}"} if role else {}
+    response = await client.get("/api/contact-requests/stream", headers=headers)
+    assert response.status_code == status
+    if status == 401:
+        assert response.headers["WWW-Authenticate"] == "Bearer"
+    # Rejected before subscribing
+    assert not server.live_broker.subscribers
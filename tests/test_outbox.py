@@ -0,0 +1,105 @@
+"""OutboxWorker retries, dead letters and leases on SQLiteOutboxStore"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from outbox import (STATUS_DEAD, STATUS_PENDING, STATUS_SENT, OutboxWorker, SQLiteOutboxStore,
+                    new_outbox_message)
+
+pytestmark = pytest.mark.anyio
+
+
+class FlakySend:
+    """`send` stub that fails its first `failures` calls"""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    async def __call__(self, message: dict) -> None:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError(f"relay down ({self.calls})")
+
+
+async def make_due(store: SQLiteOutboxStore, message_id: str) -> None:
+    await store._run(store._update, message_id, {"next_attempt_at": datetime.utcnow() - timedelta(seconds=1)})
+
+
+async def enqueued(worker: OutboxWorker) -> dict:
+    message = new_outbox_message("admin@lsweb.com", "Nueva Solicitud de Web", "<p>Hola</p>")
+    await worker.enqueue(message)
+    return message
+
+
+async def test_failures_back_off_exponentially_up_to_max_delay():
+    store = SQLiteOutboxStore()
+    worker = OutboxWorker(store, FlakySend(failures=4), max_attempts=10, base_delay=30, max_delay=100)
+    message = await enqueued(worker)
+
+    delays = []
+    for attempt in range(1, 5):
+        before = datetime.utcnow()
+        assert await worker.run_once() == 1
+        stored = await store.get(message["id"])
+        assert (stored["status"], stored["attempts"]) == (STATUS_PENDING, attempt)
+        assert stored["last_error"] == f"relay down ({attempt})"
+        delays.append(round((stored["next_attempt_at"] - before).total_seconds()))
+        # Not due yet: the next pass claims nothing
+        assert await worker.run_once() == 0
+        await make_due(store, message["id"])
+    assert delays == [30, 60, 100, 100]
+
+    assert await worker.run_once() == 1
+    stored = await store.get(message["id"])
+    assert (stored["status"], stored["attempts"], stored["last_error"]) == (STATUS_SENT, 5, None)
+    assert worker.results == {"sent": 1, "retry": 4, "dead": 0, "digested": 0}
+
+
+async def test_message_is_dead_lettered_at_max_attempts():
+    store = SQLiteOutboxStore()
+    send = FlakySend(failures=100)
+    worker = OutboxWorker(store, send, max_attempts=3)
+    message = await enqueued(worker)
+
+    for _ in range(3):
+        assert await worker.run_once() == 1
+        await make_due(store, message["id"])
+    stored = await store.get(message["id"])
+    assert (stored["status"], stored["attempts"], stored["last_error"]) == (STATUS_DEAD, 3, "relay down (3)")
+    assert worker.results["retry"] == 2 and worker.results["dead"] == 1
+
+    # Dead letters stay parked even once their time comes
+    assert await worker.run_once() == 0
+    assert send.calls == 3
+
+
+async def test_expired_lease_makes_a_claimed_message_due_again():
+    store = SQLiteOutboxStore()
+    message = new_outbox_message("admin@lsweb.com", "Nueva Solicitud de Web", "<p>Hola</p>")
+    await store.enqueue(message)
+    now = datetime.utcnow()
+    lease = timedelta(seconds=60)
+
+    # A worker claims it and dies before recording the outcome
+    assert [row["id"] for row in await store.claim_due(now, 10, lease)] == [message["id"]]
+    # Other workers leave it alone while the lease holds
+    assert await store.claim_due(now + timedelta(seconds=59), 10, lease) == []
+
+    claimed = await store.claim_due(now + timedelta(seconds=61), 10, lease)
+    assert [(row["id"], row["attempts"]) for row in claimed] == [(message["id"], 2)]
+
+
+async def test_worker_resends_a_message_whose_lease_expired():
+    store = SQLiteOutboxStore()
+    send = FlakySend(failures=0)
+    worker = OutboxWorker(store, send, lease=300)
+    message = await enqueued(worker)
+    await store.claim_due(datetime.utcnow(), 10, timedelta(seconds=300))
+    assert await worker.run_once() == 0
+
+    # Lease over: as if 300 s went by
+    await make_due(store, message["id"])
+    assert await worker.run_once() == 1
+    stored = await store.get(message["id"])
+    assert (stored["status"], stored["attempts"], send.calls) == (STATUS_SENT, 2, 1)
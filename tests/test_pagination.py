@@ -0,0 +1,75 @@
+"""Keyset pages stay as fast deep in a large table as on the first page"""
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from storage.sqlite import SQLiteStorage
+
+ROWS = 100_000
+LIMIT = 50
+BASE = datetime(2024, 1, 1)
+
+
+@pytest.fixture(scope="module")
+def large_table():
+    storage = SQLiteStorage()
+    # Two rows per second, so the deep cursor has ties to break on id
+    storage._insert_many([{
+        "id": str(uuid.UUID(int=i)), "name": f"Cliente {i}", "email": f"cliente{i}@example.com", "phone": None,
+        "company": None, "project_type": "landing-page", "budget": None, "timeline": None,
+        "description": "Necesitamos una web nueva.", "created_at": BASE + timedelta(seconds=i // 2),
+        "status": "contacted" if i % 10 == 0 else "pending",
+    } for i in range(ROWS)])
+    yield storage
+    storage._conn.close()
+
+
+def latency(storage, cursor, filters=None) -> float:
+    samples = []
+    for _ in range(30):
+        start = time.perf_counter()
+        rows = storage._page(LIMIT, cursor, filters)
+        samples.append(time.perf_counter() - start)
+    assert len(rows) == LIMIT + 1
+    return statistics.median(samples)
+
+
+@pytest.mark.parametrize("filters", [None, {"status": "contacted"}])
+def test_deep_page_latency_stays_close_to_the_first_page(large_table, filters):
+    where = "WHERE status = 'contacted'" if filters else ""
+    matching = ROWS if filters is None else ROWS // 10
+    # What OFFSET paging would read: the cursor of the last row before the final few pages, and what follows it
+    deep_offset = matching - 3 * LIMIT
+    rows = large_table._conn.execute(
+        f"SELECT created_at, id FROM contact_requests {where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+        (LIMIT + 2, deep_offset)
+    ).fetchall()
+    cursor = tuple(rows[0])
+    assert [row["id"] for row in large_table._page(LIMIT, cursor, filters)] == [row[1] for row in rows[1:]]
+
+    first, deep = latency(large_table, None, filters), latency(large_table, cursor, filters)
+    # An OFFSET (or a missing index) would walk ~100k rows here, hundreds of times the first page
+    assert deep < 3 * first + 0.001, f"first page {first * 1000:.3f} ms, page {deep_offset // LIMIT}: {deep * 1000:.3f} ms"
+
+
+@pytest.mark.parametrize("filters, index", [
+    (None, "idx_contact_requests_created_at_id"),
+    ({"status": "contacted"}, "idx_contact_requests_status"),
+])
+def test_pages_seek_into_the_index(large_table, filters, index, monkeypatch):
+    plans = []
+    execute = large_table._conn.execute
+
+    class Connection:
+        def execute(self, sql, params=()):
+            plans.append(" ".join(row[-1] for row in execute(f"EXPLAIN QUERY PLAN {sql}", params)))
+            return execute(sql, params)
+
+    monkeypatch.setattr(large_table, "_conn", Connection())
+    large_table._page(LIMIT, ("2024-01-02T00:00:00", str(uuid.UUID(int=0))), filters)
+    # A SEARCH starts at the cursor; a SCAN walks every newer row first
+    assert plans == [f"SEARCH contact_requests USING INDEX {index} ({'status=? AND ' if filters else ''}"
+                     "(created_at,id)<(?,?))"]
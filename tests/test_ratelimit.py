@@ -0,0 +1,52 @@
+import httpx
+import pytest
+
+from ratelimit import MemoryBucketStore, RateLimitMiddleware, Rule
+
+pytestmark = pytest.mark.anyio
+
+
+async def ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def limited_client(trusted_proxies: int) -> httpx.AsyncClient:
+    app = RateLimitMiddleware(ok, MemoryBucketStore(), {("POST", "/api/contact-request"): Rule("contact", 2, 60)},
+                              trusted_proxies=trusted_proxies)
+    transport = httpx.ASGITransport(app=app, client=("10.0.0.2", 4321))
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+async def statuses(client, forwarded_for: list) -> list:
+    return [(await client.post("/api/contact-request", headers=headers)).status_code
+            for headers in ({"X-Forwarded-For": value} for value in forwarded_for)]
+
+
+async def test_forged_forwarded_for_entries_do_not_reset_the_limit():
+    async with limited_client(trusted_proxies=1) as client:
+        # The proxy appended 203.0.113.7; what the client sent in front of it changes every time
+        forged = [f"198.51.100.{i}, 203.0.113.7" for i in range(4)]
+        assert await statuses(client, forged) == [200, 200, 429, 429]
+        assert await statuses(client, ["203.0.113.8"]) == [200]
+
+
+async def test_client_is_counted_from_the_right_behind_several_proxies():
+    async with limited_client(trusted_proxies=2) as client:
+        # Client, then the outer proxy's address added by the inner proxy
+        forged = [f"198.51.100.{i}, 203.0.113.7, 10.0.0.1" for i in range(3)]
+        assert await statuses(client, forged) == [200, 200, 429]
+        # Repeated headers count as one list
+        response = await client.post("/api/contact-request", headers=[
+            ("X-Forwarded-For", "198.51.100.9, 203.0.113.7"), ("X-Forwarded-For", "10.0.0.1"),
+        ])
+        assert response.status_code == 429
+
+
+async def test_peer_address_without_enough_forwarded_entries():
+    async with limited_client(trusted_proxies=2) as client:
+        # Did not come through both proxies: the header is ignored, so all share the peer's bucket
+        assert await statuses(client, ["198.51.100.1", "198.51.100.2", "198.51.100.3"]) == [200, 200, 429]
+
+    async with limited_client(trusted_proxies=0) as client:
+        assert await statuses(client, ["198.51.100.1", "198.51.100.2", "198.51.100.3"]) == [200, 200, 429]
@@ -0,0 +1,210 @@
+"""Circuit breakers and deadlines against local fakes that hang, reset connections and fail"""
+import asyncio
+import email.message
+import time
+import uuid
+
+import aiosmtplib
+import httpx
+import pytest
+
+from outbox import OutboxWorker, SQLiteOutboxStore, new_outbox_message
+from resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+from smtp_pool import SMTPPool
+from storage.supabase import SupabaseStorage
+
+pytestmark = pytest.mark.anyio
+
+DEADLINE = 0.3
+RESET = 0.3
+
+
+def supabase(postgrest) -> SupabaseStorage:
+    return SupabaseStorage(postgrest.url, "test-key", read_retries=0, deadline=DEADLINE,
+                           breaker=CircuitBreaker("supabase", failure_threshold=2, reset_timeout=RESET))
+
+
+def smtp_pool(smtp_server) -> SMTPPool:
+    return SMTPPool("127.0.0.1", smtp_server.port, "test", "test", start_tls=False, timeout=5, deadline=DEADLINE,
+                    breaker=CircuitBreaker("smtp", failure_threshold=2, reset_timeout=RESET))
+
+
+def message(recipient: str = "admin@lsweb.com") -> email.message.EmailMessage:
+    msg = email.message.EmailMessage()
+    msg["From"], msg["To"], msg["Subject"] = "web@lsweb.com", recipient, "Nueva Solicitud de Web"
+    msg.set_content("Hola")
+    return msg
+
+
+def test_breaker_states_on_a_clock():
+    now = [0.0]
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=10, clock=lambda: now[0])
+    for _ in range(2):
+        breaker.acquire()
+        breaker.release(False)
+    # A success in between resets the count
+    breaker.acquire()
+    breaker.release(True)
+    for _ in range(3):
+        assert breaker.state == CLOSED
+        breaker.acquire()
+        breaker.release(False)
+    assert (breaker.state, breaker.opened) == (OPEN, 1)
+
+    now[0] = 4.0
+    with pytest.raises(CircuitOpen) as raised:
+        breaker.acquire()
+    assert raised.value.retry_after == 6.0
+    assert breaker.rejected == 1
+
+    now[0] = 10.0
+    assert breaker.state == HALF_OPEN
+    breaker.acquire()
+    # One probe at a time
+    with pytest.raises(CircuitOpen):
+        breaker.acquire()
+    breaker.release(False)
+    assert (breaker.state, breaker.opened) == (OPEN, 2)
+
+    now[0] = 20.0
+    breaker.acquire()
+    # A cancelled probe decides nothing and frees its slot
+    breaker.release(None)
+    assert breaker.state == HALF_OPEN
+    breaker.acquire()
+    breaker.release(True)
+    assert breaker.state == CLOSED
+
+
+@pytest.mark.parametrize("fault", ["error", "reset", "hang"])
+async def test_supabase_breaker_opens_fails_fast_and_recovers(postgrest, fault):
+    storage = supabase(postgrest)
+    await storage.get_user_by_email("admin@lsweb.com")
+
+    postgrest.fault = fault
+    for _ in range(2):
+        with pytest.raises(Exception) as raised:
+            await storage.get_user_by_email("admin@lsweb.com")
+        assert not isinstance(raised.value, CircuitOpen)
+    assert storage.breaker.state == OPEN
+
+    # Open: no request reaches the upstream
+    requests = postgrest.requests
+    with pytest.raises(CircuitOpen):
+        await storage.get_user_by_email("admin@lsweb.com")
+    assert postgrest.requests == requests
+
+    # A failed probe opens it again
+    await asyncio.sleep(RESET)
+    assert storage.breaker.state == HALF_OPEN
+    with pytest.raises(Exception):
+        await storage.get_user_by_email("admin@lsweb.com")
+    assert (storage.breaker.state, storage.breaker.opened) == (OPEN, 2)
+
+    postgrest.fault = None
+    await asyncio.sleep(RESET)
+    assert await storage.get_user_by_email("admin@lsweb.com") is None
+    assert storage.breaker.state == CLOSED
+    await storage.close()
+
+
+async def test_deadline_bounds_a_hung_supabase(postgrest):
+    storage = supabase(postgrest)
+    await storage.get_user_by_email("admin@lsweb.com")
+    postgrest.fault = "hang"
+    start = time.perf_counter()
+    with pytest.raises(httpx.TimeoutException):
+        await storage.get_user_by_email("admin@lsweb.com")
+    assert DEADLINE <= time.perf_counter() - start < DEADLINE + 0.5
+    postgrest.fault = None
+    await storage.close()
+
+
+async def test_deadline_bounds_a_hung_smtp_relay(smtp_server):
+    pool = smtp_pool(smtp_server)
+    smtp_server.fault = "hang"
+    start = time.perf_counter()
+    with pytest.raises(asyncio.TimeoutError):
+        await pool.send(message())
+    assert DEADLINE <= time.perf_counter() - start < DEADLINE + 0.5
+    assert pool.breaker._failures == 1
+    smtp_server.fault = None
+    await pool.close()
+
+
+async def test_api_answers_503_with_retry_after_while_storage_is_open(server, postgrest, monkeypatch):
+    monkeypatch.setattr(server, "storage", supabase(postgrest))
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async def submit(i: int) -> httpx.Response:
+            return await client.post("/api/contact-request", json={
+                "name": "Cliente", "email": "cliente@example.com", "projectType": "landing-page",
+                "description": f"Solicitud durante la caída {uuid.uuid4()} {i}",
+            })
+
+        postgrest.fault = "error"
+        assert [(await submit(i)).status_code for i in range(2)] == [500, 500]
+        requests = postgrest.requests
+        response = await submit(2)
+        assert response.status_code == 503
+        assert 1 <= int(response.headers["Retry-After"]) <= 1 + RESET
+        assert postgrest.requests == requests
+
+        postgrest.fault = None
+        await asyncio.sleep(RESET)
+        assert (await submit(3)).status_code == 200
+    await server.storage.close()
+
+
+async def test_421_counts_against_the_relay_but_a_refused_recipient_does_not(smtp_server):
+    pool = smtp_pool(smtp_server)
+    smtp_server.refused.add("nadie@example.com")
+    for _ in range(5):
+        with pytest.raises(aiosmtplib.SMTPRecipientsRefused):
+            await pool.send(message("nadie@example.com"))
+    assert (pool.breaker.state, pool.breaker._failures) == (CLOSED, 0)
+    # In a batch it only fails its own message
+    results = await pool.send_many([message(), message("nadie@example.com"), message()])
+    assert [type(result) for result in results] == [type(None), aiosmtplib.SMTPRecipientsRefused, type(None)]
+    assert pool.breaker._failures == 0
+
+    # The relay refusing service is a relay failure, whichever command it answers
+    smtp_server.fault = "error"
+    for _ in range(2):
+        with pytest.raises(aiosmtplib.SMTPResponseException) as raised:
+            await pool.send(message())
+        assert raised.value.code == 421
+    assert pool.breaker.state == OPEN
+    with pytest.raises(CircuitOpen):
+        await pool.send(message())
+    smtp_server.fault = None
+    await pool.close()
+
+
+async def test_outbox_claims_nothing_while_the_smtp_breaker_is_open(smtp_server):
+    pool = smtp_pool(smtp_server)
+    store = SQLiteOutboxStore()
+
+    async def send(row: dict) -> None:
+        await pool.send(message(row["recipient"]))
+
+    worker = OutboxWorker(store, send, breaker=pool.breaker, base_delay=60)
+    smtp_server.fault = "reset"
+    for _ in range(2):
+        with pytest.raises(Exception):
+            await pool.send(message())
+    assert pool.breaker.state == OPEN
+
+    row = new_outbox_message(recipient="admin@lsweb.com", subject="Nueva Solicitud de Web", html="<p>Hola</p>")
+    await worker.enqueue(row)
+    assert await worker.run_once() == 0
+    stored = await store.get(row["id"])
+    # Not claimed, so no attempt is used up on a relay known to be down
+    assert (stored["status"], stored["attempts"]) == ("pending", 0)
+
+    smtp_server.fault = None
+    await asyncio.sleep(RESET)
+    assert await worker.run_once() == 1
+    assert (await store.get(row["id"]))["status"] == "sent"
+    assert pool.breaker.state == CLOSED
+    await pool.close()
@@ -0,0 +1,142 @@
+"""SMTPPool against FakeSMTPServer: session reuse, NOOP probes, reconnects and per-message errors"""
+import asyncio
+import email
+import email.message
+
+import aiosmtplib
+import pytest
+
+from smtp_pool import SMTPPool
+
+pytestmark = pytest.mark.anyio
+
+
+def pool_for(smtp_server, **kwargs) -> SMTPPool:
+    return SMTPPool("127.0.0.1", smtp_server.port, "test", "test", start_tls=False, timeout=5, **kwargs)
+
+
+def message(recipient: str = "admin@lsweb.com", subject: str = "Nueva Solicitud de Web") -> email.message.EmailMessage:
+    msg = email.message.EmailMessage()
+    msg["From"], msg["To"], msg["Subject"] = "web@lsweb.com", recipient, subject
+    msg.set_content("Hola")
+    return msg
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Count the NOOP and RSET commands every client sends"""
+    counts = {"noop": 0, "rset": 0}
+    for name in counts:
+        method = getattr(aiosmtplib.SMTP, name)
+
+        async def counted(self, *args, _name=name, _method=method, **kwargs):
+            counts[_name] += 1
+            return await _method(self, *args, **kwargs)
+
+        monkeypatch.setattr(aiosmtplib.SMTP, name, counted)
+    return counts
+
+
+async def test_sessions_are_reused(smtp_server, calls):
+    pool = pool_for(smtp_server)
+    for i in range(5):
+        await pool.send(message(subject=f"Solicitud {i}"))
+    assert (pool.connections_opened, smtp_server.connections, smtp_server.messages) == (1, 1, 5)
+    assert (pool.idle, pool.in_use) == (1, 0)
+    # Fresh sessions are trusted without a probe
+    assert calls["noop"] == 0
+    subjects = [email.message_from_bytes(raw)["Subject"] for raw in smtp_server.received]
+    assert subjects == [f"Solicitud {i}" for i in range(5)]
+    await pool.close()
+    assert pool.idle == 0
+
+
+async def test_sessions_are_recycled_after_max_messages(smtp_server):
+    pool = pool_for(smtp_server, max_messages=2)
+    for _ in range(5):
+        await pool.send(message())
+    assert (pool.connections_opened, smtp_server.messages) == (3, 5)
+    await pool.close()
+
+
+async def test_idle_session_is_probed_with_noop(smtp_server, calls):
+    pool = pool_for(smtp_server, noop_after=0.1)
+    await pool.send(message())
+    await pool.send(message())
+    assert calls["noop"] == 0
+
+    await asyncio.sleep(0.2)
+    await pool.send(message())
+    assert calls["noop"] == 1
+    # The probe answered, so the session was kept
+    assert pool.connections_opened == 1
+    await pool.close()
+
+
+async def test_session_found_dead_by_the_probe_is_replaced(smtp_server, calls):
+    pool = pool_for(smtp_server, noop_after=0.1)
+    await pool.send(message())
+    await asyncio.sleep(0.2)
+    smtp_server.fault = "reset"
+
+    async def connect_after_restart():
+        # The relay restarted: the old session is gone, new ones work
+        smtp_server.fault = None
+        return await connect()
+
+    connect = pool._connect
+    pool._connect = connect_after_restart
+    await pool.send(message())
+    assert calls["noop"] == 1
+    assert (pool.connections_opened, smtp_server.messages) == (2, 2)
+    await pool.close()
+
+
+async def test_send_reconnects_when_the_session_drops_mid_message(smtp_server):
+    pool = pool_for(smtp_server)
+    await pool.send(message())
+    # Still looks connected to the pool; the reset hits the MAIL command
+    smtp_server.fault = "reset"
+
+    async def connect_after_restart():
+        smtp_server.fault = None
+        return await connect()
+
+    connect = pool._connect
+    pool._connect = connect_after_restart
+    await pool.send(message())
+    assert (pool.connections_opened, smtp_server.connections, smtp_server.messages) == (2, 2, 2)
+    # The replacement session went back to the pool with a fresh count
+    assert pool.idle == 1 and pool._idle[0].sent == 1
+    assert pool.breaker._failures == 0
+    await pool.close()
+
+
+async def test_send_many_reports_each_message_and_resets_after_a_refusal(smtp_server, calls):
+    pool = pool_for(smtp_server)
+    smtp_server.refused.add("nadie@example.com")
+    batch = [message("uno@example.com"), message("nadie@example.com"), message("dos@example.com"),
+             message("nadie@example.com"), message("tres@example.com")]
+    results = await pool.send_many(batch)
+
+    assert [result is None for result in results] == [True, False, True, False, True]
+    assert all(isinstance(results[i], aiosmtplib.SMTPRecipientsRefused) for i in (1, 3))
+    # aiosmtplib resets the envelope of a refused message and _send_many resets once more, so the next MAIL
+    # FROM starts a clean transaction whatever raised
+    assert calls["rset"] == 2 * 2
+    received = [email.message_from_bytes(raw)["To"] for raw in smtp_server.received]
+    assert received == ["uno@example.com", "dos@example.com", "tres@example.com"]
+    assert (pool.connections_opened, pool.idle) == (1, 1)
+    await pool.close()
+
+
+async def test_send_many_fails_the_rest_of_the_batch_when_the_relay_drops(smtp_server):
+    pool = pool_for(smtp_server)
+    await pool.send(message())
+    smtp_server.fault = "reset"
+    results = await pool.send_many([message(), message(), message()])
+    assert len(results) == 3
+    assert all(isinstance(result, (aiosmtplib.SMTPServerDisconnected, ConnectionError)) for result in results)
+    assert pool.breaker._failures == 1
+    smtp_server.fault = None
+    await pool.close()
@@ -0,0 +1,138 @@
+"""Write-ahead spool: where the file lives, and that acknowledged submissions survive crashes"""
+import asyncio
+import os
+import random
+import signal
+import subprocess
+import sys
+import uuid
+from datetime import datetime
+
+import pytest
+
+from benchmarks.fakes import FakePostgREST
+from spool import ContactRequestSpool, SpoolReplayer
+from storage.supabase import SupabaseStorage
+from tests.conftest import BACKEND_DIR
+
+pytestmark = pytest.mark.anyio
+
+# The crash test runs this file as the child process
+ROOT_PATH = os.pathsep.join((BACKEND_DIR, os.path.dirname(BACKEND_DIR)))
+
+
+def run_server_import(cwd, spool_path: str) -> str:
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, STORAGE_BACKEND="sqlite", CONTACT_SPOOL_PATH=spool_path,
+               OUTBOX_SQLITE_PATH="", RATE_LIMIT_ENABLED="false")
+    result = subprocess.run([sys.executable, "-c", "import server; print(server.CONTACT_SPOOL_PATH)"], cwd=cwd,
+                            env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip()
+
+
+def test_relative_spool_path_is_under_backend_and_not_opened_on_import(tmp_path):
+    relative = os.path.join(f"spool-test-{uuid.uuid4().hex}", "contact-spool.sqlite3")
+    expected = os.path.join(BACKEND_DIR, relative)
+    # The server started from backend/ and the CLI run from the repo root must share one file
+    for cwd in (tmp_path, BACKEND_DIR, os.path.dirname(BACKEND_DIR)):
+        assert run_server_import(cwd, relative) == expected
+    # Importing for a CLI command creates nothing anywhere
+    assert not os.path.exists(os.path.dirname(expected))
+    assert os.listdir(tmp_path) == []
+
+    absolute = str(tmp_path / "spool.sqlite3")
+    assert run_server_import(BACKEND_DIR, absolute) == absolute
+
+
+async def test_submission_is_acknowledged_from_the_spool_and_replayed(server, monkeypatch, tmp_path):
+    monkeypatch.setattr(server, "CONTACT_SPOOL_PATH", str(tmp_path / "spool.sqlite3"))
+    # Due for replay straight away
+    monkeypatch.setattr(server, "CONTACT_SPOOL_GRACE", 0)
+    server.open_contact_spool()
+    try:
+        async def insert_down(data):
+            raise RuntimeError("database unavailable")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(server.storage, "insert_contact_request", insert_down)
+            response = await server.create_contact_request(
+                server.ContactRequestCreate(name="Cliente del spool", email="spool@example.com",
+                                            projectType="landing-page", description="Guardada durante la caída."),
+                server.Response(), None
+            )
+        assert await server.contact_spool.count() == 1
+
+        assert await server.spool_replayer.run_once() == 1
+        stored = [row["id"] async for row in server.storage.iter_contact_requests()
+                  if row["email"] == "spool@example.com"]
+        assert stored == [response.id]
+        assert await server.contact_spool.count() == 0
+    finally:
+        await server.close_contact_spool()
+    assert server.contact_spool is None and server.spool_replayer is None
+
+
+def writer(spool_path: str, url: str) -> None:
+    """Child process of the crash test: runs the save path and prints each acknowledged id until killed"""
+
+    async def loop():
+        spool = ContactRequestSpool(spool_path, grace=0)
+        storage = SupabaseStorage(url, "test-key", read_retries=0)
+        i = 0
+        while True:
+            row = {"id": str(uuid.uuid4()), "name": "Cliente", "email": "cliente@example.com", "phone": None,
+                   "company": None, "project_type": "landing-page", "budget": None, "timeline": None,
+                   "description": "Necesitamos una landing page.", "created_at": datetime.utcnow(),
+                   "status": "pending"}
+            await spool.append(row)
+            try:
+                await storage.insert_contact_request(row)
+                spool.forget(row["id"])
+            except Exception:
+                pass
+            print(row["id"], flush=True)
+            i += 1
+            if i % 10 == 0:
+                await spool.flush()
+
+    asyncio.run(loop())
+
+
+async def test_acknowledged_submissions_survive_a_crash(tmp_path):
+    spool_path = str(tmp_path / "spool.sqlite3")
+    rng = random.Random(7)
+    acknowledged = set()
+    with FakePostgREST() as postgrest:
+        for round_ in range(8):
+            # Some rounds with the database down, so the spool holds rows it never stored
+            postgrest.fault = "error" if round_ % 3 == 1 else None
+            child = subprocess.Popen([sys.executable, __file__, spool_path, postgrest.url], stdout=subprocess.PIPE,
+                                     text=True, env=dict(os.environ, PYTHONPATH=ROOT_PATH))
+            # Killed at a random moment once it is writing
+            first = child.stdout.readline()
+            assert first.endswith("\n")
+            acknowledged.add(first.strip())
+            await asyncio.sleep(rng.uniform(0.05, 0.4))
+            child.send_signal(signal.SIGKILL)
+            out, _ = child.communicate()
+            # A partial last line is an id the child was still printing, not yet acknowledged
+            acknowledged.update(line for line in out.split("\n")[:-1] if line)
+        postgrest.fault = None
+
+        spool = ContactRequestSpool(spool_path)
+        storage = SupabaseStorage(postgrest.url, "test-key")
+        replayer = SpoolReplayer(spool, storage.insert_missing_contact_requests)
+        assert await spool.count()
+        while await spool.count():
+            assert await replayer.run_once()
+        await storage.close()
+        spool.close()
+
+        stored = [row["id"] for row in postgrest.tables["contact_requests"]]
+    assert len(acknowledged) > 8
+    assert acknowledged <= set(stored)
+    assert len(stored) == len(set(stored))
+
+
+if __name__ == "__main__":
+    writer(*sys.argv[1:])
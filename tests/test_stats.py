@@ -0,0 +1,92 @@
+import os
+import random
+import subprocess
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from storage.sqlite import SQLiteStorage
+from tests.conftest import BACKEND_DIR
+from tests.test_storage import full_scan
+
+pytestmark = pytest.mark.anyio
+
+
+def make_row(i: int, status: str = "pending", project_type: str = "landing-page") -> dict:
+    return {
+        "id": str(uuid.UUID(int=i)), "name": "Cliente", "email": "cliente@example.com", "phone": None,
+        "company": None, "project_type": project_type, "budget": None, "timeline": None,
+        "description": "Necesitamos una tienda online.", "created_at": datetime(2025, 1, 1) + timedelta(hours=i),
+        "status": status,
+    }
+
+
+STATUSES = ("pending", "contacted", "completed")
+# Values that need quoting or escaping in some backend's filters
+PROJECT_TYPES = ("landing-page", "e-commerce", "app-web", "blog.personal", "otro $tipo")
+# Rows near midnight in these zones land on another UTC day, which is the one counted
+ZONES = (timezone.utc, timezone(timedelta(hours=-3)), timezone(timedelta(hours=9)))
+
+
+def random_row(rng: random.Random) -> dict:
+    created_at = datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=rng.randrange(30 * 86400))
+    return dict(make_row(0, project_type=rng.choice(PROJECT_TYPES)), id=str(uuid.UUID(int=rng.getrandbits(128))),
+                created_at=created_at.astimezone(rng.choice(ZONES)))
+
+
+async def test_counters_match_a_full_scan_after_random_writes(storage):
+    rng = random.Random(7)
+    ids = []
+    for _ in range(3):
+        rows = [random_row(rng) for _ in range(120)]
+        for row in rows[:20]:
+            await storage.insert_contact_request(row)
+        await storage.insert_contact_requests(rows[20:])
+        # A replay of stored rows must not count them again
+        await storage.insert_missing_contact_requests(rng.sample(rows, 10) + [random_row(rng)])
+        ids += [row["id"] for row in rows]
+        for _ in range(40):
+            # Includes no-op updates and unknown ids
+            request_id = rng.choice(ids) if rng.random() < 0.9 else str(uuid.uuid4())
+            await storage.update_contact_request_status(request_id, rng.choice(STATUSES))
+        await storage.update_contact_request_statuses(rng.sample(ids, 30) + [str(uuid.uuid4())], rng.choice(STATUSES),
+                                                      expected_status=rng.choice((None, "pending")))
+
+        expected = await full_scan(storage)
+        assert await storage.contact_request_stats() == expected
+        assert await storage.rebuild_contact_request_stats() == expected
+    assert expected["total"] == 363
+
+
+async def test_sqlite_rebuild_recounts_from_the_table():
+    storage = SQLiteStorage()
+    await storage.insert_contact_requests([make_row(i, project_type="blog" if i % 3 else "e-commerce")
+                                           for i in range(30)])
+    await storage.update_contact_request_status(make_row(0)["id"], "contacted")
+    expected = await storage.contact_request_stats()
+    # Out-of-band edit the triggers never saw
+    storage._conn.execute("UPDATE contact_request_stats SET count = count + 7")
+
+    assert await storage.rebuild_contact_request_stats() == expected
+    assert await storage.contact_request_stats() == expected
+    assert expected["total"] == 30
+    assert expected["by_status"] == {"pending": 29, "contacted": 1}
+    assert expected["by_project_type"] == {"blog": 20, "e-commerce": 10}
+    await storage.close()
+
+
+def test_rebuild_stats_command_on_sqlite(tmp_path):
+    path = str(tmp_path / "stats.sqlite3")
+    storage = SQLiteStorage(path)
+    storage._insert_many([make_row(i) for i in range(5)])
+    storage._conn.execute("DELETE FROM contact_request_stats")
+    storage._conn.close()
+
+    env = dict(os.environ, STORAGE_BACKEND="sqlite", SQLITE_PATH=path, CONTACT_SPOOL_PATH="",
+               OUTBOX_SQLITE_PATH=str(tmp_path / "outbox.sqlite3"))
+    result = subprocess.run([sys.executable, "-m", "backend", "rebuild-stats"], cwd=os.path.dirname(BACKEND_DIR),
+                            env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert "Rebuilt stats for 5 contact requests (sqlite storage)" in result.stdout
@@ -0,0 +1,220 @@
+"""Conformance suite: every storage backend must behave the same through the Storage interface"""
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from pagination import decode_cursor
+from storage import STATUS_CONFLICT, STATUS_NOT_FOUND, STATUS_UNCHANGED, STATUS_UPDATED, StorageError
+from storage.base import CONTACT_REQUEST_FIELDS, contact_request_stat_keys, stats_from_counts
+
+pytestmark = pytest.mark.anyio
+
+BASE = datetime(2025, 3, 1, 12, 0, 0, 123000)
+
+
+def make_row(i: int, status: str = "pending", project_type: str = "landing-page", **fields) -> dict:
+    row = {
+        "id": str(uuid.UUID(int=i)), "name": f"Cliente {i}", "email": f"cliente{i}@example.com", "phone": None,
+        "company": None, "project_type": project_type, "budget": None, "timeline": None,
+        "description": "Necesitamos una web nueva para el negocio.",
+        # Three rows per second: pages must break ties on id
+        "created_at": BASE + timedelta(seconds=i // 3), "status": status,
+    }
+    row.update(fields)
+    return row
+
+
+def newest_first(rows):
+    return sorted(rows, key=lambda row: (row["created_at"], row["id"]), reverse=True)
+
+
+async def all_pages(storage, limit, filters=None):
+    ids, cursor = [], None
+    while True:
+        rows, next_cursor = await storage.page_contact_requests(limit, cursor, filters)
+        ids += [row["id"] for row in rows]
+        if next_cursor is None:
+            return ids
+        cursor = decode_cursor(next_cursor)
+
+
+async def full_scan(storage) -> dict:
+    counts = Counter()
+    async for row in storage.iter_contact_requests():
+        counts.update(contact_request_stat_keys(row))
+    return stats_from_counts((dimension, value, count) for (dimension, value), count in counts.items())
+
+
+@pytest.fixture
+async def seeded(storage):
+    rows = [make_row(i, status="contacted" if i % 4 == 0 else "pending",
+                     project_type="e-commerce" if i % 5 == 0 else "landing-page") for i in range(40)]
+    for row in rows[:10]:
+        await storage.insert_contact_request(row)
+    assert await storage.insert_contact_requests(rows[10:]) == [None] * 30
+    return rows
+
+
+async def test_insert_round_trips_the_api_fields(storage):
+    row = make_row(1, phone="+54 11 5555-5555", company="Tienda SA", budget="2500-5000", timeline="1-mes")
+    await storage.insert_contact_request(row)
+
+    [stored], next_cursor = await storage.page_contact_requests(10)
+    assert next_cursor is None
+    assert set(stored) == set(CONTACT_REQUEST_FIELDS)
+    # Naive UTC whatever the backend; Mongo keeps milliseconds
+    assert stored["created_at"].tzinfo is None
+    assert abs(stored["created_at"] - row["created_at"]) < timedelta(milliseconds=1)
+    assert {k: v for k, v in stored.items() if k != "created_at"} == {k: v for k, v in row.items() if k != "created_at"}
+
+
+async def test_aware_timestamps_are_stored_as_utc(storage):
+    local = timezone(timedelta(hours=-3))
+    await storage.insert_contact_request(make_row(1, created_at=datetime(2025, 3, 1, 22, 30, tzinfo=local)))
+
+    [stored], _ = await storage.page_contact_requests(10)
+    assert stored["created_at"] == datetime(2025, 3, 2, 1, 30)
+
+
+async def test_keyset_pages_are_newest_first_without_gaps(storage, seeded):
+    expected = [row["id"] for row in newest_first(seeded)]
+    for limit in (1, 7, 40, 100):
+        assert await all_pages(storage, limit) == expected
+    assert [row["id"] async for row in storage.iter_contact_requests(page_size=6)] == expected
+
+
+@pytest.mark.parametrize("filters, keep", [
+    ({"status": "contacted"}, lambda row: row["status"] == "contacted"),
+    ({"project_type": "e-commerce"}, lambda row: row["project_type"] == "e-commerce"),
+    ({"status": "pending", "project_type": "e-commerce"},
+     lambda row: row["status"] == "pending" and row["project_type"] == "e-commerce"),
+    # created_to is exclusive
+    ({"created_from": BASE + timedelta(seconds=3), "created_to": BASE + timedelta(seconds=8)},
+     lambda row: BASE + timedelta(seconds=3) <= row["created_at"] < BASE + timedelta(seconds=8)),
+    ({"created_from": (BASE + timedelta(seconds=10)).replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(hours=5)))},
+     lambda row: row["created_at"] >= BASE + timedelta(seconds=10)),
+])
+async def test_filters(storage, seeded, filters, keep):
+    expected = [row["id"] for row in newest_first(seeded) if keep(row)]
+    assert expected
+    assert await all_pages(storage, 4, filters) == expected
+    assert [row["id"] async for row in storage.iter_contact_requests(filters, page_size=3)] == expected
+
+
+async def test_bulk_insert_reports_each_failed_row(storage, seeded):
+    errors = await storage.insert_contact_requests([make_row(100), dict(seeded[0], name="Duplicado"), make_row(101)])
+
+    assert errors[0] is None and errors[2] is None
+    assert isinstance(errors[1], Exception)
+    assert len(await all_pages(storage, 100)) == 42
+
+
+async def test_insert_missing_skips_stored_rows(storage, seeded):
+    stored = seeded[1]
+    await storage.update_contact_request_status(stored["id"], "completed")
+    before = await storage.contact_request_stats()
+
+    # A replay of the original row plus a new one, twice
+    for _ in range(2):
+        assert await storage.insert_missing_contact_requests([stored, make_row(200)]) == [None, None]
+
+    rows = {row["id"]: row async for row in storage.iter_contact_requests()}
+    assert len(rows) == 41
+    # The stored row is left untouched, the new one counted once
+    assert rows[stored["id"]]["status"] == "completed"
+    stats = await storage.contact_request_stats()
+    assert stats["total"] == before["total"] + 1
+    assert stats == await full_scan(storage)
+
+
+async def test_single_status_update(storage, seeded):
+    target = seeded[1]
+    assert await storage.update_contact_request_status(target["id"], "completed")
+    assert not await storage.update_contact_request_status(str(uuid.uuid4()), "completed")
+
+    completed = await all_pages(storage, 10, {"status": "completed"})
+    assert completed == [target["id"]]
+
+
+async def test_bulk_status_update_outcomes(storage, seeded):
+    pending, contacted = seeded[1], seeded[0]
+    missing = str(uuid.uuid4())
+
+    outcomes = await storage.update_contact_request_statuses(
+        [pending["id"], contacted["id"], missing], "contacted", expected_status="pending"
+    )
+    assert outcomes == {
+        pending["id"]: (STATUS_UPDATED, "contacted"),
+        contacted["id"]: (STATUS_UNCHANGED, "contacted"),
+        missing: (STATUS_NOT_FOUND, None),
+    }
+
+    outcomes = await storage.update_contact_request_statuses(
+        [pending["id"], seeded[2]["id"]], "completed", expected_status="pending"
+    )
+    assert outcomes == {
+        pending["id"]: (STATUS_CONFLICT, "contacted"),
+        seeded[2]["id"]: (STATUS_UPDATED, "completed"),
+    }
+
+    # Without expected_status every existing row moves
+    ids = [row["id"] for row in seeded[:8]]
+    outcomes = await storage.update_contact_request_statuses(ids, "completed")
+    assert {outcome for outcome, _ in outcomes.values()} == {STATUS_UPDATED, STATUS_UNCHANGED}
+    assert sorted(await all_pages(storage, 50, {"status": "completed"})) == sorted(ids)
+
+
+async def test_stats_follow_every_write(storage, seeded):
+    await storage.update_contact_request_status(seeded[1]["id"], "completed")
+    await storage.update_contact_request_status(seeded[1]["id"], "completed")
+    await storage.update_contact_request_statuses([row["id"] for row in seeded[:12]], "contacted")
+    await storage.insert_missing_contact_requests([seeded[3], make_row(300, project_type="blog")])
+
+    expected = await full_scan(storage)
+    assert expected["total"] == 41
+    assert expected["by_project_type"]["blog"] == 1
+    assert await storage.contact_request_stats() == expected
+    assert await storage.rebuild_contact_request_stats() == expected
+    assert await storage.contact_request_stats() == expected
+
+
+async def test_search_ranks_name_and_company_above_description(storage, seeded):
+    if storage.name == "mongo":
+        pytest.skip("mongomock has no $text")
+    await storage.insert_contact_requests([
+        make_row(500, description="Queremos vender muebles de diseño en una tienda online."),
+        make_row(501, company="Muebles del Sur", description="Un sitio institucional."),
+        make_row(502, name="Mueblería Ana", description="Catálogo de productos."),
+    ])
+
+    rows, next_offset = await storage.search_contact_requests(["muebles"], 10)
+    assert next_offset is None
+    assert [row["id"] for row in rows][-1] == make_row(500)["id"]
+    assert {row["id"] for row in rows[:2]} == {make_row(501)["id"], make_row(502)["id"]}
+    assert set(rows[0]) == set(CONTACT_REQUEST_FIELDS)
+
+    first, next_offset = await storage.search_contact_requests(["muebles"], 2)
+    rest, last = await storage.search_contact_requests(["muebles"], 2, next_offset)
+    assert [row["id"] for row in first + rest] == [row["id"] for row in rows]
+    assert (next_offset, last) == (2, None)
+
+    assert await storage.search_contact_requests(["inexistente"], 10) == ([], None)
+
+
+async def test_users(storage):
+    assert await storage.get_user_by_email("admin@lsweb.com") is None
+    await storage.insert_user({"id": str(uuid.uuid4()), "email": "admin@lsweb.com", "password_hash": "hash",
+                               "role": "admin", "created_at": BASE})
+
+    user = await storage.get_user_by_email("admin@lsweb.com")
+    assert (user["email"], user["password_hash"], user["role"]) == ("admin@lsweb.com", "hash", "admin")
+    assert abs(user["created_at"] - BASE) < timedelta(milliseconds=1)
+    assert await storage.get_user_by_email("otro@lsweb.com") is None
+
+
+async def test_duplicate_single_insert_fails(storage, seeded):
+    # Mongo lets pymongo's DuplicateKeyError through
+    with pytest.raises(Exception if storage.name == "mongo" else StorageError):
+        await storage.insert_contact_request(seeded[0])
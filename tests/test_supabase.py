@@ -0,0 +1,39 @@
+import base64
+import json
+
+import pytest
+
+from storage.supabase import SupabaseStorage, key_role
+
+
+def jwt_key(role: str) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps({"iss": "supabase", "role": role}).encode()).decode().rstrip("=")
+    return f"eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.{payload}.signature"
+
+
+@pytest.mark.parametrize("key, role", [
+    (jwt_key("anon"), "anon"),
+    (jwt_key("service_role"), "service_role"),
+    ("sb_publishable_abc123", "anon"),
+    ("sb_secret_abc123", "service_role"),
+    ("test-key", None),
+    ("a.%%%.b", None),
+    ("", None),
+])
+def test_key_role(key, role):
+    assert key_role(key) == role
+
+
+@pytest.mark.parametrize("key", [jwt_key("anon"), jwt_key("authenticated"), "sb_publishable_abc123"])
+def test_client_keys_are_rejected_at_startup(monkeypatch, key):
+    # RLS would turn every outbox enqueue and stats read into a logged permission error
+    monkeypatch.setenv("SUPABASE_KEY", key)
+    with pytest.raises(ValueError, match="service_role"):
+        SupabaseStorage.from_env()
+
+
+def test_service_role_key_is_accepted(monkeypatch):
+    monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_KEY", jwt_key("service_role"))
+    storage = SupabaseStorage.from_env()
+    assert storage.headers["apikey"] == jwt_key("service_role")